@@ -94,13 +94,14 @@ export class SketchAgent extends MultishotAgent {
       const allResults: SketchAnalysisOutput[] = [];
       const errors: string[] = [];
 
-      for (const imagePath of inputData.imagePaths) {
-        try {
-          const result = await this.pythonClient.analyzeSketch(
-            imagePath,
-            inputData.projectContext
-          );
+      const results = await this.pythonClient.analyzeMultiple(
+        inputData.imagePaths,
+        inputData.projectContext
+      );
 
+      inputData.imagePaths.forEach((imagePath, index) => {
+        const result = results[index];
+        try {
           if (result.success && result.result) {
             const normalizedResult: SketchAnalysisOutput = {
               sketchId: result.result.sketch_id,
@@ -128,7 +129,7 @@ export class SketchAgent extends MultishotAgent {
           const errorMessage = error instanceof Error ? error.message : 'Unknown error';
           errors.push(`Error analyzing ${imagePath}: ${errorMessage}`);
         }
-      }
+      });
 
       if (allResults.length === 0) {
         return {
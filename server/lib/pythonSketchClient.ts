@@ -3,10 +3,15 @@
  *
  * Spawns Python subprocess to analyze construction drawings/sketches.
  * Only called when images are uploaded (conditional triggering for cost savings).
+ *
+ * With SKETCH_AGENT_MODE=worker, requests go to one long-lived Python worker
+ * (main_standalone.py --server) instead of spawning a process per drawing.
  */
 
-import { spawn } from 'child_process';
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { createHash } from 'crypto';
 import path from 'path';
+import os from 'os';
 import fs from 'fs/promises';
 
 export interface SketchAnalysisResult {
@@ -51,11 +56,146 @@ export interface SketchAnalysisResult {
   };
   error?: string;
   error_type?: string;
+  latency_ms?: number;
+  queue_ms?: number;
+}
+
+const ANALYSIS_TIMEOUT_MS = 300000;
+
+/**
+ * Persistent Python worker speaking JSON lines over stdin/stdout.
+ *
+ * Keeps one warm SketchAgent (imports, provider client, system prompt) and
+ * multiplexes concurrent requests by id.
+ */
+export class PythonSketchWorker {
+  private process: ChildProcessWithoutNullStreams | null = null;
+  private ready: Promise<void> | null = null;
+  private buffer = '';
+  private nextId = 1;
+  private pending = new Map<string, {
+    resolve: (result: SketchAnalysisResult) => void;
+    reject: (error: Error) => void;
+    timer: NodeJS.Timeout;
+  }>();
+
+  constructor(
+    private pythonPath: string,
+    private scriptPath: string
+  ) {}
+
+  private start(): Promise<void> {
+    if (this.ready) {
+      return this.ready;
+    }
+
+    this.ready = new Promise((resolve, reject) => {
+      const python = spawn(this.pythonPath, [this.scriptPath, '--server'], {
+        env: {
+          ...process.env,
+          PYTHONPATH: path.join(process.cwd(), 'sketch-agent')
+        },
+        cwd: process.cwd()
+      });
+      this.process = python;
+
+      let stderr = '';
+      let started = false;
+
+      python.stdout.on('data', (data) => {
+        this.buffer += data.toString();
+        let newline: number;
+        while ((newline = this.buffer.indexOf('\n')) >= 0) {
+          const line = this.buffer.slice(0, newline).trim();
+          this.buffer = this.buffer.slice(newline + 1);
+          if (!line) continue;
+
+          let message: SketchAnalysisResult & { id?: string | null; op?: string; event?: string };
+          try {
+            message = JSON.parse(line);
+          } catch {
+            continue;
+          }
+
+          if (message.op === 'ready') {
+            started = true;
+            resolve();
+            continue;
+          }
+
+          // Partial section events (streaming requests) are not final responses
+          if (message.event) {
+            continue;
+          }
+
+          const entry = message.id ? this.pending.get(message.id) : undefined;
+          if (entry) {
+            clearTimeout(entry.timer);
+            this.pending.delete(message.id as string);
+            entry.resolve(message);
+          }
+        }
+      });
+
+      python.stderr.on('data', (data) => {
+        stderr += data.toString();
+      });
+
+      python.on('error', (error) => {
+        this.reset(new Error(`Failed to spawn Python worker: ${error.message}`));
+        if (!started) reject(error);
+      });
+
+      python.on('close', (code) => {
+        const error = new Error(`Python worker exited with code ${code}\nStderr: ${stderr}`);
+        this.reset(error);
+        if (!started) reject(error);
+      });
+    });
+
+    return this.ready;
+  }
+
+  private reset(error: Error): void {
+    for (const entry of Array.from(this.pending.values())) {
+      clearTimeout(entry.timer);
+      entry.reject(error);
+    }
+    this.pending.clear();
+    this.process = null;
+    this.ready = null;
+    this.buffer = '';
+  }
+
+  async analyze(imagePath: string, context?: string): Promise<SketchAnalysisResult> {
+    await this.start();
+
+    const id = String(this.nextId++);
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error('Python worker request timeout after 5 minutes'));
+      }, ANALYSIS_TIMEOUT_MS);
+
+      this.pending.set(id, { resolve, reject, timer });
+      this.process?.stdin.write(
+        JSON.stringify({ id, op: 'analyze', image_path: imagePath, context }) + '\n'
+      );
+    });
+  }
+
+  stop(): void {
+    if (this.process) {
+      this.process.stdin.write(JSON.stringify({ op: 'shutdown' }) + '\n');
+      this.process.stdin.end();
+    }
+  }
 }
 
 export class PythonSketchClient {
   private pythonPath: string = 'python3';
   private scriptPath: string;
+  private worker: PythonSketchWorker | null = null;
 
   constructor() {
     this.scriptPath = path.join(
@@ -63,6 +203,10 @@ export class PythonSketchClient {
       'sketch-agent',
       'main_standalone.py'
     );
+
+    if (process.env.SKETCH_AGENT_MODE === 'worker') {
+      this.worker = new PythonSketchWorker(this.pythonPath, this.scriptPath);
+    }
   }
 
   /**
@@ -76,6 +220,13 @@ export class PythonSketchClient {
     imagePath: string,
     context?: string
   ): Promise<SketchAnalysisResult> {
+    if (this.worker) {
+      await fs.access(imagePath).catch(() => {
+        throw new Error(`Image file not found: ${imagePath}`);
+      });
+      return this.worker.analyze(imagePath, context);
+    }
+
     return new Promise(async (resolve, reject) => {
       // Validate image exists
       try {
@@ -137,38 +288,132 @@ export class PythonSketchClient {
       setTimeout(() => {
         python.kill();
         reject(new Error('Python process timeout after 5 minutes'));
-      }, 300000);
+      }, ANALYSIS_TIMEOUT_MS);
     });
   }
 
   /**
-   * Analyze multiple sketches sequentially
+   * Analyze multiple sketches concurrently
+   *
+   * Runs one Python batch process (or the persistent worker) with bounded
+   * concurrency instead of one drawing after another. One failing image
+   * does not abort the set.
    *
    * @param imagePaths - Array of absolute paths to image files
    * @param context - Optional project context
-   * @returns Array of analysis results (one per image)
+   * @returns Array of analysis results (one per image, in input order)
    */
   async analyzeMultiple(
     imagePaths: string[],
     context?: string
   ): Promise<SketchAnalysisResult[]> {
-    const results: SketchAnalysisResult[] = [];
+    if (imagePaths.length === 0) {
+      return [];
+    }
 
-    for (const imagePath of imagePaths) {
-      try {
-        const result = await this.analyzeSketch(imagePath, context);
-        results.push(result);
-      } catch (error) {
-        // Return error result for this image
-        results.push({
-          success: false,
-          error: error instanceof Error ? error.message : String(error),
-          error_type: 'AnalysisError'
-        });
-      }
+    if (this.worker) {
+      return Promise.all(
+        imagePaths.map((imagePath) =>
+          this.analyzeSketch(imagePath, context).catch((error) => ({
+            success: false,
+            error: error instanceof Error ? error.message : String(error),
+            error_type: 'AnalysisError'
+          }))
+        )
+      );
     }
 
-    return results;
+    try {
+      return await this.analyzeBatch(imagePaths, context);
+    } catch (error) {
+      // Whole batch failed (spawn error, timeout) - report it for every image
+      const message = error instanceof Error ? error.message : String(error);
+      return imagePaths.map(() => ({
+        success: false,
+        error: message,
+        error_type: 'AnalysisError'
+      }));
+    }
+  }
+
+  /**
+   * Run main_standalone.py --batch over a temporary manifest
+   *
+   * The run is journaled under a job id derived from the drawing set, so
+   * analyzing the same set again after a timeout or crash only pays for the
+   * sheets that had not finished.
+   */
+  private async analyzeBatch(
+    imagePaths: string[],
+    context?: string
+  ): Promise<SketchAnalysisResult[]> {
+    const concurrency = Number(process.env.SKETCH_BATCH_CONCURRENCY || 8);
+    const manifestDir = await fs.mkdtemp(path.join(os.tmpdir(), 'sketch-batch-'));
+    const manifestPath = path.join(manifestDir, 'manifest.json');
+    await fs.writeFile(manifestPath, JSON.stringify({ context, items: imagePaths }));
+    const jobId = 'node-' + createHash('sha256')
+      .update(JSON.stringify({ context: context ?? null, items: imagePaths }))
+      .digest('hex')
+      .slice(0, 16);
+
+    try {
+      const stdout = await new Promise<string>((resolve, reject) => {
+        const python = spawn(
+          this.pythonPath,
+          [this.scriptPath, '--batch', manifestPath, '--concurrency', String(concurrency), '--job', jobId],
+          {
+            env: {
+              ...process.env,
+              PYTHONPATH: path.join(process.cwd(), 'sketch-agent')
+            },
+            cwd: process.cwd()
+          }
+        );
+
+        let out = '';
+        let stderr = '';
+        python.stdout.on('data', (data) => {
+          out += data.toString();
+        });
+        python.stderr.on('data', (data) => {
+          stderr += data.toString();
+        });
+        python.on('error', (error) => {
+          reject(new Error(`Failed to spawn Python: ${error.message}`));
+        });
+
+        // Timeout scales with the number of concurrency "waves" in the set
+        const waves = Math.ceil(imagePaths.length / Math.max(1, concurrency));
+        const timer = setTimeout(() => {
+          python.kill();
+          reject(new Error(`Python batch timeout after ${waves * 5} minutes`));
+        }, ANALYSIS_TIMEOUT_MS * waves);
+
+        python.on('close', (code) => {
+          clearTimeout(timer);
+          if (code !== 0) {
+            reject(new Error(
+              `Python process exited with code ${code}\nStderr: ${stderr}\nStdout: ${out}`
+            ));
+            return;
+          }
+          resolve(out);
+        });
+      });
+
+      const batch = JSON.parse(stdout) as {
+        success: boolean;
+        results: Array<SketchAnalysisResult & { index: number }>;
+      };
+      return batch.results.map(({ success, result, error, error_type }) => ({
+        success,
+        result,
+        error,
+        error_type
+      }));
+    } finally {
+      await fs.rm(manifestDir, { recursive: true, force: true });
+    }
   }
 
   /**
@@ -0,0 +1,161 @@
+"""Two-pass cascaded analysis: a cheap triage model first, the main model only where needed.
+
+With the cascade on, every sheet is first analyzed by a fast, inexpensive
+model of the same provider (``DEFAULT_TRIAGE_MODELS``) with a smaller
+token budget. Its answer is kept when it looks trustworthy; otherwise the
+sheet is escalated to the agent's main model and the triage answer is
+discarded. A sheet is escalated when:
+
+- the triage request fails or its answer does not validate
+  (``triage_failed``), or it is cut off (``truncated``): a sheet that
+  overflows the triage budget is a dense one;
+- ``confidence_score`` is missing or below ``min_confidence``
+  (``no_confidence``, ``low_confidence``);
+- more than ``max_low_items`` of the dimensions carry a ``confidence``
+  below ``item_confidence`` (``low_item_confidence``);
+- the sheet holds more than ``max_items`` dimensions, materials and
+  components (``complex``);
+- its ``document_type`` contains one of ``escalate_types``
+  (``document_type``).
+
+Cover pages, schedules and simple plans then cost a triage request; dense
+details cost a triage request plus the full one. ``CascadeStats`` counts
+both outcomes. The cascade is cheaper than sending every sheet to the main
+model while the escalated share stays below ``1 - triage_cost / main_cost``
+per sheet; the share on a real drawing set is what to tune the thresholds
+against.
+
+Tiled sheets skip triage (their size already marks them as dense), and
+provider batch jobs are not cascaded.
+
+Settings come from the environment: ``SKETCH_CASCADE`` (off, on, or a
+``provider[:model]`` triage model), ``SKETCH_CASCADE_MIN_CONFIDENCE``,
+``SKETCH_CASCADE_ITEM_CONFIDENCE``, ``SKETCH_CASCADE_MAX_LOW_ITEMS``,
+``SKETCH_CASCADE_MAX_ITEMS``, ``SKETCH_CASCADE_ESCALATE_TYPES``
+(comma-separated) and ``SKETCH_CASCADE_TRIAGE_TOKENS``.
+"""
+
+import os
+from typing import Optional
+
+from pydantic import BaseModel
+
+from .types import SketchAnalysisResult
+
+
+# Cheaper vision models of each provider; providers without one need an
+# explicit SKETCH_CASCADE=provider:model
+DEFAULT_TRIAGE_MODELS = {
+    "openai": "gpt-4o-mini",
+    "anthropic": "claude-3-haiku-20240307",
+    "gemini": "gemini-1.5-flash-8b",
+    "qwen": "qwen-vl-plus",
+}
+
+OFF_VALUES = ("", "0", "off", "false", "no")
+ON_VALUES = ("1", "on", "true", "auto", "yes")
+
+OUTCOMES = ("kept", "escalated")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def parse_triage_spec(spec: Optional[str]) -> Optional[tuple[Optional[str], Optional[str]]]:
+    """``SKETCH_CASCADE`` value -> None (off), or (provider, model) with None for defaults.
+
+    ``"on"`` picks each sheet's provider and its default triage model;
+    ``"openai"`` or ``"openai:gpt-4o-mini"`` pins the triage model.
+    """
+    spec = (spec or "").strip()
+    if spec.lower() in OFF_VALUES:
+        return None
+    if spec.lower() in ON_VALUES:
+        return None, None
+    provider, _, model = spec.partition(":")
+    return provider.lower(), model or None
+
+
+def triage_target(spec: tuple[Optional[str], Optional[str]], provider: str) -> Optional[tuple[str, Optional[str]]]:
+    """(provider, model) of the triage model for sheets sent to ``provider``, if any."""
+    triage_provider, model = spec
+    triage_provider = triage_provider or provider
+    if model is None:
+        model = DEFAULT_TRIAGE_MODELS.get(triage_provider)
+        if model is None and triage_provider == provider:
+            # No cheaper tier: the triage model would be the main model
+            return None
+    return triage_provider, model
+
+
+class CascadePolicy(BaseModel):
+    """Thresholds that decide which triage answers are kept."""
+    min_confidence: float = 0.8
+    item_confidence: float = 0.7
+    max_low_items: float = 0.2
+    max_items: int = 60
+    escalate_types: list[str] = []
+    triage_tokens: int = 4096
+
+    @classmethod
+    def from_env(cls) -> "CascadePolicy":
+        types = os.getenv("SKETCH_CASCADE_ESCALATE_TYPES", "")
+        return cls(
+            min_confidence=_env_float("SKETCH_CASCADE_MIN_CONFIDENCE", 0.8),
+            item_confidence=_env_float("SKETCH_CASCADE_ITEM_CONFIDENCE", 0.7),
+            max_low_items=_env_float("SKETCH_CASCADE_MAX_LOW_ITEMS", 0.2),
+            max_items=int(os.getenv("SKETCH_CASCADE_MAX_ITEMS", "60")),
+            escalate_types=[t.strip().lower() for t in types.split(",") if t.strip()],
+            # Haiku-class models stop at 4096 output tokens
+            triage_tokens=int(os.getenv("SKETCH_CASCADE_TRIAGE_TOKENS", "4096")),
+        )
+
+    def escalation_reason(self, result: SketchAnalysisResult) -> Optional[str]:
+        """Why a triage answer must be redone by the main model; None to keep it."""
+        if result.confidence_score is None:
+            return "no_confidence"
+        if result.confidence_score < self.min_confidence:
+            return "low_confidence"
+
+        technical = result.technical_data
+        if technical is not None:
+            dimensions = technical.dimensions
+            rated = [d.confidence for d in dimensions if d.confidence is not None]
+            low = sum(1 for confidence in rated if confidence < self.item_confidence)
+            if rated and low / len(rated) > self.max_low_items:
+                return "low_item_confidence"
+            if len(dimensions) + len(technical.materials) + len(technical.components) > self.max_items:
+                return "complex"
+
+        document_type = (result.context_layer.document_type or "").lower() if result.context_layer else ""
+        if any(kind in document_type for kind in self.escalate_types):
+            return "document_type"
+        return None
+
+
+class CascadeStats:
+    """Triage outcomes since start-up, for summaries and the ``stats`` op."""
+
+    def __init__(self):
+        self.kept = 0
+        self.escalated = 0
+        self.reasons: dict[str, int] = {}
+
+    def record(self, reason: Optional[str]) -> None:
+        if reason is None:
+            self.kept += 1
+            return
+        self.escalated += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def snapshot(self) -> dict:
+        sheets = self.kept + self.escalated
+        return {
+            "sheets": sheets,
+            "kept": self.kept,
+            "escalated": self.escalated,
+            "escalated_share": round(self.escalated / sheets, 3) if sheets else 0.0,
+            "reasons": dict(sorted(self.reasons.items())),
+        }
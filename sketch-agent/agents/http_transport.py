@@ -0,0 +1,308 @@
+"""Shared HTTP transport for the OpenAI-compatible and Anthropic clients.
+
+Every provider client (OpenAI, Anthropic, DeepSeek, Qwen, and the batch API
+clients derived from them) sends through one ``httpx.AsyncClient`` per event
+loop, instead of each SDK client opening its own pool. On top of that:
+
+- the pool is sized to the batch/server concurrency (``configure_transport``);
+- HTTP/2 is used when the ``h2`` package is installed, multiplexing
+  concurrent requests to a provider over one TLS connection;
+- idle connections are kept alive long enough (longer in server mode) that
+  requests arriving seconds apart skip TCP and TLS set-up;
+- ``prewarm`` opens connections at startup, before the first sheet is ready;
+- timeouts are split per phase: connect, write (uploading the image body),
+  first byte (the model generating a non-streamed answer), read (gap
+  between chunks once the response is flowing) and pool (waiting for a
+  free connection).
+
+Each request records ``pool_wait``, ``connect`` (new connections only) and
+``upload`` spans in the current telemetry meter, so pool waits show up in
+``sketch_stage_seconds`` alongside the other stages.
+
+Gemini's SDK brings its own gRPC/REST transport and is not covered.
+
+Settings come from the environment: ``SKETCH_HTTP_MAX_CONNECTIONS``,
+``SKETCH_HTTP_KEEPALIVE_S``, ``SKETCH_HTTP2`` (auto/1/0),
+``SKETCH_HTTP_PREWARM`` and ``SKETCH_TIMEOUT_{CONNECT,WRITE,FIRST_BYTE,READ,POOL}``
+(seconds).
+"""
+
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+from typing import AsyncIterator, Iterable, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from .telemetry import record_span
+
+
+DEFAULT_CONCURRENCY = 8
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class TransportSettings(BaseModel):
+    """Pool size, keep-alive and per-phase timeouts of the shared transport."""
+    max_connections: int
+    max_keepalive: int
+    keepalive_expiry: float
+    http2: bool
+    connect_timeout: float
+    write_timeout: float
+    first_byte_timeout: float
+    read_timeout: float
+    pool_timeout: float
+
+    @classmethod
+    def from_env(cls, concurrency: int = DEFAULT_CONCURRENCY, server: bool = False) -> "TransportSettings":
+        # Tiles, hedged requests and continuations can put a few requests per
+        # analysis slot in flight at once
+        max_connections = int(os.getenv("SKETCH_HTTP_MAX_CONNECTIONS") or max(4, concurrency * 2))
+
+        http2 = os.getenv("SKETCH_HTTP2", "auto").lower()
+        h2_installed = importlib.util.find_spec("h2") is not None
+        if http2 in ("1", "on", "true") and not h2_installed:
+            print("HTTP/2 disabled: install with 'pip install httpx[http2]'", file=sys.stderr)
+
+        return cls(
+            max_connections=max_connections,
+            max_keepalive=max_connections,
+            # Servers see requests seconds to minutes apart; keep connections for them
+            keepalive_expiry=_env_float("SKETCH_HTTP_KEEPALIVE_S", 300.0 if server else 30.0),
+            http2=h2_installed and http2 not in ("0", "off", "false"),
+            connect_timeout=_env_float("SKETCH_TIMEOUT_CONNECT", 10.0),
+            # A 4 MB sheet over a slow office uplink
+            write_timeout=_env_float("SKETCH_TIMEOUT_WRITE", 60.0),
+            # Non-streamed answers arrive only once the model has finished
+            first_byte_timeout=_env_float("SKETCH_TIMEOUT_FIRST_BYTE", 300.0),
+            read_timeout=_env_float("SKETCH_TIMEOUT_READ", 60.0),
+            pool_timeout=_env_float("SKETCH_TIMEOUT_POOL", 120.0),
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        """httpx timeout: its read timeout guards the wait for the first byte.
+
+        The shorter gap allowed between chunks is enforced by the transport.
+        """
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            write=self.write_timeout,
+            read=max(self.first_byte_timeout, self.read_timeout),
+            pool=self.pool_timeout
+        )
+
+
+class TransportStats:
+    """Process-wide counters behind the ``stats`` op and the metrics gauges."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.pool_waits = 0
+        self.pool_wait_seconds = 0.0
+        self.pool_wait_max = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "pool_waits": self.pool_waits,
+            "pool_wait_seconds": round(self.pool_wait_seconds, 3),
+            "pool_wait_max_seconds": round(self.pool_wait_max, 3),
+        }
+
+
+_stats = TransportStats()
+_settings: Optional[TransportSettings] = None
+# Event loop -> (client, transport); None holds a client built outside any loop
+_clients: dict[Optional[asyncio.AbstractEventLoop], tuple[httpx.AsyncClient, "PhaseTimeoutTransport"]] = {}
+
+# A request counts as having waited for the pool above this
+POOL_WAIT_THRESHOLD = 0.005
+
+
+class _Timeline:
+    """Connection pool events of one request, from httpcore's trace hook."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_event: Optional[float] = None
+        self.connect: Optional[list[float]] = None
+        self.upload: Optional[list[float]] = None
+
+    async def __call__(self, event: str, info: dict) -> None:
+        now = time.perf_counter()
+        if self.first_event is None:
+            self.first_event = now
+        # Events are "<connection|http11|http2>.<step>.<started|complete|failed>"
+        step = event.partition(".")[2].rpartition(".")[0]
+        if step in ("connect_tcp", "start_tls"):
+            if self.connect is None:
+                self.connect = [now, now]
+            self.connect[1] = now
+        elif step in ("send_request_headers", "send_request_body"):
+            if self.upload is None:
+                self.upload = [now, now]
+            self.upload[1] = now
+
+    def record(self) -> None:
+        _stats.requests += 1
+        if self.first_event is None:
+            return
+        waited = self.first_event - self.start
+        record_span("pool_wait", self.start, self.first_event)
+        if waited > POOL_WAIT_THRESHOLD:
+            _stats.pool_waits += 1
+        _stats.pool_wait_seconds += waited
+        _stats.pool_wait_max = max(_stats.pool_wait_max, waited)
+        if self.connect is not None:
+            _stats.connections_opened += 1
+            record_span("connect", *self.connect)
+        if self.upload is not None:
+            record_span("upload", *self.upload)
+
+
+class _ReadTimeoutStream(httpx.AsyncByteStream):
+    """Response body that fails if the server goes quiet for ``timeout`` seconds."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, timeout: float, request: httpx.Request):
+        self.stream = stream
+        self.timeout = timeout
+        self.request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = self.stream.__aiter__()
+        while True:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                return
+            except TimeoutError:
+                raise httpx.ReadTimeout(
+                    f"No response data for {self.timeout:g}s", request=self.request
+                ) from None
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.stream.aclose()
+
+
+class PhaseTimeoutTransport(httpx.AsyncBaseTransport):
+    """Pooled transport that records pool/connect/upload spans and enforces the read gap."""
+
+    def __init__(self, settings: TransportSettings):
+        self.settings = settings
+        self.inner = httpx.AsyncHTTPTransport(
+            http2=settings.http2,
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive,
+                keepalive_expiry=settings.keepalive_expiry
+            )
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timeline = _Timeline()
+        caller_trace = request.extensions.get("trace")
+
+        async def trace(event: str, info: dict) -> None:
+            await timeline(event, info)
+            if caller_trace is not None:
+                await caller_trace(event, info)
+
+        request.extensions["trace"] = trace
+        try:
+            response = await self.inner.handle_async_request(request)
+        finally:
+            timeline.record()
+
+        response.stream = _ReadTimeoutStream(response.stream, self.settings.read_timeout, request)
+        return response
+
+    def open_connections(self) -> int:
+        pool = getattr(self.inner, "_pool", None)
+        return len(getattr(pool, "connections", ()))
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def configure_transport(concurrency: int = DEFAULT_CONCURRENCY, server: bool = False) -> TransportSettings:
+    """Size the shared pool for ``concurrency`` analyses; call before the first request."""
+    global _settings
+    _settings = TransportSettings.from_env(concurrency, server)
+    return _settings
+
+
+def transport_settings() -> TransportSettings:
+    global _settings
+    if _settings is None:
+        _settings = TransportSettings.from_env()
+    return _settings
+
+
+def shared_http_client() -> httpx.AsyncClient:
+    """The process's pooled client for the running event loop.
+
+    Connections belong to the loop that opened them, so a second
+    ``asyncio.run`` gets a client of its own.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop not in _clients:
+        for closed in [other for other in _clients if other is not None and other.is_closed()]:
+            del _clients[closed]
+        settings = transport_settings()
+        transport = PhaseTimeoutTransport(settings)
+        _clients[loop] = (httpx.AsyncClient(transport=transport, timeout=settings.timeout()), transport)
+    return _clients[loop][0]
+
+
+def sdk_client_options() -> dict:
+    """Keyword arguments that put an OpenAI/Anthropic SDK client on the shared transport."""
+    return {"http_client": shared_http_client(), "timeout": transport_settings().timeout()}
+
+
+async def prewarm(base_urls: Iterable[str], connections: Optional[int] = None) -> int:
+    """Open connections to each URL ahead of the first request.
+
+    One connection per origin with HTTP/2, else ``connections``
+    (``SKETCH_HTTP_PREWARM``, default 4). Any response, even a 404, leaves
+    a warm connection in the pool; failures are ignored. Returns the number
+    of connections opened.
+    """
+    settings = transport_settings()
+    if connections is None:
+        connections = int(os.getenv("SKETCH_HTTP_PREWARM", "4"))
+    per_origin = 1 if settings.http2 else min(max(0, connections), settings.max_keepalive)
+    client = shared_http_client()
+    before = _stats.connections_opened
+
+    async def touch(url: str) -> None:
+        try:
+            await client.head(url, timeout=httpx.Timeout(settings.connect_timeout))
+        except httpx.HTTPError:
+            pass
+
+    await asyncio.gather(*(touch(url) for url in set(base_urls) for _ in range(per_origin)))
+    return _stats.connections_opened - before
+
+
+def transport_stats() -> dict:
+    stats = _stats.snapshot()
+    settings = transport_settings()
+    stats["open_connections"] = sum(transport.open_connections() for _, transport in list(_clients.values()))
+    stats["max_connections"] = settings.max_connections
+    stats["http2"] = settings.http2
+    return stats
@@ -0,0 +1,327 @@
+"""Shared image encoding for vision providers.
+
+Every provider needs the drawing as encoded bytes (and most as base64).
+Encoding happens once per image and is memoized across providers, retries
+and hedged requests:
+
+- Content is classified first (``classify_image``) and encoded in the
+  smallest representation that keeps it legible: construction drawings are
+  mostly dark lines on light paper, so grayscale line art becomes a 16-level
+  (4-bit) gray PNG, colored line art a 64-color palette PNG, and true
+  two-tone scans a 1-bit PNG. Only photographic content (site photos,
+  renders) is sent as JPEG, where lossy compression does not blur text.
+- Transparent backgrounds are flattened onto white, as on paper.
+- Images opened from a file in an accepted format (PNG, JPEG, WebP, GIF)
+  are passed through as the original file bytes when those are smaller.
+- Each provider's media types and size cap are respected: an image still
+  over the cap is downscaled until it fits.
+- ``encode_image_async`` runs the work in a thread pool so a large scan does
+  not block other analyses on the event loop.
+
+``SKETCH_IMAGE_COMPRESSION=off`` restores the previous behaviour (original
+bytes, else RGB PNG). The memo is keyed by image object identity and
+dropped when the image is garbage collected. Images must not be modified in
+place after encoding.
+"""
+
+import asyncio
+import base64
+import io
+import os
+import threading
+import time
+import weakref
+from typing import Iterable, Optional
+from PIL import Image, ImageChops
+
+from .telemetry import record_image_bytes, record_span
+
+
+# PIL format name -> media type accepted by all supported providers
+DEFAULT_ACCEPTED_FORMATS = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+# Modes PNG can store without conversion
+PNG_MODES = {"1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA"}
+
+PNG_COMPRESS_LEVEL = int(os.getenv("SKETCH_PNG_COMPRESS_LEVEL", "3"))
+
+# "auto" picks a representation per image; "off" sends original bytes or RGB PNG
+COMPRESSION = os.getenv("SKETCH_IMAGE_COMPRESSION", "auto").lower()
+
+# Conservative default for providers that do not document a cap (5 MB once base64-encoded)
+DEFAULT_MAX_IMAGE_BYTES = 3_750_000
+
+JPEG_QUALITY = int(os.getenv("SKETCH_JPEG_QUALITY", "85"))
+
+# Classification runs on a sample of about this many pixels
+SAMPLE_PIXELS = 400_000
+# Channel spread above which a pixel counts as colored, and the share of
+# such pixels above which an image is treated as color
+CHROMA_THRESHOLD = 40
+COLOR_SHARE = 0.005
+# Share of pixels within one 32-level band of gray (the paper) that makes an image line art
+PAPER_SHARE = 0.5
+
+GRAY_LEVELS = 16
+PALETTE_COLORS = 64
+# Palette images are small enough that level 6 is cheap; level 9 saves ~5% for 5x the time
+PALETTE_COMPRESS_LEVEL = 6
+
+
+class EncodedImage:
+    """Encoded image bytes; base64 forms are built per request.
+
+    The base64 text is not cached: the memo keeps an ``EncodedImage`` for as
+    long as its image lives, and a cached copy would hold another 4/3 of the
+    bytes that long. Encoding a few MB takes milliseconds, and the request
+    body holding the text is released once the request is sent.
+    """
+
+    def __init__(self, data: bytes, media_type: str, passthrough: bool = False, kind: Optional[str] = None):
+        self.data = data
+        self.media_type = media_type
+        self.passthrough = passthrough
+        # classify_image() result, when the image was classified
+        self.kind = kind
+
+    @property
+    def base64(self) -> str:
+        return base64.b64encode(self.data).decode("ascii")
+
+    @property
+    def data_url(self) -> str:
+        # Built in one piece rather than around ``base64`` to skip an intermediate copy
+        return b"".join((f"data:{self.media_type};base64,".encode(), base64.b64encode(self.data))).decode("ascii")
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+MemoKey = tuple[int, tuple[str, ...], Optional[int]]
+
+_memo: dict[MemoKey, EncodedImage] = {}
+_memo_lock = threading.Lock()
+
+
+def _memo_key(image: Image.Image, accepted: Iterable[str], max_bytes: Optional[int]) -> MemoKey:
+    return id(image), tuple(sorted(accepted)), max_bytes
+
+
+def _forget(image_id: int) -> None:
+    with _memo_lock:
+        for key in [key for key in _memo if key[0] == image_id]:
+            del _memo[key]
+
+
+def _read_original(image: Image.Image, accepted: dict[str, str]) -> Optional[EncodedImage]:
+    """Return the source file bytes if the image is unmodified and accepted."""
+    image_format = image.format
+    filename = getattr(image, "filename", None)
+
+    # PIL only sets ``format`` on images decoded from a file; derived images
+    # (convert, resize, crop) have format None and must be re-encoded
+    if not image_format or image_format not in accepted or not filename:
+        return None
+
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    return EncodedImage(data, accepted[image_format], passthrough=True)
+
+
+def _encode_png(image: Image.Image) -> EncodedImage:
+    if image.mode not in PNG_MODES:
+        image = image.convert("RGBA" if "A" in image.mode else "RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return EncodedImage(buffer.getvalue(), "image/png")
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB (or L) image with any transparency composited onto white paper."""
+    if image.mode in ("1", "L", "RGB"):
+        return image
+    if image.has_transparency_data:
+        image = image.convert("RGBA")
+        paper = Image.new("RGB", image.size, "white")
+        paper.paste(image, mask=image.getchannel("A"))
+        return paper
+    return image.convert("RGB")
+
+
+def classify_image(image: Image.Image) -> str:
+    """``bilevel``, ``line_art``, ``color_line_art`` or ``photo``.
+
+    Line art is an image dominated by one band of gray (the paper); it is
+    colored when more than a trace of its pixels are saturated.
+    """
+    image = _flatten(image)
+    if image.mode == "1":
+        return "bilevel"
+
+    sample = image
+    if image.width * image.height > SAMPLE_PIXELS:
+        scale = (SAMPLE_PIXELS / (image.width * image.height)) ** 0.5
+        # Nearest neighbour keeps the pixel statistics; averaging would invent mid-tones
+        sample = image.resize(
+            (max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+            Image.Resampling.NEAREST
+        )
+
+    colored = 0.0
+    if sample.mode == "RGB":
+        red, green, blue = sample.split()
+        spread = ImageChops.subtract(
+            ImageChops.lighter(ImageChops.lighter(red, green), blue),
+            ImageChops.darker(ImageChops.darker(red, green), blue)
+        ).histogram()
+        colored = sum(spread[CHROMA_THRESHOLD + 1:]) / (sample.width * sample.height)
+
+    gray = sample.convert("L")
+    histogram = gray.histogram()
+    if colored <= COLOR_SHARE and sum(1 for count in histogram if count) <= 2:
+        return "bilevel"
+    total = sum(histogram)
+    paper = max(sum(histogram[start:start + 32]) for start in range(0, 256 - 31, 8)) / total
+    if paper < PAPER_SHARE:
+        return "photo"
+    return "line_art" if colored <= COLOR_SHARE else "color_line_art"
+
+
+def _save(image: Image.Image, media_type: str, kind: str, **options) -> EncodedImage:
+    buffer = io.BytesIO()
+    image.save(buffer, format=media_type.split("/")[1].upper(), **options)
+    return EncodedImage(buffer.getvalue(), media_type, kind=kind)
+
+
+def _encode_kind(image: Image.Image, kind: str, accepted: dict[str, str]) -> EncodedImage:
+    """Encode ``image`` (already flattened) in the smallest fitting representation for ``kind``."""
+    if kind == "bilevel":
+        return _save(image.convert("L").point(lambda v: 255 if v >= 128 else 0).convert("1"),
+                     "image/png", kind, optimize=True)
+    if kind == "line_art":
+        # 16 gray levels keep anti-aliased strokes and small text legible at 4 bits per pixel
+        levels = image.convert("L").point(lambda v: v * GRAY_LEVELS // 256)
+        indexed = Image.frombytes("P", levels.size, levels.tobytes())
+        indexed.putpalette([v for level in range(GRAY_LEVELS) for v in (level * 255 // (GRAY_LEVELS - 1),) * 3])
+        return _save(indexed, "image/png", kind, bits=4, compress_level=PALETTE_COMPRESS_LEVEL)
+    if kind == "color_line_art":
+        return _save(image.convert("RGB").quantize(colors=PALETTE_COLORS), "image/png", kind,
+                     compress_level=PALETTE_COMPRESS_LEVEL)
+    if "JPEG" in accepted:
+        return _save(image.convert("RGB") if image.mode != "L" else image, "image/jpeg", kind, quality=JPEG_QUALITY)
+    encoded = _encode_png(image)
+    encoded.kind = kind
+    return encoded
+
+
+def _encode_compressed(image: Image.Image, accepted: dict[str, str], max_bytes: int) -> EncodedImage:
+    """Smallest of the classified encoding and the original file, within ``max_bytes``."""
+    flat = _flatten(image)
+    kind = classify_image(flat)
+    encoded = _encode_kind(flat, kind, accepted)
+
+    original = _read_original(image, accepted)
+    if original is not None and len(original) <= len(encoded):
+        original.kind = kind
+        encoded = original
+
+    # Over the provider's cap even so: shrink until it fits
+    while len(encoded) > max_bytes and min(flat.size) > 64:
+        flat = flat.resize(
+            (max(1, flat.width * 3 // 4), max(1, flat.height * 3 // 4)),
+            Image.Resampling.LANCZOS
+        )
+        encoded = _encode_kind(flat, kind, accepted)
+    return encoded
+
+
+def encode_image(
+    image: Image.Image,
+    accepted_formats: Optional[dict[str, str]] = None,
+    max_bytes: Optional[int] = None
+) -> EncodedImage:
+    """Encode an image for upload, reusing a previous encoding if available.
+
+    Args:
+        image: PIL Image object
+        accepted_formats: PIL format name -> media type the provider accepts
+        max_bytes: Provider's size cap for one image (default ``DEFAULT_MAX_IMAGE_BYTES``)
+
+    Returns:
+        Encoded image: the smallest of the content-aware encoding and the
+        original file bytes (original bytes or PNG with compression off)
+    """
+    accepted = accepted_formats or DEFAULT_ACCEPTED_FORMATS
+    max_bytes = max_bytes or DEFAULT_MAX_IMAGE_BYTES
+    key = _memo_key(image, accepted, max_bytes)
+
+    with _memo_lock:
+        encoded = _memo.get(key)
+    if encoded is not None:
+        return encoded
+
+    if COMPRESSION == "off":
+        encoded = _read_original(image, accepted) or _encode_png(image)
+    else:
+        encoded = _encode_compressed(image, accepted, max_bytes)
+
+    with _memo_lock:
+        if not any(k[0] == key[0] for k in _memo):
+            weakref.finalize(image, _forget, key[0])
+        _memo[key] = encoded
+
+    return encoded
+
+
+_in_flight: dict[MemoKey, asyncio.Future] = {}
+
+
+async def encode_image_async(
+    image: Image.Image,
+    accepted_formats: Optional[dict[str, str]] = None,
+    max_bytes: Optional[int] = None
+) -> EncodedImage:
+    """Encode an image in a worker thread, sharing in-flight work.
+
+    Concurrent callers for the same image (e.g. hedged requests to two
+    providers) await a single encoding instead of each starting one. The
+    wait and the payload size are reported to the current telemetry meter.
+    """
+    start = time.perf_counter()
+    encoded = await _encode_shared(image, accepted_formats or DEFAULT_ACCEPTED_FORMATS, max_bytes)
+    record_span("encode", start, time.perf_counter())
+    record_image_bytes(len(encoded))
+    return encoded
+
+
+async def _encode_shared(image: Image.Image, accepted: dict[str, str], max_bytes: Optional[int]) -> EncodedImage:
+    key = _memo_key(image, accepted, max_bytes or DEFAULT_MAX_IMAGE_BYTES)
+
+    with _memo_lock:
+        encoded = _memo.get(key)
+    if encoded is not None:
+        return encoded
+
+    pending = _in_flight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.ensure_future(asyncio.to_thread(encode_image, image, accepted, max_bytes))
+    _in_flight[key] = future
+    try:
+        return await asyncio.shield(future)
+    finally:
+        if future.done():
+            _in_flight.pop(key, None)
+        else:
+            future.add_done_callback(lambda _: _in_flight.pop(key, None))
@@ -0,0 +1,267 @@
+"""Provider-aware downscaling and tiling for large construction drawings.
+
+Vision providers resize uploads server-side to a fixed pixel budget, so any
+resolution above that budget costs upload bandwidth and latency without
+reaching the model. This module sizes each image to the provider's effective
+budget before encoding.
+
+Very large sheets lose fine dimension text when shrunk that far. With tiling
+enabled, such sheets are split into overlapping tiles that are analyzed
+concurrently alongside a downscaled overview of the whole sheet; the partial
+results are merged back by ``result_merge.merge_results``.
+
+Sheets are also decoded straight to about twice the budget (``load_image``):
+JPEG scans through the decoder's draft mode, other formats by an integer
+``reduce`` right after decoding, so a large A0 scan is not held at full
+resolution for the whole analysis. ``SKETCH_REDUCED_LOADING=0`` keeps the
+full-resolution load.
+"""
+
+import asyncio
+import math
+import os
+from pathlib import Path
+from typing import Optional, Union
+from pydantic import BaseModel
+from PIL import Image
+
+
+class ImageBudget(BaseModel):
+    """Effective resolution a provider feeds to the model."""
+    max_long_side: int
+    max_short_side: Optional[int] = None
+    max_pixels: Optional[int] = None
+
+
+# Limits as documented by each provider for high-detail image input
+PROVIDER_BUDGETS = {
+    # Fit within 2048x2048, then shortest side scaled to 768
+    "openai": ImageBudget(max_long_side=2048, max_short_side=768),
+    # Long edge above 1568 px is resized; ~1.15 MP total
+    "anthropic": ImageBudget(max_long_side=1568, max_pixels=1_150_000),
+    "gemini": ImageBudget(max_long_side=3072),
+    "deepseek": ImageBudget(max_long_side=1568, max_pixels=1_150_000),
+    # DashScope default max_pixels for Qwen-VL (1280 * 28 * 28)
+    "qwen": ImageBudget(max_long_side=2048, max_pixels=1_003_520),
+}
+
+DEFAULT_BUDGET = ImageBudget(max_long_side=2048, max_pixels=4_000_000)
+
+# Re-encoding costs CPU and anti-aliased edges can compress worse than the
+# original file, so mild reductions are left to the provider
+MIN_DOWNSCALE = 0.75
+
+# Tile when downscaling would shrink the sheet below this fraction
+TILE_SCALE_THRESHOLD = 0.5
+TILE_OVERLAP = 0.1
+DEFAULT_MAX_TILES = int(os.getenv("SKETCH_MAX_TILES", "6"))
+
+# Sheets are decoded at no less than this multiple of the budget, so the
+# final Lanczos pass still averages over detail (as ``reducing_gap`` does)
+LOAD_HEADROOM = 2.0
+REDUCED_LOADING = os.getenv("SKETCH_REDUCED_LOADING", "1").lower() not in ("0", "off", "false")
+
+
+class Tile(BaseModel):
+    """One region of a sheet, ready to send."""
+    image: Image.Image
+    index: int
+    count: int
+    # Region in original sheet pixels: (left, top, right, bottom)
+    box: Optional[tuple[int, int, int, int]] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class PreparedImage(BaseModel):
+    """Images to send for one sheet: a single image, or overview plus tiles."""
+    overview: Image.Image
+    tiles: list[Tile] = []
+    original_size: tuple[int, int]
+    scale: float
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+def budget_for(provider: Optional[str], detail: float = 1.0) -> ImageBudget:
+    """The provider's budget, scaled by ``detail`` (e.g. 0.75 for three quarters of the resolution)."""
+    budget = PROVIDER_BUDGETS.get((provider or "").lower(), DEFAULT_BUDGET)
+    if detail >= 1.0:
+        return budget
+    return ImageBudget(
+        max_long_side=max(1, int(budget.max_long_side * detail)),
+        max_short_side=int(budget.max_short_side * detail) if budget.max_short_side else None,
+        max_pixels=int(budget.max_pixels * detail ** 2) if budget.max_pixels else None
+    )
+
+
+def fit_scale(size: tuple[int, int], budget: ImageBudget) -> float:
+    """Largest scale <= 1 at which ``size`` fits within ``budget``."""
+    width, height = size
+    long_side, short_side = max(width, height), min(width, height)
+
+    scale = min(1.0, budget.max_long_side / long_side)
+    if budget.max_short_side:
+        scale = min(scale, budget.max_short_side / short_side)
+    if budget.max_pixels:
+        scale = min(scale, math.sqrt(budget.max_pixels / (width * height)))
+    return scale
+
+
+def downscale(image: Image.Image, budget: ImageBudget) -> Image.Image:
+    """Resize to the budget; returns the original object if it (nearly) fits."""
+    scale = fit_scale(image.size, budget)
+    if scale >= MIN_DOWNSCALE:
+        return image
+
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    # reducing_gap shrinks by integer factors first, which is much faster
+    # than a full Lanczos pass on very large scans
+    return _resizable(image).resize(size, Image.Resampling.LANCZOS, reducing_gap=LOAD_HEADROOM)
+
+
+def _resizable(image: Image.Image) -> Image.Image:
+    """Convert modes that only support nearest-neighbour resizing (bilevel, palette)."""
+    if image.mode == "1":
+        return image.convert("L")
+    if image.mode not in ("L", "LA", "RGB", "RGBA"):
+        return image.convert("RGBA" if image.has_transparency_data else "RGB")
+    return image
+
+
+def load_scale(size: tuple[int, int], budget: Optional[ImageBudget]) -> float:
+    """Scale to decode a sheet of ``size`` at; 1.0 without a budget or when ``downscale`` would keep it."""
+    if budget is None or not REDUCED_LOADING:
+        return 1.0
+    scale = fit_scale(size, budget)
+    if scale >= MIN_DOWNSCALE:
+        return 1.0
+    return min(1.0, scale * LOAD_HEADROOM)
+
+
+def load_image(
+    path: Union[str, Path],
+    budget: Optional[ImageBudget] = None
+) -> tuple[Image.Image, tuple[int, int]]:
+    """Open a sheet, decoding it no larger than ``budget`` needs.
+
+    Args:
+        path: Image file path
+        budget: Resolution the sheet will be sent at, or None for full
+                resolution (tiling and region crops read native detail)
+
+    Returns:
+        The image and its original size. Sheets that need no reduction are
+        returned lazily opened, so their original bytes can still be sent
+    """
+    image = Image.open(path)
+    original_size = image.size
+    factor = int(1 / load_scale(original_size, budget))
+    if factor <= 1:
+        return image, original_size
+
+    # JPEG decodes at 1/2, 1/4 or 1/8 scale directly (no-op for other formats)
+    image.draft(image.mode, (image.width // factor, image.height // factor))
+    with image:
+        image.load()
+        factor = int(1 / load_scale(image.size, budget))
+        # reduce() copies, so the full decode is freed on leaving the block
+        reduced = _resizable(image).reduce(factor) if factor > 1 else image.copy()
+    return reduced, original_size
+
+
+def tile_grid(
+    size: tuple[int, int],
+    budget: ImageBudget,
+    max_tiles: int = DEFAULT_MAX_TILES
+) -> list[tuple[int, int, int, int]]:
+    """Split a sheet into overlapping boxes close to the provider's native size."""
+    width, height = size
+    # Square tile side the provider sees without further resizing
+    tile_side = budget.max_long_side
+    if budget.max_short_side:
+        tile_side = min(tile_side, budget.max_short_side)
+    if budget.max_pixels:
+        tile_side = min(tile_side, int(math.sqrt(budget.max_pixels)))
+
+    max_tiles = max(1, max_tiles)
+    cols = max(1, math.ceil(width / tile_side))
+    rows = max(1, math.ceil(height / tile_side))
+    # Drop a column or row at a time, whichever keeps tiles closest to square
+    while cols * rows > max_tiles:
+        if rows == 1 or (cols > 1 and width / cols <= height / rows):
+            cols -= 1
+        else:
+            rows -= 1
+
+    step_x, step_y = width / cols, height / rows
+    pad_x, pad_y = step_x * TILE_OVERLAP / 2, step_y * TILE_OVERLAP / 2
+
+    boxes = []
+    for row in range(rows):
+        for col in range(cols):
+            boxes.append((
+                max(0, int(col * step_x - pad_x)),
+                max(0, int(row * step_y - pad_y)),
+                min(width, int((col + 1) * step_x + pad_x)),
+                min(height, int((row + 1) * step_y + pad_y)),
+            ))
+    return boxes
+
+
+def prepare_image(
+    image: Image.Image,
+    provider: Optional[str],
+    tiling: bool = False,
+    max_tiles: int = DEFAULT_MAX_TILES,
+    detail: float = 1.0
+) -> PreparedImage:
+    """Downscale (and optionally tile) an image for a provider.
+
+    Args:
+        image: Full-resolution sheet
+        provider: Provider name used to look up its resolution budget
+        tiling: Split sheets that would lose too much detail into tiles
+        max_tiles: Upper bound on tiles per sheet
+        detail: Fraction of the provider's resolution budget to use
+
+    Returns:
+        Prepared images; ``tiles`` is empty unless the sheet was tiled
+    """
+    budget = budget_for(provider, detail)
+    scale = fit_scale(image.size, budget)
+    overview = downscale(image, budget)
+
+    tiles = []
+    if tiling and scale < TILE_SCALE_THRESHOLD:
+        boxes = tile_grid(image.size, budget, max_tiles)
+        if len(boxes) > 1:
+            tiles = [
+                Tile(
+                    image=downscale(image.crop(box), budget),
+                    index=i + 1,
+                    count=len(boxes),
+                    box=box
+                )
+                for i, box in enumerate(boxes)
+            ]
+
+    return PreparedImage(
+        overview=overview,
+        tiles=tiles,
+        original_size=image.size,
+        scale=scale
+    )
+
+
+async def prepare_image_async(
+    image: Image.Image,
+    provider: Optional[str],
+    tiling: bool = False,
+    max_tiles: int = DEFAULT_MAX_TILES,
+    detail: float = 1.0
+) -> PreparedImage:
+    """Run ``prepare_image`` in a worker thread."""
+    return await asyncio.to_thread(prepare_image, image, provider, tiling, max_tiles, detail)
@@ -0,0 +1,355 @@
+"""Crash-safe journal for resumable drawing-set jobs.
+
+A 100-sheet tender analyzed with ``--batch`` or as a PDF set takes the best
+part of an hour; if the process dies near the end (a crash, a deploy, the
+Node side's timeout killing it), every finished sheet used to be lost and
+paid for again. With a job id, each sheet's state is journaled as it
+changes:
+
+    queued -> in_flight -> done | failed
+
+and every finished sheet's ``BatchResult`` (with its validated
+``SketchAnalysisResult``) is committed the moment it arrives. Re-running the
+same job id analyzes only the sheets that are not done (failed and
+interrupted ones are retried) and reports the stored results for the rest.
+
+Sheets are identified by source path, plus page number for PDF pages (and
+occurrence, for a drawing listed twice), and fingerprinted by the source file's size and modification time: a drawing
+replaced by a new revision under the same name is analyzed again. Sheets
+are planned from the PDF page count, so resuming skips rasterizing pages
+that are already done.
+
+The journal is one SQLite file (WAL mode, ``SKETCH_JOB_DIR``, default
+``sketch-agent/.cache``), so ``progress()`` (``main_standalone.py
+job-status``) can read it while the job is running in another process.
+Committed sheets survive a process crash; a power failure may lose the last
+few, which are then simply analyzed again.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from pydantic import BaseModel
+
+from .image_preprocessing import ImageBudget
+from .pdf_source import is_pdf, iter_pdf_pages, parse_page_range, pdf_page_count
+from .types import BatchItem, BatchResult
+
+
+DEFAULT_JOB_DIR = Path(__file__).parent.parent / ".cache"
+
+SHEET_STATES = ("queued", "in_flight", "done", "failed")
+
+
+class JobSheet(BaseModel):
+    """One sheet of a journaled job, known before its image is loaded."""
+    index: int
+    key: str
+    image_path: str
+    page: Optional[int] = None
+    context: Optional[str] = None
+    provider: Optional[str] = None
+    fingerprint: str
+
+
+def _fingerprint(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def plan_job_sheets(items: list[BatchItem], pages: Optional[str] = None) -> list[JobSheet]:
+    """Expand batch items given by path into the job's sheets, PDFs into their pages.
+
+    Only PDF page counts are read; nothing is rasterized.
+    """
+    sheets: list[JobSheet] = []
+    seen: dict[str, int] = {}
+    for item in items:
+        if not item.image_path:
+            raise ValueError("Journaled jobs need batch items given by 'image_path'")
+        # Absolute, so a rerun from another directory finds the same sheets
+        path = os.path.abspath(item.image_path)
+        fingerprint = _fingerprint(path)
+        if is_pdf(path):
+            page_numbers = parse_page_range(pages, pdf_page_count(path))
+        else:
+            page_numbers = [None]
+        for page in page_numbers:
+            key = path if page is None else f"{path}#p{page}"
+            # The same drawing listed again (e.g. with another context) is a sheet of its own
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                key = f"{key}@{seen[key]}"
+            sheets.append(JobSheet(
+                index=len(sheets),
+                key=key,
+                image_path=path,
+                page=page,
+                context=item.context,
+                provider=item.provider,
+                fingerprint=fingerprint
+            ))
+    return sheets
+
+
+def iter_job_items(
+    sheets: list[JobSheet],
+    dpi: int,
+    load_budget: Optional[Callable[[Optional[str]], Optional[ImageBudget]]] = None
+) -> Iterator[BatchItem]:
+    """Batch items for ``sheets``, in order; consecutive pages of a PDF share one open document.
+
+    ``load_budget`` maps a sheet's provider to the budget its page is
+    rendered for (``SketchAgent.load_budget``).
+    """
+    position = 0
+    while position < len(sheets):
+        sheet = sheets[position]
+        if sheet.page is None:
+            yield BatchItem(image_path=sheet.image_path, context=sheet.context, provider=sheet.provider)
+            position += 1
+            continue
+
+        run = [sheet]
+        while (
+            position + len(run) < len(sheets)
+            and sheets[position + len(run)].image_path == sheet.image_path
+            and sheets[position + len(run)].page is not None
+        ):
+            run.append(sheets[position + len(run)])
+        selection = ",".join(str(page_sheet.page) for page_sheet in run)
+        budget = load_budget(sheet.provider) if load_budget else None
+        page_items = iter_pdf_pages(sheet.image_path, dpi=dpi, pages=selection, budget=budget)
+        for page_sheet, page_item in zip(run, page_items):
+            page_item.context = page_sheet.context
+            page_item.provider = page_sheet.provider
+            yield page_item
+        position += len(run)
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobJournal:
+    """SQLite-backed sheet states and results of resumable jobs."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """Initialize the journal.
+
+        Args:
+            directory: Directory for the journal database. If None, uses
+                       SKETCH_JOB_DIR env var (defaults to sketch-agent/.cache)
+        """
+        self.directory = Path(directory or os.getenv("SKETCH_JOB_DIR") or DEFAULT_JOB_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "jobs.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                source TEXT,
+                status TEXT NOT NULL,
+                runs INTEGER NOT NULL,
+                pid INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sheets (
+                job_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, key)
+            )
+            """
+        )
+
+    def start(self, job_id: str, source: Optional[str], sheets: list[JobSheet]) -> list[JobSheet]:
+        """Register a run of ``job_id`` over ``sheets``; return the sheets still to analyze.
+
+        Done sheets whose source file is unchanged are kept; everything else
+        (new, failed, interrupted or modified sheets) is queued. Sheets no
+        longer part of the set are dropped from the job.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, source, status, runs, pid, created_at, updated_at) "
+                    "VALUES (?, ?, 'running', 1, ?, ?, ?) "
+                    "ON CONFLICT (job_id) DO UPDATE SET source = excluded.source, status = 'running', "
+                    "runs = runs + 1, pid = excluded.pid, updated_at = excluded.updated_at",
+                    (job_id, source, os.getpid(), now, now)
+                )
+                done = {}
+                stale = []
+                planned = {sheet.key for sheet in sheets}
+                for key, state, fingerprint in self._conn.execute(
+                    "SELECT key, state, fingerprint FROM sheets WHERE job_id = ?",
+                    (job_id,)
+                ).fetchall():
+                    if key not in planned:
+                        stale.append((job_id, key))
+                    elif state == "done":
+                        done[key] = fingerprint
+                pending = [sheet for sheet in sheets if done.get(sheet.key) != sheet.fingerprint]
+
+                self._conn.executemany("DELETE FROM sheets WHERE job_id = ? AND key = ?", stale)
+                self._conn.executemany(
+                    "INSERT INTO sheets (job_id, key, idx, fingerprint, state, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (job_id, key) DO UPDATE SET idx = excluded.idx, "
+                    "fingerprint = excluded.fingerprint, state = excluded.state, "
+                    "result = CASE WHEN excluded.state = 'done' THEN sheets.result END, "
+                    "updated_at = excluded.updated_at",
+                    [
+                        (job_id, sheet.key, sheet.index, sheet.fingerprint,
+                         "done" if done.get(sheet.key) == sheet.fingerprint else "queued", now)
+                        for sheet in sheets
+                    ]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return pending
+
+    def mark_in_flight(self, job_id: str, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sheets SET state = 'in_flight', attempts = attempts + 1, updated_at = ? "
+                "WHERE job_id = ? AND key = ?",
+                (time.time(), job_id, key)
+            )
+
+    def record(self, job_id: str, key: str, batch_result: BatchResult) -> None:
+        """Commit a finished sheet (``index`` is its position in the job)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sheets SET state = ?, result = ?, updated_at = ? WHERE job_id = ? AND key = ?",
+                ("done" if batch_result.success else "failed", batch_result.model_dump_json(), now, job_id, key)
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (now, job_id))
+
+    def finish(self, job_id: str) -> None:
+        """Close a run: ``completed`` once every sheet is done, else ``incomplete``."""
+        with self._lock:
+            unfinished = self._conn.execute(
+                "SELECT COUNT(*) FROM sheets WHERE job_id = ? AND state != 'done'",
+                (job_id,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, pid = NULL, updated_at = ? WHERE job_id = ?",
+                ("incomplete" if unfinished else "completed", time.time(), job_id)
+            )
+
+    def results(self, job_id: str) -> list[BatchResult]:
+        """Stored results of the job's finished sheets, in job order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM sheets WHERE job_id = ? AND state IN ('done', 'failed') ORDER BY idx",
+                (job_id,)
+            ).fetchall()
+        return [BatchResult.model_validate_json(value) for value, in rows]
+
+    def progress(self, job_id: str) -> dict:
+        """Sheet counts by state, safe to call while the job runs in another process."""
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT source, status, runs, pid, created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+            if job is None:
+                raise FileNotFoundError(f"Unknown job: {job_id} (looked in {self.directory})")
+            counts = dict.fromkeys(SHEET_STATES, 0)
+            counts.update(self._conn.execute(
+                "SELECT state, COUNT(*) FROM sheets WHERE job_id = ? GROUP BY state",
+                (job_id,)
+            ).fetchall())
+
+        source, status, runs, pid, created_at, updated_at = job
+        if status == "running" and not _process_alive(pid):
+            status = "interrupted"
+        total = sum(counts.values())
+        return {
+            "job_id": job_id,
+            "source": source,
+            "status": status,
+            "runs": runs,
+            "sheets": total,
+            **counts,
+            "done_share": round(counts["done"] / total, 3) if total else 0.0,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def jobs(self) -> list[dict]:
+        with self._lock:
+            job_ids = [row[0] for row in self._conn.execute("SELECT job_id FROM jobs ORDER BY created_at")]
+        return [self.progress(job_id) for job_id in job_ids]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+async def iter_job(
+    agent,
+    journal: JobJournal,
+    job_id: str,
+    sheets: list[JobSheet],
+    dpi: int,
+    max_concurrency: int,
+    per_provider_limits: Optional[dict[str, int]] = None
+) -> AsyncIterator[BatchResult]:
+    """Analyze ``sheets`` (the ones ``start`` returned), committing each result as it arrives.
+
+    Results are yielded in completion order; ``index`` is the sheet's
+    position in the whole job.
+    """
+    def on_start(index: int) -> None:
+        journal.mark_in_flight(job_id, sheets[index].key)
+
+    async for batch_result in agent.iter_batch(
+        iter_job_items(sheets, dpi, agent.load_budget),
+        max_concurrency=max_concurrency,
+        per_provider_limits=per_provider_limits,
+        on_start=on_start
+    ):
+        sheet = sheets[batch_result.index]
+        batch_result = batch_result.model_copy(update={"index": sheet.index})
+        journal.record(job_id, sheet.key, batch_result)
+        yield batch_result
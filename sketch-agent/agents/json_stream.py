@@ -0,0 +1,96 @@
+"""Incremental JSON parsing of streamed model output.
+
+The analysis response is one large JSON object. ``IncrementalJSONParser``
+is fed text chunks as they stream in and returns each top-level member
+(``project_metadata``, ``context_layer``, ``technical_data``, ...) as soon
+as its value is complete, so callers can show useful data long before the
+full response has arrived.
+
+Anything before the first ``{`` (prose, a ```json fence) is skipped.
+"""
+
+from typing import Any, Optional
+
+from .json_extract import loads
+
+
+class IncrementalJSONParser:
+    """Emit completed top-level members of a streamed JSON object."""
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+        self._member_emitted = False
+        self.done = False
+        self.sections: dict[str, Any] = {}
+
+    @property
+    def text(self) -> str:
+        """All text received so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Add a chunk of text; return members completed by it, in order."""
+        self._text += chunk
+        completed = []
+
+        text = self._text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+
+            char = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                # Skip prose/fences until the top-level object opens
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = i + 1
+                    self._member_emitted = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    # A nested object/array member just closed
+                    self._emit(text[self._member_start:i + 1], completed)
+                elif self._depth == 0:
+                    # End of the top-level object; flush a trailing scalar
+                    self._emit(text[self._member_start:i], completed)
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                self._emit(text[self._member_start:i], completed)
+                self._member_start = i + 1
+                self._member_emitted = False
+
+        self._pos = len(text)
+        return completed
+
+    def _emit(self, member_text: str, completed: list[tuple[str, Any]]) -> None:
+        if self._member_emitted or not member_text.strip():
+            return
+        try:
+            member = loads("{" + member_text + "}")
+        except ValueError:
+            return
+        self._member_emitted = True
+        for key, value in member.items():
+            self.sections[key] = value
+            completed.append((key, value))
@@ -0,0 +1,203 @@
+"""Per-worker memory budget: admission control for sheets in flight.
+
+Concurrency limits count sheets, but a batch of A0 scans needs an order of
+magnitude more memory per sheet than a batch of A4 plans. Before a sheet is
+loaded, its memory is estimated from the image header (``sheet_memory``) and
+reserved against the worker's budget; the sheet waits while the reservation
+does not fit. Once the sheet is decoded, the reservation shrinks to what it
+keeps for the rest of its analysis (the reduced image, the prepared
+overview and its encodings), letting the next sheet start decoding.
+
+Waiters are admitted in arrival order, and a sheet is always admitted when
+nothing else is reserved, so one sheet larger than the whole budget still
+runs (alone). Estimates are deliberately rough: they bound the sheets that
+decode at once, not the process's exact footprint.
+
+``SKETCH_MEMORY_BUDGET_MB`` sets the budget (default 0: no limit, usage is
+still tracked for the ``stats`` op).
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from PIL import Image
+
+from .image_preprocessing import DEFAULT_BUDGET, ImageBudget, fit_scale, load_scale
+
+
+MB = 1024 * 1024
+
+# Working copies made while preparing and encoding the overview (mode
+# conversion, encoder buffer, base64 request body), in overviews
+ENCODE_COPIES = 3
+
+
+def pixel_bytes(mode: str) -> int:
+    """Bytes PIL stores per pixel; multi-band modes are padded to 4."""
+    if mode in ("1", "L", "P"):
+        return 1
+    if mode.startswith("I;16"):
+        return 2
+    return 4
+
+
+def sheet_memory(
+    size: tuple[int, int],
+    mode: str,
+    image_format: Optional[str] = None,
+    budget: Optional[ImageBudget] = None,
+    decoded: bool = False
+) -> tuple[int, int]:
+    """Estimate the memory an analysis of one sheet needs.
+
+    Args:
+        size: Sheet size in pixels
+        mode: PIL mode the sheet decodes to
+        image_format: PIL format name; JPEG decodes straight to reduced size
+        budget: Budget the sheet is loaded for (see ``image_preprocessing.load_image``)
+        decoded: The sheet is already in memory (a rendered PDF page)
+
+    Returns:
+        ``(peak, held)`` bytes: the peak while decoding, and what stays
+        allocated once the sheet is decoded
+    """
+    width, height = size
+    pixels = width * height
+    factor = int(1 / load_scale(size, budget))
+
+    decode_pixels = pixels
+    if image_format == "JPEG" and factor > 1:
+        draft = 1
+        while draft * 2 <= min(factor, 8):
+            draft *= 2
+        decode_pixels = pixels // (draft * draft)
+    kept_pixels = pixels // (factor * factor)
+
+    overview_pixels = pixels * fit_scale(size, budget or DEFAULT_BUDGET) ** 2
+    held = (kept_pixels + ENCODE_COPIES * overview_pixels) * pixel_bytes(mode)
+    if decoded or factor <= 1:
+        return int(held), int(held)
+    return int(max(held, (decode_pixels + kept_pixels) * pixel_bytes(mode))), int(held)
+
+
+def image_memory(image: Image.Image, budget: Optional[ImageBudget] = None) -> tuple[int, int]:
+    """``sheet_memory`` for an opened image, decoded or not."""
+    # Only lazily opened files have pending decoder tiles
+    decoded = not getattr(image, "tile", None)
+    return sheet_memory(image.size, image.mode, image.format, budget, decoded=decoded)
+
+
+class MemoryLease:
+    """Bytes reserved for one sheet; released on leaving ``MemoryBudget.reserve``."""
+
+    def __init__(self, budget: "MemoryBudget", nbytes: int):
+        self.budget = budget
+        self.nbytes = nbytes
+
+    def resize(self, nbytes: int) -> None:
+        """Change the reservation without waiting, e.g. to what stays held after decoding."""
+        nbytes = self.budget._clamp(nbytes)
+        delta, self.nbytes = nbytes - self.nbytes, nbytes
+        self.budget._adjust(delta)
+
+    def release(self) -> None:
+        self.resize(0)
+
+
+class MemoryBudget:
+    """Admits sheets while their estimated memory fits ``limit_bytes`` (None: no limit)."""
+
+    def __init__(self, limit_bytes: Optional[int] = None):
+        self.limit = limit_bytes if limit_bytes and limit_bytes > 0 else None
+        self.reserved = 0
+        self.peak_reserved = 0
+        self.admitted = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+
+    @classmethod
+    def from_env(cls) -> "MemoryBudget":
+        return cls(int(float(os.getenv("SKETCH_MEMORY_BUDGET_MB", "0")) * MB))
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, nbytes: int) -> AsyncIterator[MemoryLease]:
+        """Wait until ``nbytes`` fit, hold them for the block."""
+        start = time.perf_counter()
+        nbytes = self._clamp(nbytes)
+        if await self._acquire(nbytes):
+            self.waited += 1
+            self.wait_seconds += time.perf_counter() - start
+        self.admitted += 1
+        lease = MemoryLease(self, nbytes)
+        try:
+            yield lease
+        finally:
+            lease.release()
+
+    async def wait_for_room(self) -> None:
+        """Wait until no sheet is queued for memory (before producing another one)."""
+        if self.limit is not None:
+            await self._acquire(0)
+
+    def _clamp(self, nbytes: int) -> int:
+        nbytes = max(0, int(nbytes))
+        return nbytes if self.limit is None else min(nbytes, self.limit)
+
+    def _fits(self, nbytes: int) -> bool:
+        return self.limit is None or self.reserved == 0 or self.reserved + nbytes <= self.limit
+
+    async def _acquire(self, nbytes: int) -> bool:
+        """Take ``nbytes``; returns whether the caller had to wait."""
+        if not self._waiters and self._fits(nbytes):
+            self._adjust(nbytes)
+            return False
+
+        entry = (nbytes, asyncio.get_running_loop().create_future())
+        self._waiters.append(entry)
+        try:
+            await entry[1]
+        except asyncio.CancelledError:
+            if entry[1].done() and not entry[1].cancelled():
+                # Admitted just as the caller was cancelled
+                self._adjust(-nbytes)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                self._wake()
+            raise
+        return True
+
+    def _adjust(self, delta: int) -> None:
+        self.reserved += delta
+        self.peak_reserved = max(self.peak_reserved, self.reserved)
+        if delta < 0:
+            self._wake()
+
+    def _wake(self) -> None:
+        """Admit queued sheets, in order, while the next one fits."""
+        while self._waiters:
+            nbytes, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(nbytes):
+                break
+            self._waiters.popleft()
+            self.reserved += nbytes
+            self.peak_reserved = max(self.peak_reserved, self.reserved)
+            future.set_result(None)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit_mb": round(self.limit / MB) if self.limit else None,
+            "reserved_mb": round(self.reserved / MB, 1),
+            "peak_reserved_mb": round(self.peak_reserved / MB, 1),
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "wait_s": round(self.wait_seconds, 2),
+            "queued": len(self._waiters),
+        }
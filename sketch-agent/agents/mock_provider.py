@@ -0,0 +1,195 @@
+"""Local mock vision provider for benchmarks and offline development.
+
+``MockVisionModel`` replays recorded model responses instead of calling an
+API, with configurable latency, error rate and streaming speed, so agent
+overhead can be measured without network noise or API cost. Images are
+still encoded as for a real provider, so encoding stays in the measured path.
+Usage is reported like a provider with prefix caching: a system prompt seen
+before counts as cached input tokens.
+With a ``schema`` (structured output) it answers with the bare JSON
+object, as constrained decoding would.
+
+Configuration (env vars, overridable per instance):
+
+- ``SKETCH_MOCK_RESPONSES``: a recorded response file, or a directory of
+  ``*.txt``/``*.json`` files replayed round-robin
+  (default: ``benchmarks/fixtures/mock_responses``)
+- ``SKETCH_MOCK_LATENCY_MS``: median response latency (default 0)
+- ``SKETCH_MOCK_LATENCY_SIGMA``: log-normal spread of the latency; 0 = fixed
+- ``SKETCH_MOCK_ERROR_RATE``: fraction of calls that fail (default 0)
+- ``SKETCH_MOCK_ERROR_STATUS``: HTTP status carried by failures (default 429)
+- ``SKETCH_MOCK_TOKENS_PER_S``: streaming speed, ~4 characters per token;
+  0 streams instantly (default 0)
+- ``SKETCH_MOCK_SEED``: random seed for reproducible runs
+"""
+
+import asyncio
+import itertools
+import os
+import random
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from PIL import Image
+
+from .image_encoding import DEFAULT_ACCEPTED_FORMATS, DEFAULT_MAX_IMAGE_BYTES, encode_image_async
+from .rate_limiter import estimate_image_tokens, estimate_request_tokens, get_limiter
+from .telemetry import record_usage
+
+
+DEFAULT_RESPONSES = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "mock_responses"
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_TOKENS = 4
+
+
+class MockProviderError(Exception):
+    """Injected failure; carries an HTTP status like the real SDK errors."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Mock provider error (HTTP {status_code})")
+        self.status_code = status_code
+
+
+def load_responses(path: Path) -> list[str]:
+    """Read one recorded response file, or every ``*.txt``/``*.json`` in a directory."""
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.suffix in (".txt", ".json"))
+    else:
+        files = [path]
+    responses = [f.read_text(encoding="utf-8") for f in files]
+    if not responses:
+        raise ValueError(f"No recorded responses found in {path}")
+    return responses
+
+
+class MockVisionModel:
+    """Replays recorded responses with simulated latency, errors and streaming."""
+
+    provider = "mock"
+    accepted_formats = DEFAULT_ACCEPTED_FORMATS
+    max_image_bytes = DEFAULT_MAX_IMAGE_BYTES
+    structured_output = True
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        responses: Optional[list[str]] = None,
+        latency_ms: Optional[float] = None,
+        latency_sigma: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        error_status: Optional[int] = None,
+        tokens_per_s: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        """Initialize the mock.
+
+        Args:
+            model: Recorded response file or directory (same as SKETCH_MOCK_RESPONSES)
+            responses: Response texts to replay; overrides ``model``
+            latency_ms: Median latency in milliseconds
+            latency_sigma: Log-normal sigma of the latency (0 = fixed)
+            error_rate: Fraction of calls that raise ``MockProviderError``
+            error_status: HTTP status of injected errors
+            tokens_per_s: Streaming speed (0 = instant)
+            seed: Random seed
+        """
+        source = Path(model or os.getenv("SKETCH_MOCK_RESPONSES") or DEFAULT_RESPONSES)
+        self.responses = responses or load_responses(source)
+        self.model = "mock" if responses else f"mock:{source.name}"
+
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv("SKETCH_MOCK_LATENCY_MS", "0"))
+        self.latency_sigma = latency_sigma if latency_sigma is not None else float(os.getenv("SKETCH_MOCK_LATENCY_SIGMA", "0"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("SKETCH_MOCK_ERROR_RATE", "0"))
+        self.error_status = error_status or int(os.getenv("SKETCH_MOCK_ERROR_STATUS", "429"))
+        self.tokens_per_s = tokens_per_s if tokens_per_s is not None else float(os.getenv("SKETCH_MOCK_TOKENS_PER_S", "0"))
+
+        seed = seed if seed is not None else os.getenv("SKETCH_MOCK_SEED")
+        self._random = random.Random(int(seed) if seed is not None else None)
+        self._next_response = itertools.cycle(range(len(self.responses)))
+        self._seen_systems: set[str] = set()
+        self.calls = 0
+
+    def _latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000
+        return self._random.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000
+
+    async def _respond(
+        self,
+        image: Image.Image,
+        prompt: str,
+        system: Optional[str],
+        schema: Optional[dict] = None
+    ) -> str:
+        """Wait out the simulated latency, maybe fail, and pick the next response."""
+        self.calls += 1
+        await asyncio.sleep(self._latency())
+        if self.error_rate > 0 and self._random.random() < self.error_rate:
+            raise MockProviderError(self.error_status)
+
+        response = self.responses[next(self._next_response)]
+        start, end = response.find("{"), response.rfind("}") + 1
+        if schema and start >= 0:
+            # Constrained decoding emits the bare object: no prose, no fence
+            # (a cut-off recording stays cut off)
+            response = response[start:end] if not response[end:].strip(" \n`") else response[start:]
+        system_tokens = len(system or "") // CHARS_PER_TOKEN
+        cached = system_tokens if system in self._seen_systems else 0
+        if system:
+            self._seen_systems.add(system)
+        record_usage(
+            input_tokens=system_tokens + len(prompt) // CHARS_PER_TOKEN + estimate_image_tokens(self.provider, image.size),
+            output_tokens=len(response) // CHARS_PER_TOKEN,
+            cached_input_tokens=cached,
+            cache_write_tokens=system_tokens - cached
+        )
+        return response
+
+    async def analyze_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> str:
+        await encode_image_async(image, self.accepted_formats, self.max_image_bytes)
+        return await get_limiter(self.provider).run(
+            lambda: self._respond(image, prompt, system, schema),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        )
+
+    async def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        await encode_image_async(image, self.accepted_formats, self.max_image_bytes)
+        async for text in get_limiter(self.provider).stream(
+            lambda: self._stream(image, prompt, system, schema),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        ):
+            yield text
+
+    async def _stream(
+        self,
+        image: Image.Image,
+        prompt: str,
+        system: Optional[str],
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        # Latency here models time to first token
+        response = await self._respond(image, prompt, system, schema)
+        chunk_size = CHARS_PER_TOKEN * STREAM_CHUNK_TOKENS
+        delay = STREAM_CHUNK_TOKENS / self.tokens_per_s if self.tokens_per_s > 0 else 0
+        for start in range(0, len(response), chunk_size):
+            if delay:
+                await asyncio.sleep(delay)
+            yield response[start:start + chunk_size]
@@ -0,0 +1,480 @@
+"""Text-layer extraction for vector PDF drawing sets.
+
+Drawings exported from CAD usually keep a real text layer: title block,
+notes, dimension strings, schedules. Reading it is exact, offline and takes
+milliseconds, where rasterizing the page and having a vision model re-read
+the small print costs seconds and thousands of tokens. Per page:
+
+- ``extract_page_text`` pulls positioned text lines with PyMuPDF and decides
+  whether the page is text only (specifications, schedules, cover sheets):
+  plenty of text, few vector paths relative to it (ruled tables and the
+  sheet border, but no drawing) and no large raster image (a scan with an
+  OCR layer still needs the image).
+- ``text_layer_facts`` fills project metadata from title block labels and
+  their values, numbered general notes, and dimension candidates, without a
+  model.
+- Text-only pages are answered from the text layer alone
+  (``text_page_result``) and never rasterized. On other pages the text goes
+  into the prompt (``text_prompt``) so the model reconciles it with the
+  drawing instead of transcribing it, the image is sent at
+  ``SKETCH_PDF_TEXT_DETAIL`` of the provider's budget, and the exact facts
+  take precedence in the result (``apply_text_layer``).
+
+``SKETCH_PDF_TEXT=off`` disables the stage. The thresholds below are tuned
+on CAD exports; ``TextLayerStats`` counts how pages were handled.
+"""
+
+import os
+import re
+from typing import Iterable, Optional
+
+from .types import (
+    ContextLayer,
+    DetailedDimension,
+    PageText,
+    Personnel,
+    ProjectMetadata,
+    SketchAnalysisResult,
+    TechnicalData,
+    TextRun
+)
+
+
+TEXT_LAYER = os.getenv("SKETCH_PDF_TEXT", "on").lower() not in ("0", "off", "false", "no")
+
+# Image budget (fraction of the provider's) for pages whose text comes from the text layer
+TEXT_LAYER_DETAIL = float(os.getenv("SKETCH_PDF_TEXT_DETAIL", "0.75"))
+
+# Fewer characters than this is no text layer (or just a stray label)
+MIN_TEXT_CHARS = 20
+# Below this, the text layer is not worth a prompt section or reduced detail
+MIN_ASSIST_CHARS = 200
+# Text-only pages: at least this much text, at most this many painted paths
+# per character, and raster images covering at most this share of the page
+TEXT_ONLY_MIN_CHARS = int(os.getenv("SKETCH_PDF_TEXT_ONLY_MIN_CHARS", "400"))
+TEXT_ONLY_PATHS_PER_CHAR = float(os.getenv("SKETCH_PDF_TEXT_ONLY_PATHS_PER_CHAR", "0.5"))
+TEXT_ONLY_MAX_IMAGE_SHARE = 0.25
+
+# Characters of positioned text included in the prompt
+PROMPT_CHARS = int(os.getenv("SKETCH_PDF_TEXT_PROMPT_CHARS", "6000"))
+
+MAX_DIMENSIONS = 100
+
+SOURCE = "PDF text layer"
+
+# Path-painting operators in a content stream: stroke, fill, fill and stroke
+_PATH_OPS = re.compile(rb"(?<![^\s\]\)>])(?:S|s|f\*?|F|B\*?|b\*?)(?=[\s\[/(<]|$)")
+
+# Title block labels -> field; matched against the whole label text
+_LABELS = [
+    ("drawing_number", r"(DRAWING|DRG|DWG)\.?\s*(NO|NUMBER|#)\.?"),
+    ("project_number", r"(PROJECT|PROJ|JOB)\.?\s*(NO|NUMBER|#)\.?"),
+    ("project_title", r"PROJECT(\s+(TITLE|NAME))?"),
+    ("revision", r"REV(ISION)?\.?(\s*NO\.?)?"),
+    ("date", r"(ISSUE\s+)?DATE"),
+    ("scale", r"SCALE"),
+    ("sheet_of", r"SHEET(\s*(NO\.?|OF))?"),
+    ("status", r"(ISSUE\s+)?STATUS"),
+    ("drawn_by", r"DRAWN(\s+BY)?|DRN\.?"),
+    ("checked_by", r"CHECKED(\s+BY)?|CHKD\.?|CHK\.?"),
+    ("approved_by", r"APPROVED(\s+BY)?|APPD\.?|APRD\.?"),
+    ("client", r"CLIENT|EMPLOYER|OWNER"),
+    ("consultant", r"CONSULTANT|ENGINEER|ARCHITECT"),
+    ("contractor", r"CONTRACTOR"),
+]
+_LABEL_PATTERNS = [(field, re.compile(pattern, re.IGNORECASE)) for field, pattern in _LABELS]
+PERSONNEL_FIELDS = ("drawn_by", "checked_by", "approved_by", "client", "consultant", "contractor")
+# Revision table columns, whose entries may be listed above the header row
+REVISION_FIELDS = ("revision", "date", "drawn_by", "checked_by", "approved_by")
+
+# Table headers and captions that are never a value
+_HEADINGS = {
+    "TITLE", "DRAWING TITLE", "DESCRIPTION", "BY", "SIZE", "NOTE", "NOTES", "GENERAL NOTES",
+    "ENGR", "ENGR.", "LEGEND", "REMARKS", "KEY PLAN", "NORTH", "ISSUE", "PURPOSE OF ISSUE",
+}
+
+_VALID = {
+    "drawing_number": lambda v: bool(re.search(r"\d", v)) and len(v) <= 40,
+    "project_number": lambda v: bool(re.search(r"\d", v)) and len(v) <= 30,
+    "revision": lambda v: bool(re.fullmatch(r"[A-Z]{0,2}\d{0,3}[A-Z]?", v, re.IGNORECASE)),
+    "date": lambda v: bool(re.search(
+        r"\d{1,4}[./-]\d{1,2}[./-]\d{1,4}|\d{1,2}\s+[A-Z]{3,9}\.?\s+\d{2,4}|[A-Z]{3,9}\.?\s+\d{4}",
+        v, re.IGNORECASE
+    )),
+    "scale": lambda v: bool(re.search(
+        r"\d+\s*:\s*\d+|N\.?T\.?S|AS\s+(SHOWN|INDICATED)|\d+\"?\s*=", v, re.IGNORECASE
+    )),
+    "sheet_of": lambda v: bool(re.search(r"\d", v)) and len(v) <= 12,
+}
+
+_NOTE = re.compile(r"^\s*(\d{1,2})\s*[.)]\s*(\S.*)$")
+_NOTES_UNIT = re.compile(
+    r"DIMENSIONS\s+(?:ARE\s+)?IN\s+(MILLIMET|METRE|METER|CENTIMET|INCH|FEET|FOOT)", re.IGNORECASE
+)
+_UNITS = {"MILLIMET": "mm", "METRE": "m", "METER": "m", "CENTIMET": "cm", "INCH": "in", "FEET": "ft", "FOOT": "ft"}
+_METRIC = re.compile(r"(\d{2,6}(?:\.\d+)?)\s*(mm|cm|m)?\.?(?:\s+(MIN|MAX|TYP)\.?)?", re.IGNORECASE)
+_IMPERIAL = re.compile(r"(\d{1,3})'\s*-?\s*(\d{1,2})(?:\s+(\d)/(\d{1,2}))?\"")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _label_field(text: str) -> Optional[str]:
+    text = text.rstrip(": ")
+    for field, pattern in _LABEL_PATTERNS:
+        if pattern.fullmatch(text):
+            return field
+    return None
+
+
+def _is_label(text: str) -> bool:
+    stripped = text.rstrip(": ").upper()
+    return (
+        _label_field(text) is not None
+        or stripped in _HEADINGS
+        or (text.endswith(":") and len(text.split()) <= 3)
+    )
+
+
+def _image_share(page) -> float:
+    area = page.rect.width * page.rect.height
+    if area <= 0:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        width = min(x1, page.rect.width) - max(x0, 0)
+        height = min(y1, page.rect.height) - max(y0, 0)
+        covered += max(0.0, width) * max(0.0, height)
+    return min(1.0, covered / area)
+
+
+def count_path_ops(document, page) -> int:
+    """Vector paths painted by the page and its form XObjects.
+
+    Counts operators in the raw content streams: far cheaper than
+    ``get_drawings()``, which builds an object per path.
+    """
+    count = len(_PATH_OPS.findall(page.read_contents()))
+    for xref, *_ in page.get_xobjects():
+        count += len(_PATH_OPS.findall(document.xref_stream(xref) or b""))
+    return count
+
+
+def extract_page_text(document, page_number: int) -> Optional[PageText]:
+    """Text layer of one 1-based page, or None if it has (practically) none."""
+    page = document.load_page(page_number - 1)
+    matrix = page.rotation_matrix if page.rotation else None
+
+    runs = []
+    seen = set()
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", ()):
+            text = _normalize("".join(span["text"] for span in line["spans"]))
+            if not text:
+                continue
+            bbox = line["bbox"]
+            if matrix is not None:
+                rect = type(page.rect)(bbox) * matrix
+                bbox = (rect.x0, rect.y0, rect.x1, rect.y1)
+            bbox = tuple(round(value, 1) for value in bbox)
+            # CAD exports often draw the same text twice (fill and outline)
+            if (text, bbox) in seen:
+                continue
+            seen.add((text, bbox))
+            runs.append(TextRun(text=text, bbox=bbox))
+
+    page_text = PageText(page_number=page_number, size=(page.rect.width, page.rect.height), runs=runs)
+    if page_text.chars < MIN_TEXT_CHARS:
+        return None
+
+    page_text.path_ops = count_path_ops(document, page)
+    page_text.image_share = round(_image_share(page), 3)
+    page_text.text_only = (
+        page_text.chars >= TEXT_ONLY_MIN_CHARS
+        and page_text.path_ops <= page_text.chars * TEXT_ONLY_PATHS_PER_CHAR
+        and page_text.image_share <= TEXT_ONLY_MAX_IMAGE_SHARE
+    )
+    return page_text
+
+
+def assists(page_text: Optional[PageText]) -> bool:
+    """Whether a page's text layer is worth a prompt section and reduced image detail."""
+    return page_text is not None and page_text.chars >= MIN_ASSIST_CHARS
+
+
+def _height(run: TextRun) -> float:
+    return max(1.0, run.bbox[3] - run.bbox[1])
+
+
+def _value_score(field: str, label: TextRun, value: TextRun) -> Optional[float]:
+    """How well ``value`` sits as the entry of ``label``'s cell; lower is better, None if not."""
+    lx0, ly0, lx1, ly1 = label.bbox
+    vx0, vy0, vx1, vy1 = value.bbox
+    reach = max(3 * (lx1 - lx0), 10 * _height(label))
+    if vx1 < lx0 - _height(label) or vx0 > lx1 + reach:
+        return None
+
+    dx = max(0.0, vx0 - lx1, lx0 - vx1)
+    limit = 3 * max(_height(label), _height(value))
+    if vy0 < ly1 and vy1 > ly0:
+        # Same line: only to the right of the label
+        return dx * 0.5 if vx0 >= lx1 - 1 else None
+    if 0 <= vy0 - ly1 + _height(label) / 2 and vy0 - ly1 <= limit:
+        return max(0.0, vy0 - ly1) + dx * 0.5
+    if field in REVISION_FIELDS and 0 <= ly0 - vy1 <= limit:
+        return 2 * (ly0 - vy1) + dx * 0.5
+    return None
+
+
+def _title_block(runs: list[TextRun], size: tuple[float, float]) -> dict[str, tuple[str, TextRun]]:
+    """Field -> (value, value run) from labelled title block cells."""
+    labels = []
+    values = []
+    found: dict[str, tuple[str, TextRun]] = {}
+    for run in runs:
+        inline = re.match(r"^([^:]{2,30}):\s*(\S.*)$", run.text)
+        field = _label_field(inline.group(1)) if inline else None
+        if field is not None and _VALID.get(field, lambda v: len(v) <= 80)(inline.group(2)):
+            found.setdefault(field, (inline.group(2), run))
+        elif _is_label(run.text):
+            field = _label_field(run.text)
+            if field is not None:
+                labels.append((field, run))
+        else:
+            values.append(run)
+
+    width, height = size
+    # Title blocks sit bottom right; their labels win over revision table headers
+    labels.sort(key=lambda item: -(item[1].bbox[2] / width + item[1].bbox[3] / height))
+    for field, label in labels:
+        if field in found:
+            continue
+        valid = _VALID.get(field, lambda v: 2 <= len(v) <= 80)
+        scored = [
+            (score, value) for value in values
+            if valid(value.text) and (score := _value_score(field, label, value)) is not None
+        ]
+        if scored:
+            value = min(scored, key=lambda item: item[0])[1]
+            found[field] = (value.text, value)
+    return found
+
+
+def _notes(runs: list[TextRun]) -> list[str]:
+    numbered = []
+    for run in runs:
+        match = _NOTE.match(run.text)
+        if match and len(match.group(2).split()) >= 3:
+            numbered.append((int(match.group(1)), run.bbox[1], f"{match.group(1)}. {match.group(2)}"))
+    return list(dict.fromkeys(note for _, _, note in sorted(numbered)))
+
+
+def _location(run: TextRun, size: tuple[float, float]) -> str:
+    x = (run.bbox[0] + run.bbox[2]) / 2 / size[0]
+    y = (run.bbox[1] + run.bbox[3]) / 2 / size[1]
+    vertical = "upper" if y < 1 / 3 else "lower" if y > 2 / 3 else "middle"
+    horizontal = "left" if x < 1 / 3 else "right" if x > 2 / 3 else "center"
+    return "center" if (vertical, horizontal) == ("middle", "center") else f"{vertical} {horizontal}"
+
+
+def _dimensions(runs: Iterable[TextRun], size: tuple[float, float], unit: Optional[str]) -> list[DetailedDimension]:
+    """Dimension strings: bare numbers (in the notes' unit), numbers with a unit, feet-inches."""
+    dimensions = {}
+    for run in runs:
+        text = run.text
+        imperial = _IMPERIAL.fullmatch(text)
+        metric = None if imperial else _METRIC.fullmatch(text)
+        if imperial:
+            inches = int(imperial.group(2))
+            if imperial.group(3):
+                inches += int(imperial.group(3)) / int(imperial.group(4))
+            value, run_unit, qualifier = round(int(imperial.group(1)) + inches / 12, 3), "ft", None
+        elif metric and not text.startswith("0"):
+            value, run_unit, qualifier = float(metric.group(1)), metric.group(2) or unit, metric.group(3)
+        else:
+            continue
+
+        key = (value, run_unit, (qualifier or "").upper())
+        if key in dimensions:
+            continue
+        dimensions[key] = DetailedDimension(
+            label=text,
+            value=value,
+            unit=run_unit,
+            derived_from=SOURCE,
+            location=_location(run, size)
+        )
+        if len(dimensions) >= MAX_DIMENSIONS:
+            break
+    return list(dimensions.values())
+
+
+def text_layer_facts(page_text: PageText) -> SketchAnalysisResult:
+    """What the text layer states outright: title block fields, general notes, dimension strings."""
+    title_block = _title_block(page_text.runs, page_text.size)
+    fields = {field: value for field, (value, _) in title_block.items()}
+    personnel = {field: fields.pop(field) for field in PERSONNEL_FIELDS if field in fields}
+    project_metadata = None
+    if fields or personnel:
+        project_metadata = ProjectMetadata(
+            **fields,
+            personnel=Personnel(**personnel) if personnel else None
+        )
+
+    notes = _notes(page_text.runs)
+    unit_match = _NOTES_UNIT.search(" ".join(notes))
+    unit = _UNITS[unit_match.group(1).upper()] if unit_match else None
+    used = {id(run) for _, run in title_block.values()}
+    dimensions = _dimensions((run for run in page_text.runs if id(run) not in used), page_text.size, unit)
+
+    return SketchAnalysisResult(
+        project_metadata=project_metadata,
+        technical_data=TechnicalData(dimensions=dimensions) if dimensions else None,
+        specifications=notes
+    )
+
+
+def _rows(runs: list[TextRun]) -> list[list[TextRun]]:
+    """Group runs into visual rows (table rows, lines of a paragraph), top to bottom."""
+    rows: list[list[TextRun]] = []
+    for run in sorted(runs, key=lambda r: ((r.bbox[1] + r.bbox[3]) / 2, r.bbox[0])):
+        center = (run.bbox[1] + run.bbox[3]) / 2
+        if rows:
+            last = rows[-1][0]
+            if abs(center - (last.bbox[1] + last.bbox[3]) / 2) < _height(last) / 2:
+                rows[-1].append(run)
+                continue
+        rows.append([run])
+    return [sorted(row, key=lambda r: r.bbox[0]) for row in rows]
+
+
+def _paragraphs(runs: list[TextRun]) -> list[str]:
+    """Table rows as ``a | b | c``; wrapped lines with a shared left edge joined into paragraphs."""
+    paragraphs: list[str] = []
+    previous: Optional[TextRun] = None
+    for row in _rows(runs):
+        if len(row) > 1:
+            paragraphs.append(" | ".join(run.text for run in row))
+            previous = None
+            continue
+        run = row[0]
+        continues = (
+            previous is not None
+            and abs(run.bbox[0] - previous.bbox[0]) <= 2
+            and run.bbox[1] - previous.bbox[3] < _height(previous)
+            and not _NOTE.match(run.text)
+        )
+        if continues:
+            paragraphs[-1] += " " + run.text
+        else:
+            paragraphs.append(run.text)
+        previous = run
+    return paragraphs
+
+
+def _document_type(paragraphs: list[str]) -> str:
+    heading = " ".join(paragraphs[:5]).upper()
+    if "SCHEDULE" in heading:
+        return "Schedule"
+    if "SPECIFICATION" in heading or re.search(r"\bSECTION\s+\d", heading):
+        return "Specification"
+    return "Text Page"
+
+
+def text_page_result(page_text: PageText) -> SketchAnalysisResult:
+    """Result for a text-only page, read entirely from its text layer."""
+    facts = text_layer_facts(page_text)
+    paragraphs = _paragraphs(page_text.runs)
+    return facts.model_copy(update={
+        "context_layer": ContextLayer(
+            document_type=_document_type(paragraphs),
+            description=f"Text-only page ({page_text.chars} characters) read from the PDF text layer"
+        ),
+        "specifications": list(dict.fromkeys([*facts.specifications, *paragraphs])),
+        "warnings": ["Text-only page: read from the PDF text layer without a vision request"]
+    })
+
+
+def text_prompt(page_text: PageText, facts: SketchAnalysisResult) -> str:
+    """Prompt section handing the model the page's text layer."""
+    width, height = page_text.size
+    lines = [
+        "This sheet is a vector PDF. The text below was read from its text layer and is exact: "
+        "use it for names, numbers, notes and dimension values instead of re-reading small print "
+        "in the image, which is sent at reduced detail. Use the image for geometry, for what each "
+        "dimension measures and for anything the text does not cover."
+    ]
+    if facts.project_metadata is not None:
+        known = facts.project_metadata.model_dump(exclude_none=True)
+        known.update(known.pop("personnel", {}))
+        if known:
+            lines.append("\nTitle block: " + "; ".join(f"{name}={value}" for name, value in known.items()))
+
+    lines.append("\nText, top to bottom, at [x%,y%] of the sheet:")
+    used = sum(len(line) for line in lines)
+    runs = sorted(page_text.runs, key=lambda run: (round(run.bbox[1] / height * 100), run.bbox[0]))
+    for number, run in enumerate(runs):
+        line = f"[{run.bbox[0] / width * 100:.0f},{run.bbox[1] / height * 100:.0f}] {run.text}"
+        if used + len(line) > PROMPT_CHARS:
+            lines.append(f"... {len(runs) - number} more not shown")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+def apply_text_layer(result: SketchAnalysisResult, facts: SketchAnalysisResult) -> SketchAnalysisResult:
+    """Overlay text-layer facts on a model result; exact title block values win."""
+    project_metadata = result.project_metadata
+    if facts.project_metadata is not None:
+        exact = facts.project_metadata.model_dump(exclude_none=True)
+        exact_personnel = exact.pop("personnel", None)
+        base = project_metadata or ProjectMetadata()
+        personnel = base.personnel
+        if exact_personnel:
+            personnel = (personnel or Personnel()).model_copy(update=exact_personnel)
+        project_metadata = base.model_copy(update={**exact, "personnel": personnel})
+
+    technical_data = result.technical_data
+    if facts.technical_data is not None:
+        existing = technical_data.dimensions if technical_data is not None else []
+        measured = {(d.value, (d.unit or "").lower()) for d in existing}
+        missing = [
+            d for d in facts.technical_data.dimensions
+            if (d.value, (d.unit or "").lower()) not in measured
+        ]
+        if missing:
+            technical_data = (technical_data or TechnicalData()).model_copy(
+                update={"dimensions": [*existing, *missing]}
+            )
+
+    return result.model_copy(update={
+        "project_metadata": project_metadata,
+        "technical_data": technical_data,
+        "specifications": list(dict.fromkeys([*result.specifications, *facts.specifications])),
+    })
+
+
+class TextLayerStats:
+    """How PDF pages used their text layer since start-up, for summaries and the ``stats`` op."""
+
+    def __init__(self):
+        self.text_only = 0
+        self.assisted = 0
+        self.tokens_saved = 0
+
+    def record(self, outcome: str, tokens_saved: int = 0) -> None:
+        if outcome == "text_only":
+            self.text_only += 1
+        else:
+            self.assisted += 1
+        self.tokens_saved += max(0, tokens_saved)
+
+    def snapshot(self) -> dict:
+        return {
+            "text_only": self.text_only,
+            "assisted": self.assisted,
+            "estimated_input_tokens_saved": self.tokens_saved,
+        }
@@ -0,0 +1,397 @@
+"""Provider-native batch jobs for non-urgent bulk takeoffs.
+
+OpenAI (Batch API) and Anthropic (Message Batches) accept a whole set of
+requests as one asynchronous job, processed within 24 hours at roughly half
+the price and outside the per-minute rate limits. For an overnight takeoff
+of a large tender that is a better trade than live calls.
+
+``submit_provider_batch`` prepares every drawing exactly like a live
+analysis (same image preprocessing, system prompt and per-sheet prompt,
+built by the provider's own ``_request``), spools the provider requests to
+disk and submits them as one job. The job state is saved under
+``SKETCH_BATCH_DIR`` so the process can exit; ``collect_provider_batch``
+later polls the job (backing off between polls), downloads the output and
+maps each response back through ``_parse_result`` and
+``SketchAnalysisResult`` into ``BatchResult`` objects in submission order.
+
+Both SDKs honor ``OPENAI_BASE_URL`` / ``ANTHROPIC_BASE_URL``, so the whole
+workflow runs against ``benchmarks/fake_batch_server.py`` offline.
+
+Sheets are sent as a single (downscaled) image; tiling is a live-mode feature.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+
+from .image_preprocessing import prepare_image_async
+from .structured_output import anthropic_content_text
+from .types import (
+    BatchItem,
+    BatchResult,
+    ProviderBatchEntry,
+    ProviderBatchJob,
+    Telemetry,
+    TokenUsage,
+)
+
+
+DEFAULT_BATCH_DIR = Path(__file__).parent.parent / ".cache" / "batches"
+
+# First poll interval in seconds; grows by POLL_BACKOFF up to MAX_POLL_INTERVAL
+POLL_INTERVAL = float(os.getenv("SKETCH_BATCH_POLL_S", "30"))
+POLL_BACKOFF = 1.5
+MAX_POLL_INTERVAL = 600.0
+
+
+class BatchOutcome:
+    """One provider result line: response text or an error, plus usage."""
+
+    def __init__(
+        self,
+        custom_id: str,
+        text: Optional[str] = None,
+        error: Optional[str] = None,
+        usage: Optional[TokenUsage] = None
+    ):
+        self.custom_id = custom_id
+        self.text = text
+        self.error = error
+        self.usage = usage
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API: JSONL input file, polled batch, JSONL output file."""
+
+    provider = "openai"
+    max_requests = 50_000
+    max_bytes = 200 * 2 ** 20
+    terminal_statuses = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(self, client):
+        # Job control calls are few and idempotent; let the SDK retry them
+        self.client = client.with_options(max_retries=3)
+
+    @staticmethod
+    def format_request(custom_id: str, body: dict) -> dict:
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    async def submit(self, spool: Path, job: ProviderBatchJob) -> str:
+        with open(spool, "rb") as f:
+            input_file = await self.client.files.create(file=(spool.name, f), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            metadata={"sketch_job": job.job_id}
+        )
+        return batch.id
+
+    async def poll(self, remote_id: str) -> tuple[str, dict, bool]:
+        batch = await self.client.batches.retrieve(remote_id)
+        counts = batch.request_counts.model_dump() if batch.request_counts else {}
+        return batch.status, counts, batch.status in self.terminal_statuses
+
+    async def results(self, remote_id: str) -> AsyncIterator[BatchOutcome]:
+        batch = await self.client.batches.retrieve(remote_id)
+        # Expired or cancelled batches still return what finished
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    yield self._outcome(json.loads(line))
+
+    @staticmethod
+    def _outcome(record: dict) -> BatchOutcome:
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        status = response.get("status_code", 200)
+        error = record.get("error") or body.get("error")
+        if error or status >= 400:
+            message = error.get("message") if isinstance(error, dict) else error
+            return BatchOutcome(custom_id, error=message or f"HTTP {status}")
+
+        usage = body.get("usage") or {}
+        details = usage.get("prompt_tokens_details") or {}
+        return BatchOutcome(
+            custom_id,
+            text=body["choices"][0]["message"].get("content") or "",
+            usage=TokenUsage(
+                requests=1,
+                input_tokens=usage.get("prompt_tokens") or 0,
+                output_tokens=usage.get("completion_tokens") or 0,
+                cached_input_tokens=details.get("cached_tokens") or 0
+            )
+        )
+
+
+class AnthropicBatchBackend:
+    """Anthropic Message Batches: inline requests, streamed JSONL results."""
+
+    provider = "anthropic"
+    max_requests = 100_000
+    max_bytes = 256 * 2 ** 20
+
+    def __init__(self, client):
+        self.client = client.with_options(max_retries=3)
+
+    @staticmethod
+    def format_request(custom_id: str, body: dict) -> dict:
+        return {"custom_id": custom_id, "params": body}
+
+    async def submit(self, spool: Path, job: ProviderBatchJob) -> str:
+        with open(spool, encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f]
+        batch = await self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    async def poll(self, remote_id: str) -> tuple[str, dict, bool]:
+        batch = await self.client.messages.batches.retrieve(remote_id)
+        counts = batch.request_counts.model_dump() if batch.request_counts else {}
+        return batch.processing_status, counts, batch.processing_status == "ended"
+
+    async def results(self, remote_id: str) -> AsyncIterator[BatchOutcome]:
+        async for entry in await self.client.messages.batches.results(remote_id):
+            result = entry.result
+            if result.type != "succeeded":
+                # errored, canceled or expired
+                detail = getattr(getattr(result, "error", None), "error", None)
+                yield BatchOutcome(entry.custom_id, error=getattr(detail, "message", None) or result.type)
+                continue
+
+            message = result.message
+            usage = message.usage
+            cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+            cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+            yield BatchOutcome(
+                entry.custom_id,
+                text=anthropic_content_text(message.content),
+                usage=TokenUsage(
+                    requests=1,
+                    input_tokens=usage.input_tokens + cache_read + cache_write,
+                    output_tokens=usage.output_tokens,
+                    cached_input_tokens=cache_read,
+                    cache_write_tokens=cache_write
+                )
+            )
+
+
+BATCH_BACKENDS = {
+    "openai": OpenAIBatchBackend,
+    "anthropic": AnthropicBatchBackend,
+}
+
+
+class BatchJobStore:
+    """Job state as JSON files: ``<job_id>.json`` plus ``<job_id>.results.json``."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or os.getenv("SKETCH_BATCH_DIR") or DEFAULT_BATCH_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, path: Path, text: str) -> None:
+        # Write-then-rename so an interrupted save never leaves a torn file
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(path)
+
+    def spool_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.requests.jsonl"
+
+    def save(self, job: ProviderBatchJob) -> None:
+        self._write(self.directory / f"{job.job_id}.json", job.model_dump_json(indent=2))
+
+    def load(self, job_id: str) -> ProviderBatchJob:
+        path = self.directory / f"{job_id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Unknown batch job: {job_id} (looked in {self.directory})")
+        return ProviderBatchJob.model_validate_json(path.read_text(encoding="utf-8"))
+
+    def jobs(self) -> list[ProviderBatchJob]:
+        paths = sorted(p for p in self.directory.glob("*.json") if not p.name.endswith(".results.json"))
+        return [ProviderBatchJob.model_validate_json(p.read_text(encoding="utf-8")) for p in paths]
+
+    def save_results(self, job_id: str, results: list[BatchResult]) -> None:
+        payload = [result.model_dump(mode="json") for result in results]
+        self._write(self.directory / f"{job_id}.results.json", json.dumps(payload))
+
+    def load_results(self, job_id: str) -> list[BatchResult]:
+        path = self.directory / f"{job_id}.results.json"
+        return [BatchResult.model_validate(r) for r in json.loads(path.read_text(encoding="utf-8"))]
+
+
+def check_batch_provider(provider: str) -> None:
+    if provider.lower() not in BATCH_BACKENDS:
+        raise ValueError(
+            f"Provider batch jobs are not supported for '{provider}'. "
+            f"Supported: {', '.join(BATCH_BACKENDS)}"
+        )
+
+
+def _backend_for(agent, provider: str):
+    check_batch_provider(provider)
+    vision_model = agent._get_vision_model(provider)
+    return vision_model, BATCH_BACKENDS[provider](vision_model.client)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def submit_provider_batch(
+    agent,
+    items: Iterable[BatchItem],
+    store: BatchJobStore,
+    provider: Optional[str] = None
+) -> ProviderBatchJob:
+    """Build one provider batch job from ``items`` and submit it.
+
+    Items are loaded and encoded one at a time and spooled to disk, so only
+    the request currently being built is held in memory.
+    """
+    provider = (provider or agent.provider).lower()
+    vision_model, backend = _backend_for(agent, provider)
+
+    created_at = _now()
+    job = ProviderBatchJob(
+        job_id=f"{provider}-{created_at:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}",
+        provider=provider,
+        model=vision_model.model,
+        created_at=created_at
+    )
+
+    spool = store.spool_path(job.job_id)
+    spooled_bytes = 0
+    try:
+        with open(spool, "w", encoding="utf-8") as f:
+            for index, item in enumerate(items):
+                image, metadata = agent._load_batch_item(index, item)
+                prepared = await prepare_image_async(image, provider)
+                body = await vision_model._request(
+                    prepared.overview,
+                    agent._build_analysis_prompt(metadata, item.context),
+                    agent.MAX_TOKENS,
+                    agent.TEMPERATURE,
+                    agent.system_prompt,
+                    **agent._structured_options(vision_model)
+                )
+
+                custom_id = f"sheet-{index:05d}"
+                line = json.dumps(backend.format_request(custom_id, body)) + "\n"
+                spooled_bytes += len(line)
+                if index + 1 > backend.max_requests or spooled_bytes > backend.max_bytes:
+                    raise ValueError(
+                        f"Batch exceeds the {provider} limit of {backend.max_requests} requests / "
+                        f"{backend.max_bytes // 2 ** 20} MB at sheet {index + 1}; "
+                        "submit the set in parts (e.g. with --pages)"
+                    )
+                f.write(line)
+
+                job.entries.append(ProviderBatchEntry(
+                    index=index,
+                    custom_id=custom_id,
+                    metadata=metadata,
+                    source=item.image_path,
+                    page=item.page,
+                    context=item.context
+                ))
+
+        if not job.entries:
+            raise ValueError("No drawings to submit")
+
+        job.remote_id = await backend.submit(spool, job)
+    finally:
+        spool.unlink(missing_ok=True)
+
+    job.status = "submitted"
+    job.submitted_at = _now()
+    store.save(job)
+    return job
+
+
+async def collect_provider_batch(
+    agent,
+    job_id: str,
+    store: BatchJobStore,
+    wait: bool = False,
+    poll_interval: float = POLL_INTERVAL
+) -> tuple[ProviderBatchJob, Optional[list[BatchResult]]]:
+    """Poll a submitted job and, once it has ended, fetch and map its results.
+
+    Returns the updated job and its results, or None while the provider is
+    still working (after one poll, or keeps polling with ``wait``). Results
+    are saved with the job, so collecting again does not download them twice.
+    """
+    job = store.load(job_id)
+    if job.status == "collected":
+        return job, store.load_results(job_id)
+
+    vision_model, backend = _backend_for(agent, job.provider)
+    while True:
+        status, counts, done = await backend.poll(job.remote_id)
+        job.status, job.request_counts = status, counts
+        if done:
+            break
+        store.save(job)
+        if not wait:
+            return job, None
+        await asyncio.sleep(poll_interval)
+        poll_interval = min(poll_interval * POLL_BACKOFF, MAX_POLL_INTERVAL)
+
+    job.ended_at = job.ended_at or _now()
+    outcomes = {}
+    async for outcome in backend.results(job.remote_id):
+        outcomes[outcome.custom_id] = outcome
+
+    results = [_map_outcome(agent, job, entry, outcomes.get(entry.custom_id)) for entry in job.entries]
+    store.save_results(job_id, results)
+    job.status = "collected"
+    store.save(job)
+    return job, results
+
+
+def _map_outcome(
+    agent,
+    job: ProviderBatchJob,
+    entry: ProviderBatchEntry,
+    outcome: Optional[BatchOutcome]
+) -> BatchResult:
+    """Turn one provider result into a BatchResult, isolating failures."""
+    elapsed = (job.ended_at - (job.submitted_at or job.created_at)).total_seconds()
+    base = {
+        "index": entry.index,
+        "sketch_id": entry.metadata.sketch_id,
+        "page": entry.page,
+        "elapsed": elapsed,
+    }
+
+    if outcome is None or outcome.error:
+        return BatchResult(
+            **base,
+            success=False,
+            error=outcome.error if outcome else f"No result returned (batch {job.status})",
+            error_type="ProviderBatchError"
+        )
+
+    try:
+        result = agent._parse_result(outcome.text, structured=agent.structured_output).model_copy(update={
+            "sketch_id": entry.metadata.sketch_id,
+            "processing_time": elapsed
+        })
+    except Exception as e:
+        return BatchResult(**base, success=False, error=str(e), error_type=type(e).__name__)
+
+    result = result.model_copy(update={"telemetry": Telemetry(
+        provider=job.provider,
+        model=job.model,
+        total_ms=round(elapsed * 1000, 3),
+        usage=outcome.usage or TokenUsage()
+    )})
+    return BatchResult(**base, success=True, result=result)
@@ -0,0 +1,340 @@
+"""Client-side rate limiting and retry scheduling for vision providers.
+
+Every provider call goes through the ``ProviderLimiter`` for its provider
+(one per provider per process, shared by all model instances, the router and
+batch workers). The limiter:
+
+- holds token buckets for requests/minute and tokens/minute, charging each
+  request its estimated input tokens (prompt + image) plus ``max_tokens``
+  before it is sent, so a fan-out stays under the quota instead of
+  discovering it through 429s;
+- admits waiters in priority order, so interactive single-sheet requests go
+  ahead of queued batch pages;
+- retries rate-limit and transient errors with jittered exponential backoff,
+  honoring ``Retry-After`` and pausing the whole provider while it runs out.
+
+Quotas come from env vars, e.g. ``SKETCH_OPENAI_RPM=500`` and
+``SKETCH_OPENAI_TPM=30000``. Unset means no client-side limit for that
+dimension (retries still apply).
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from .telemetry import record_span
+
+
+T = TypeVar("T")
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+request_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "request_priority", default=PRIORITY_INTERACTIVE
+)
+
+MAX_RETRIES = int(os.getenv("SKETCH_MAX_RETRIES", "5"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# Buckets hold this many seconds of quota, so an idle client cannot burst a
+# full minute's allowance into a provider that enforces shorter windows
+BURST_SECONDS = 10.0
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class TokenBucket:
+    """Continuously refilling bucket of ``per_minute`` units.
+
+    Requests are charged in full. One larger than the bucket waits until it
+    is full, then leaves it in debt (a negative level) that later requests
+    wait out, so large requests cannot exceed the quota either.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until a request of ``amount`` units may go (0 if now)."""
+        self._refill()
+        # A request larger than the burst waits for a full bucket
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+
+class ProviderLimiter:
+    """Priority-ordered admission against a provider's RPM/TPM quotas."""
+
+    def __init__(self, provider: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.retries = 0
+        self._waiters: list[list] = []
+        self._seq = itertools.count()
+
+    def _delay(self, tokens: float) -> float:
+        delay = self.paused_until - time.monotonic()
+        if self.requests:
+            delay = max(delay, self.requests.delay(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.delay(tokens))
+        return delay
+
+    def _wake_head(self) -> None:
+        if self._waiters:
+            self._waiters[0][2].set()
+
+    async def acquire(self, tokens: float = 0, priority: Optional[int] = None) -> None:
+        """Wait until this request may be sent, then charge it to the buckets."""
+        priority = request_priority.get() if priority is None else priority
+        entry = [priority, next(self._seq), asyncio.Event()]
+        heapq.heappush(self._waiters, entry)
+
+        try:
+            while True:
+                if self._waiters[0] is entry:
+                    delay = self._delay(tokens)
+                    if delay <= 0:
+                        break
+                    # Sleep until quota refills, but wake early if a
+                    # higher-priority request takes the head of the queue
+                    entry[2].clear()
+                    try:
+                        await asyncio.wait_for(entry[2].wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    entry[2].clear()
+                    await entry[2].wait()
+        except BaseException:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._wake_head()
+            raise
+
+        heapq.heappop(self._waiters)
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        self._wake_head()
+
+    def pause(self, seconds: float) -> None:
+        """Hold all traffic to this provider (server asked us to back off)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self._wake_head()
+
+    async def _admit(self, tokens: float) -> float:
+        """Acquire quota, reporting the wait as the ``queue`` stage; returns send time."""
+        start = time.perf_counter()
+        await self.acquire(tokens)
+        sent = time.perf_counter()
+        record_span("queue", start, sent)
+        return sent
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: float = 0) -> T:
+        """Acquire quota and run ``call``, retrying throttled/transient failures."""
+        attempt = 0
+        while True:
+            sent = await self._admit(tokens)
+            try:
+                result = await call()
+            except Exception as e:
+                record_span("request", sent, time.perf_counter())
+                attempt = await self._backoff(e, attempt)
+                continue
+            record_span("request", sent, time.perf_counter())
+            return result
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[str]], tokens: float = 0) -> AsyncIterator[str]:
+        """Like ``run`` for streams; retries only before the first chunk."""
+        attempt = 0
+        while True:
+            sent = await self._admit(tokens)
+            started = False
+            try:
+                async for chunk in open_stream():
+                    if not started:
+                        started = True
+                        record_span("first_byte", sent, time.perf_counter())
+                    yield chunk
+            except Exception as e:
+                record_span("request", sent, time.perf_counter())
+                if started:
+                    raise
+                attempt = await self._backoff(e, attempt)
+                continue
+
+            finished = time.perf_counter()
+            record_span("last_byte", sent, finished)
+            record_span("request", sent, finished)
+            return
+
+    async def _backoff(self, error: Exception, attempt: int) -> int:
+        """Sleep before the next attempt, or re-raise if the error is final."""
+        if attempt >= MAX_RETRIES or not is_retryable(error):
+            raise error
+
+        retry_after = retry_after_seconds(error)
+        # Full jitter keeps a fan-out of workers from retrying in lockstep
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, BACKOFF_BASE)
+            self.pause(retry_after)
+
+        if error_status(error) == 429:
+            self.throttled += 1
+        self.retries += 1
+        start = time.perf_counter()
+        await asyncio.sleep(delay)
+        record_span("retry", start, time.perf_counter())
+        return attempt + 1
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._waiters),
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of an SDK error (openai/anthropic ``status_code``, google ``code``)."""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    if error_status(error) in RETRYABLE_STATUS:
+        return True
+    # Connection resets and timeouts carry no status
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Parse ``retry-after-ms`` / ``Retry-After`` (seconds or HTTP date) from the error's response."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+# OpenAI image detail: "auto" sends small images at low detail, others at high
+OPENAI_DETAIL = os.getenv("SKETCH_OPENAI_DETAIL", "auto").lower()
+
+
+def openai_detail(size: tuple[int, int]) -> str:
+    """``detail`` for an OpenAI image: low detail (a flat 85 tokens) only
+    when the image already fits in 512x512, where it loses nothing."""
+    if OPENAI_DETAIL in ("high", "low"):
+        return OPENAI_DETAIL
+    return "low" if max(size) <= 512 else "high"
+
+
+def estimate_image_tokens(provider: str, size: tuple[int, int]) -> int:
+    """Approximate input tokens a provider bills for an image of ``size``."""
+    width, height = size
+    if provider == "openai" and openai_detail(size) == "low":
+        return 85
+    if provider == "openai":
+        # High detail: fit in 2048, shortest side to 768, 170 per 512px tile + 85
+        scale = min(1.0, 2048 / max(width, height))
+        width, height = width * scale, height * scale
+        if min(width, height) > 768:
+            scale = 768 / min(width, height)
+            width, height = width * scale, height * scale
+        return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+    if provider == "gemini":
+        # 258 per 768px tile (small images count as one)
+        return 258 * max(1, math.ceil(width / 768) * math.ceil(height / 768))
+    if provider == "qwen":
+        # One token per 28x28 patch
+        return math.ceil(width / 28) * math.ceil(height / 28)
+    # Anthropic's published approximation; also a fair default
+    return math.ceil(width * height / 750)
+
+
+def estimate_request_tokens(
+    provider: str,
+    size: tuple[int, int],
+    prompt: str,
+    max_tokens: int,
+    system: Optional[str] = None
+) -> int:
+    """Tokens to charge against TPM: system + prompt + image + reserved output.
+
+    Cached system-prompt tokens still count toward most providers' limits.
+    """
+    text_chars = len(prompt) + len(system or "")
+    return text_chars // 4 + estimate_image_tokens(provider, size) + max_tokens
+
+
+_limiters: dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Process-wide limiter for ``provider``, configured from env on first use."""
+    if provider not in _limiters:
+        prefix = f"SKETCH_{provider.upper()}_"
+        rpm = os.getenv(prefix + "RPM")
+        tpm = os.getenv(prefix + "TPM")
+        _limiters[provider] = ProviderLimiter(
+            provider,
+            rpm=float(rpm) if rpm else None,
+            tpm=float(tpm) if tpm else None
+        )
+    return _limiters[provider]
+
+
+def limiter_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,466 @@
+"""Region-level cache for title blocks that repeat across a drawing set.
+
+Every sheet of a set carries the same title block strip: project details,
+personnel, legend and general notes, with only the drawing number, sheet,
+revision and date changing. Instead of paying the model to read it again on
+each sheet, the agent:
+
+1. Detects the title region from its ruled border: a full-height rule near
+   the right edge (right strip), a full-width rule near the bottom (bottom
+   strip), or a block ruled off in the bottom-right corner.
+2. Fingerprints it with a difference hash, which survives rasterization
+   noise (DPI, anti-aliasing, JPEG), and keeps a thumbnail for a cell-wise
+   content comparison.
+3. The second time a fingerprint is seen, reads the region alone once
+   (``project_metadata``, personnel, specifications, standards, notes) and
+   stores that extraction.
+4. On later sheets, an *exact* match (no cell differs) is masked out of
+   the image except its identification zone, the bottom-right cells with
+   the drawing number, revision, date and sheet. A *layout* match (same
+   title block, different drawing number) keeps the image. Either way the
+   model reports only the sheet-specific fields; everything else comes
+   from the cache.
+
+The sheet-specific fields are never reused: the comparison works on a
+thumbnail, where a drawing number that differs by one digit can pass for
+noise, and the cached extraction may come from another sheet than the
+thumbnail.
+
+Entries live in SQLite next to the result cache and persist across runs,
+together with lifetime hit counters and an estimate of the tokens saved.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+from .result_cache import DEFAULT_CACHE_DIR
+from .types import SketchAnalysisResult
+
+
+# Detection runs on a grayscale copy with this long side
+DETECT_LONG_SIDE = 1600
+# Gray level below which a pixel counts as ink
+INK_THRESHOLD = 160
+# A border rule must run unbroken over this share of the sheet (strips) ...
+RULE_COVERAGE = 0.7
+# ... and a corner block must be at least this share of the sheet wide
+BLOCK_MIN_WIDTH = 0.15
+
+HASH_SIZE = 16
+# Hamming distance (of HASH_SIZE**2 bits) still treated as the same region
+MAX_HASH_DISTANCE = int(os.getenv("SKETCH_REGION_MAX_DISTANCE", "24"))
+
+THUMB_LONG_SIDE = 1024
+# Content comparison: after a light blur (absorbs the pixel or so of
+# misalignment between rasterizations), a mean difference above CELL_DIFF in
+# any 8x8 cell means the regions differ, e.g. a changed drawing number.
+# Measured on re-rasterized, blurred JPEG sheets: noise peaks near 25, one
+# changed line of title block text near 80.
+COMPARE_BLUR = 2
+CELL_SIZE = 8
+CELL_DIFF = 48
+
+DEFAULT_TTL_SECONDS = 90 * 24 * 3600
+
+# Fields a title region is extracted into and reused from
+REGION_FIELDS = ("project_metadata", "specifications", "standards", "regional_codes", "notes")
+# Title block fields that change from sheet to sheet
+SHEET_FIELDS = ("drawing_number", "sheet_of", "revision", "date", "scale")
+# Share of a strip kept as its identification zone (ISO 7200 puts the
+# drawing number, revision, date and sheet in the bottom-right corner):
+# the bottom of a right strip, the right end of a bottom strip, the bottom
+# half of a corner block
+IDENTIFICATION_SHARE = {"right_strip": 0.25, "bottom_strip": 0.3, "corner_block": 0.5}
+
+REGION_LABELS = {
+    "right_strip": "title block strip along the right edge",
+    "bottom_strip": "title block strip along the bottom edge",
+    "corner_block": "title block in the bottom-right corner",
+}
+
+COUNTERS = ("lookups", "exact_hits", "layout_hits", "misses", "undetected", "extractions", "tokens_saved")
+
+_INK_RUN = re.compile(rb"\xff+")
+
+
+class TitleRegion:
+    """A detected title region in original image coordinates."""
+
+    def __init__(self, kind: str, box: tuple[int, int, int, int]):
+        self.kind = kind
+        self.box = box
+
+    @property
+    def label(self) -> str:
+        return REGION_LABELS[self.kind]
+
+    @property
+    def identification_box(self) -> tuple[int, int, int, int]:
+        """The part of the region holding the sheet-specific fields."""
+        left, top, right, bottom = self.box
+        share = IDENTIFICATION_SHARE[self.kind]
+        if self.kind == "bottom_strip":
+            return (right - round((right - left) * share), top, right, bottom)
+        return (left, bottom - round((bottom - top) * share), right, bottom)
+
+    def remove_from(self, image: Image.Image) -> Image.Image:
+        """The sheet with this region masked, except its identification zone."""
+        masked = image.copy() if image.mode in ("RGB", "L") else image.convert("RGB")
+        zone = masked.crop(self.identification_box)
+        masked.paste("white", self.box)
+        masked.paste(zone, self.identification_box[:2])
+        return masked
+
+
+class RegionFingerprint:
+    """Perceptual hash and comparison thumbnail of one title region."""
+
+    def __init__(self, region: TitleRegion, phash: int, thumbnail: Image.Image):
+        self.region = region
+        self.phash = phash
+        self.thumbnail = thumbnail
+
+
+class RegionEntry:
+    """A cached title region and, once it has recurred, its extraction."""
+
+    def __init__(self, entry_id: int, kind: str, phash: int, thumbnail: bytes, extraction: Optional[dict]):
+        self.id = entry_id
+        self.kind = kind
+        self.phash = phash
+        self.thumbnail = thumbnail
+        self.extraction = extraction
+
+
+class RegionPlan:
+    """How one sheet uses a cached title region.
+
+    ``image`` is what the model is sent, ``prompt_note`` tells it what was
+    left out, and ``reused`` carries the cached fields merged into its result.
+    """
+
+    def __init__(
+        self,
+        image: Image.Image,
+        prompt_note: str,
+        reused: SketchAnalysisResult,
+        label: str,
+        exact: bool,
+        tokens_saved: int
+    ):
+        self.image = image
+        self.prompt_note = prompt_note
+        self.reused = reused
+        self.label = label
+        self.exact = exact
+        self.tokens_saved = tokens_saved
+
+
+def _ink(gray: Image.Image) -> Image.Image:
+    return gray.point(lambda v: 255 if v < INK_THRESHOLD else 0)
+
+
+def _runs(ink: Image.Image) -> list[tuple[int, int, int]]:
+    """Longest ink run per row of ``ink`` as (length, start, end)."""
+    width = ink.width
+    data = ink.tobytes()
+    runs = []
+    for offset in range(0, len(data), width):
+        best = (0, 0, 0)
+        for match in _INK_RUN.finditer(data, offset, offset + width):
+            length = match.end() - match.start()
+            if length > best[0]:
+                best = (length, match.start() - offset, match.end() - offset)
+        runs.append(best)
+    return runs
+
+
+def detect_title_region(image: Image.Image) -> Optional[TitleRegion]:
+    """Find the title block from the rules that border it.
+
+    Looks for the innermost long rule in the outer part of the sheet. Rules
+    in the outermost 8% are skipped so the drawing frame itself is not
+    mistaken for one. Returns None for sheets without a ruled title block
+    (hand sketches, photos).
+    """
+    full = image.convert("L")
+    # Integer box reduction is several times faster than a resize
+    factor = -(-max(image.size) // DETECT_LONG_SIDE)
+    ink = _ink(full.reduce(factor) if factor > 1 else full)
+    width, height = ink.size
+
+    def snap(position: int, vertical: bool) -> int:
+        """Map a rule found at reduced size to its first full-resolution pixel row/column."""
+        low = max(0, (position - 1) * factor)
+        high = min(full.width if vertical else full.height, (position + 2) * factor)
+        if vertical:
+            band = full.crop((low, 0, high, full.height)).resize((high - low, 1), Image.Resampling.BOX)
+        else:
+            band = full.crop((0, low, full.width, high)).resize((1, high - low), Image.Resampling.BOX)
+        means = band.tobytes()
+        darkest = min(means)
+        # Leading edge of the rule, so every sheet is cut at the same pixel
+        return low + next(i for i, mean in enumerate(means) if mean <= (darkest + 255) // 2)
+
+    def original(left: int, top: int) -> tuple[int, int, int, int]:
+        return (
+            snap(left, True) if left else 0,
+            snap(top, False) if top else 0,
+            image.width,
+            image.height,
+        )
+
+    # Right strip: a full-height vertical rule in the right 40% of the sheet
+    first = int(width * 0.6)
+    # ROTATE_90 turns the last column into the first row
+    columns = _runs(ink.crop((first, 0, int(width * 0.92), height)).transpose(Image.Transpose.ROTATE_90))[::-1]
+    for x, (length, _, _) in enumerate(columns, first):
+        if length >= height * RULE_COVERAGE:
+            return TitleRegion("right_strip", original(x, 0))
+
+    # Bottom strip: a full-width horizontal rule in the bottom 30% of the sheet
+    top = int(height * 0.5)
+    rows = _runs(ink.crop((0, top, width, int(height * 0.92))))
+    for y, (length, _, _) in enumerate(rows[int(height * 0.7) - top:], int(height * 0.7)):
+        if length >= width * RULE_COVERAGE:
+            return TitleRegion("bottom_strip", original(0, y))
+
+    # Corner block: the topmost rule in the bottom-right quarter that runs
+    # to the right edge, closed by a vertical rule at its left end
+    for y, (length, start, end) in enumerate(rows, top):
+        if end < width * 0.9 or length < width * BLOCK_MIN_WIDTH or start < width * 0.4:
+            continue
+        left_edge = _runs(ink.crop((start, y, min(width, start + 3), height)).transpose(Image.Transpose.ROTATE_90))
+        if max(left_edge)[0] >= (height - y) * 0.6:
+            return TitleRegion("corner_block", original(start, y))
+
+    return None
+
+
+def perceptual_hash(gray: Image.Image) -> int:
+    """Difference hash: compares neighbouring cells of a HASH_SIZE grid."""
+    small = ImageOps.autocontrast(gray).resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def fingerprint_title_region(image: Image.Image) -> Optional[RegionFingerprint]:
+    """Detect the title region and fingerprint it, or None if there is none."""
+    region = detect_title_region(image)
+    if region is None:
+        return None
+
+    gray = image.crop(region.box).convert("L")
+    scale = min(1.0, THUMB_LONG_SIDE / max(gray.size))
+    if scale < 1.0:
+        gray = gray.resize((max(1, round(gray.width * scale)), max(1, round(gray.height * scale))), Image.Resampling.BOX)
+    return RegionFingerprint(region, perceptual_hash(gray), gray)
+
+
+def reusable_fields(extraction: dict) -> dict:
+    """A cached extraction without the title block fields that change from sheet to sheet."""
+    reused = dict(extraction)
+    if reused.get("project_metadata"):
+        reused["project_metadata"] = {
+            name: value for name, value in reused["project_metadata"].items()
+            if name not in SHEET_FIELDS
+        }
+    return reused
+
+
+def same_content(a: Image.Image, b: Image.Image) -> bool:
+    """True if two region thumbnails differ by no more than rasterization noise."""
+    if a.size != b.size:
+        b = b.resize(a.size, Image.Resampling.BOX)
+    blur = ImageFilter.BoxBlur(COMPARE_BLUR)
+    diff = ImageChops.difference(a.filter(blur), b.filter(blur))
+    cells = diff.resize((max(1, a.width // CELL_SIZE), max(1, a.height // CELL_SIZE)), Image.Resampling.BOX)
+    return cells.getextrema()[1] <= CELL_DIFF
+
+
+def _png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+class RegionCache:
+    """SQLite-backed store of title region fingerprints and their extractions."""
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl_seconds: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the cache database. If None, uses
+                       SKETCH_CACHE_DIR env var (defaults to sketch-agent/.cache)
+            ttl_seconds: Drop entries unused for this long. If None, uses
+                         SKETCH_REGION_CACHE_TTL_DAYS (90 days)
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("SKETCH_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+        if ttl_seconds is None:
+            ttl_days = os.getenv("SKETCH_REGION_CACHE_TTL_DAYS")
+            ttl_seconds = float(ttl_days) * 24 * 3600 if ttl_days else DEFAULT_TTL_SECONDS
+        self.ttl_seconds = ttl_seconds
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "regions.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS regions (
+                id INTEGER PRIMARY KEY,
+                scope TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                phash TEXT NOT NULL,
+                thumbnail BLOB NOT NULL,
+                extraction TEXT,
+                sheets INTEGER NOT NULL DEFAULT 1,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS regions_scope ON regions (scope, kind)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+        # Counters for this process; lifetime totals are in the counters table
+        self.session = dict.fromkeys(COUNTERS, 0)
+        # Extractions in flight, so concurrent sheets share one request
+        self._pending: dict[int, asyncio.Future] = {}
+
+    @staticmethod
+    def make_scope(provider: str, model: Optional[str], system_prompt: str) -> str:
+        """Entries are only reused for the model and prompt that extracted them."""
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+        return f"{provider}:{model or ''}:{prompt_hash}"
+
+    def match(self, scope: str, fingerprint: RegionFingerprint) -> tuple[RegionEntry, bool]:
+        """Return the closest cached region, registering a new one if none is close.
+
+        The flag is False for a first sighting: that sheet is analyzed in
+        full, since a region seen once is not yet known to recur.
+        """
+        now = time.time()
+        kind = fingerprint.region.kind
+        with self._lock:
+            self._conn.execute("DELETE FROM regions WHERE used_at < ?", (now - self.ttl_seconds,))
+            best = None
+            for entry_id, phash in self._conn.execute(
+                "SELECT id, phash FROM regions WHERE scope = ? AND kind = ?", (scope, kind)
+            ):
+                distance = hamming(int(phash, 16), fingerprint.phash)
+                if distance <= MAX_HASH_DISTANCE and (best is None or distance < best[1]):
+                    best = (entry_id, distance)
+
+            if best is None:
+                thumbnail = _png(fingerprint.thumbnail)
+                cursor = self._conn.execute(
+                    "INSERT INTO regions (scope, kind, phash, thumbnail, created_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (scope, kind, f"{fingerprint.phash:x}", thumbnail, now, now)
+                )
+                return RegionEntry(cursor.lastrowid, kind, fingerprint.phash, thumbnail, None), False
+
+            self._conn.execute(
+                "UPDATE regions SET sheets = sheets + 1, used_at = ? WHERE id = ?", (now, best[0])
+            )
+            phash, thumbnail, extraction = self._conn.execute(
+                "SELECT phash, thumbnail, extraction FROM regions WHERE id = ?", (best[0],)
+            ).fetchone()
+        return RegionEntry(best[0], kind, int(phash, 16), thumbnail, json.loads(extraction) if extraction else None), True
+
+    async def extraction(self, entry: RegionEntry, extract: Callable[[], Awaitable[dict]]) -> dict:
+        """The entry's extraction, running ``extract`` once if there is none yet.
+
+        Concurrent callers for the same entry await the same request. A
+        failed extraction is not stored, so a later sheet retries it.
+        """
+        if entry.extraction is not None:
+            return entry.extraction
+
+        pending = self._pending.get(entry.id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._extract(entry, extract))
+            self._pending[entry.id] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(entry.id, None))
+        entry.extraction = await asyncio.shield(pending)
+        return entry.extraction
+
+    async def _extract(self, entry: RegionEntry, extract: Callable[[], Awaitable[dict]]) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT extraction FROM regions WHERE id = ?", (entry.id,)).fetchone()
+        if row and row[0]:
+            # Stored by another process meanwhile
+            return json.loads(row[0])
+
+        extraction = await extract()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE regions SET extraction = ? WHERE id = ?", (json.dumps(extraction), entry.id)
+            )
+        self.record("extractions")
+        return extraction
+
+    @staticmethod
+    def thumbnail(entry: RegionEntry) -> Image.Image:
+        return Image.open(io.BytesIO(entry.thumbnail))
+
+    def record(self, name: str, value: int = 1) -> None:
+        """Add to a hit-rate counter, for this process and in the lifetime totals."""
+        self.session[name] += value
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                (name, value)
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, extracted = self._conn.execute(
+                "SELECT COUNT(*), COUNT(extraction) FROM regions"
+            ).fetchone()
+            lifetime = dict.fromkeys(COUNTERS, 0)
+            lifetime.update(self._conn.execute("SELECT name, value FROM counters").fetchall())
+
+        def with_rate(counters: dict) -> dict:
+            hits = counters["exact_hits"] + counters["layout_hits"]
+            seen = hits + counters["misses"]
+            return {**counters, "hit_rate": round(hits / seen, 3) if seen else 0.0}
+
+        return {
+            "entries": entries,
+            "extracted": extracted,
+            "session": with_rate(self.session),
+            "lifetime": with_rate(lifetime),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
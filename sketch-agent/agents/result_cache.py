@@ -0,0 +1,208 @@
+"""Content-addressed on-disk cache for sketch analysis results.
+
+Tender packages are re-uploaded with the same drawings all the time. Results
+are keyed by a hash of the decoded image pixels plus everything else that
+shapes the model's answer (provider, model, system prompt, context and
+generation settings), so a re-upload under a different filename still hits.
+
+Entries live in a single SQLite file (WAL mode, safe across the batch CLI and
+server processes) with a TTL and size-based LRU eviction.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+
+from .types import SketchAnalysisResult
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+
+# Rows hashed per chunk; ``tobytes()`` of a whole A0 scan would copy ~100 MB
+HASH_STRIP_PIXELS = 4_000_000
+
+
+def hash_image_pixels(image: Image.Image) -> str:
+    """Hash decoded pixel data, independent of file format and filename."""
+    digest = hashlib.sha256()
+    width, height = image.size
+    digest.update(f"{image.mode}:{width}x{height}:".encode())
+    # Same digest as hashing ``tobytes()`` at once: rows are encoded independently
+    rows = max(1, HASH_STRIP_PIXELS // max(1, width))
+    for top in range(0, height, rows):
+        digest.update(image.crop((0, top, width, min(height, top + rows))).tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed LRU/TTL cache of validated SketchAnalysisResult objects."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the cache database. If None, uses
+                       SKETCH_CACHE_DIR env var (defaults to sketch-agent/.cache)
+            max_bytes: Total size budget. If None, uses SKETCH_CACHE_MAX_MB (512 MB)
+            ttl_seconds: Entry lifetime. If None, uses SKETCH_CACHE_TTL_DAYS (30 days)
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("SKETCH_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+        if max_bytes is None:
+            max_mb = os.getenv("SKETCH_CACHE_MAX_MB")
+            max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+
+        if ttl_seconds is None:
+            ttl_days = os.getenv("SKETCH_CACHE_TTL_DAYS")
+            ttl_seconds = float(ttl_days) * 24 * 3600 if ttl_days else DEFAULT_TTL_SECONDS
+        self.ttl_seconds = ttl_seconds
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "results.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)"
+        )
+
+    @staticmethod
+    def make_key(
+        image_hash: str,
+        provider: str,
+        model: Optional[str],
+        system_prompt: str,
+        context: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        extra: Optional[dict] = None
+    ) -> str:
+        """Build the cache key for one analysis request.
+
+        ``extra`` holds any further settings that change the result
+        (e.g. tiling); it is left out of the key when empty so existing
+        entries stay valid.
+        """
+        fields = {
+            "image": image_hash,
+            "provider": provider,
+            "model": model,
+            "system_prompt": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+            "context": context,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if extra:
+            fields["extra"] = extra
+        material = json.dumps(fields, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[SketchAnalysisResult]:
+        """Return the cached result, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+
+            self._conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE key = ?",
+                (now, key)
+            )
+
+        try:
+            return SketchAnalysisResult.model_validate_json(value)
+        except ValueError:
+            # Schema changed since the entry was written - treat as a miss
+            self.delete(key)
+            return None
+
+    def put(self, key: str, result: SketchAnalysisResult) -> None:
+        """Store a validated result and evict least recently used entries."""
+        value = result.model_dump_json().encode("utf-8")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones over budget."""
+        self._conn.execute(
+            "DELETE FROM results WHERE created_at < ?",
+            (time.time() - self.ttl_seconds,)
+        )
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM results ORDER BY accessed_at ASC"
+        ):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+
+        self._conn.executemany("DELETE FROM results WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,171 @@
+"""Merge partial analyses (tiles, pages, passes) into one result.
+
+The first result is treated as the primary one (e.g. the whole-sheet
+overview) and wins for scalar fields; the others fill gaps. Technical data
+is concatenated with near-duplicates collapsed, since overlapping tiles
+report the same dimension or material more than once.
+"""
+
+import re
+from typing import Any, Callable, Iterable, Optional, TypeVar
+from pydantic import BaseModel
+
+from .types import (
+    SketchAnalysisResult,
+    TechnicalData,
+    DetailedDimension,
+    DetailedMaterial,
+    DetailedComponent,
+    Quantities
+)
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def _norm(value: Any) -> str:
+    """Normalize a field for duplicate detection."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+
+def _dimension_key(item: DetailedDimension) -> tuple:
+    return (_norm(item.label), _norm(item.value), _norm(item.unit))
+
+
+def _material_key(item: DetailedMaterial) -> tuple:
+    return (_norm(item.component), _norm(item.spec), _norm(item.grade))
+
+
+def _component_key(item: DetailedComponent) -> tuple:
+    return (_norm(item.type), _norm(item.size), _norm(item.description))
+
+
+def _unique(values: Iterable[Any]) -> list:
+    seen = set()
+    unique = []
+    for value in values:
+        key = _norm(value) if not isinstance(value, BaseModel) else value.model_dump_json()
+        if key not in seen:
+            seen.add(key)
+            unique.append(value)
+    return unique
+
+
+def _fill(primary: Optional[T], others: Iterable[Optional[T]]) -> Optional[T]:
+    """Fill None/empty fields of ``primary`` from the first model that has them."""
+    candidates = [model for model in others if model is not None]
+    if primary is None:
+        if not candidates:
+            return None
+        primary, candidates = candidates[0], candidates[1:]
+
+    updates = {}
+    for name in type(primary).model_fields:
+        value = getattr(primary, name)
+        if value not in (None, "", []):
+            continue
+        for other in candidates:
+            other_value = getattr(other, name)
+            if other_value not in (None, "", []):
+                updates[name] = other_value
+                break
+
+    return primary.model_copy(update=updates) if updates else primary
+
+
+def _dedupe(
+    items: Iterable[T],
+    key: Callable[[T], tuple],
+    better: Optional[Callable[[T, T], T]] = None
+) -> list[T]:
+    """Collapse items with equal keys, keeping first-seen order."""
+    merged: dict[tuple, T] = {}
+    for item in items:
+        item_key = key(item)
+        if item_key not in merged:
+            merged[item_key] = item
+        elif better is not None:
+            merged[item_key] = better(merged[item_key], item)
+    return list(merged.values())
+
+
+def _better_dimension(current: DetailedDimension, new: DetailedDimension) -> DetailedDimension:
+    """Keep the more confident reading and union the views it appears in."""
+    keep = new if (new.confidence or 0) > (current.confidence or 0) else current
+    views = _unique([*current.views, *new.views])
+    return keep.model_copy(update={"views": views})
+
+
+def _merge_quantities(quantities: list[Quantities]) -> Optional[Quantities]:
+    if not quantities:
+        return None
+    # Overlapping regions would double count if summed; take the first
+    # non-zero reading per field instead
+    values = {}
+    for name in Quantities.model_fields:
+        values[name] = next(
+            (getattr(q, name) for q in quantities if getattr(q, name)),
+            getattr(quantities[0], name)
+        )
+    return Quantities(**values)
+
+
+def merge_results(results: list[SketchAnalysisResult]) -> SketchAnalysisResult:
+    """Merge several partial results into one.
+
+    Args:
+        results: Partial results, primary (overview) first
+
+    Returns:
+        Combined result with de-duplicated technical data
+    """
+    if not results:
+        raise ValueError("No results to merge")
+    if len(results) == 1:
+        return results[0]
+
+    primary, rest = results[0], results[1:]
+
+    technical = [r.technical_data for r in results if r.technical_data is not None]
+    technical_data = None
+    if technical:
+        technical_data = TechnicalData(
+            dimensions=_dedupe(
+                (d for t in technical for d in t.dimensions),
+                _dimension_key,
+                _better_dimension
+            ),
+            materials=_dedupe(
+                (m for t in technical for m in t.materials),
+                _material_key,
+                lambda current, new: _fill(current, [new])
+            ),
+            components=_dedupe(
+                (c for t in technical for c in t.components),
+                _component_key,
+                lambda current, new: _fill(current, [new])
+            ),
+            quantities=_merge_quantities([t.quantities for t in technical if t.quantities])
+        )
+
+    scores = [r.confidence_score for r in results if r.confidence_score is not None]
+    notes = _unique(r.notes for r in results if r.notes)
+
+    return primary.model_copy(update={
+        "context_layer": _fill(primary.context_layer, [r.context_layer for r in rest]),
+        "project_metadata": _fill(primary.project_metadata, [r.project_metadata for r in rest]),
+        "technical_data": technical_data,
+        "specifications": _unique(s for r in results for s in r.specifications),
+        "standards": _unique(s for r in results for s in r.standards),
+        "regional_codes": _unique(c for r in results for c in r.regional_codes),
+        "annotations": _unique(a for r in results for a in r.annotations),
+        "views_included": _unique(v for r in results for v in r.views_included),
+        "revisions": _unique(rev for r in results for rev in r.revisions),
+        "confidence_score": sum(scores) / len(scores) if scores else None,
+        "notes": "\n".join(notes) if notes else None,
+        "warnings": _unique(w for r in results for w in r.warnings),
+    })
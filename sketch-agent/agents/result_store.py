@@ -0,0 +1,339 @@
+"""Indexed local store of analysis results, queryable across a project's sheets.
+
+Analysis output otherwise exists only as JSON on stdout, and answering
+"where is C40 concrete specified?" or "which sheets give the grid spacing?"
+means re-walking every ``SketchAnalysisResult``. Here each result is broken
+into facts as it is produced:
+
+    dimension      technical_data.dimensions
+    material       technical_data.materials
+    component      technical_data.components
+    standard       standards
+    regional_code  regional_codes
+    specification  specifications
+
+keyed by project and sheet, with the searchable text of each fact in an
+FTS5 index and dimension values normalized to millimetres in a B-tree
+index. Re-analyzing a sheet replaces its facts.
+
+The project comes from ``store_project`` (set from ``--project``, a batch
+manifest's ``"project"`` or a server request's ``"project"``), else from the
+title block's project number or title. The sheet is the result's
+``sketch_id`` (file stem, ``-pN`` for PDF pages).
+
+The store is one SQLite file (WAL mode, ``SKETCH_STORE_DIR``, default
+``sketch-agent/.cache``) shared by the CLI and server processes. It is fed
+as a telemetry sink of ``SketchAgent``; ``main_standalone.py query`` and the
+server's ``query`` op read it.
+"""
+
+import contextvars
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .types import SketchAnalysisResult
+
+
+DEFAULT_STORE_DIR = Path(__file__).parent.parent / ".cache"
+DEFAULT_QUERY_LIMIT = 100
+
+FACT_KINDS = ("dimension", "material", "component", "standard", "regional_code", "specification")
+
+# Dimension values within this many millimetres of a queried value match
+VALUE_TOLERANCE_MM = 0.5
+
+# Project the current analysis is indexed under (None: read it from the title block)
+store_project: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("store_project", default=None)
+
+_MM_PER_UNIT = {
+    "mm": 1.0, "millimeter": 1.0, "millimetre": 1.0,
+    "cm": 10.0, "centimeter": 10.0, "centimetre": 10.0,
+    "m": 1000.0, "meter": 1000.0, "metre": 1000.0,
+    "km": 1_000_000.0,
+    "in": 25.4, "inch": 25.4, "inches": 25.4, '"': 25.4,
+    "ft": 304.8, "foot": 304.8, "feet": 304.8, "'": 304.8,
+}
+
+
+def to_millimetres(value: Optional[float], unit: Optional[str]) -> Optional[float]:
+    """Length in mm, or None for a missing value or a unit that is not a length."""
+    if value is None or not unit:
+        return None
+    unit = unit.strip().lower().rstrip(".")
+    factor = _MM_PER_UNIT.get(unit) or _MM_PER_UNIT.get(unit.rstrip("s"))
+    return value * factor if factor else None
+
+
+def _text(*parts) -> str:
+    return " ".join(str(part) for part in parts if part not in (None, "", []))
+
+
+def _facts(result: SketchAnalysisResult) -> Iterator[tuple]:
+    """(kind, value, unit, value_mm, text, item) for each fact of a result."""
+    technical = result.technical_data
+    if technical is not None:
+        for dimension in technical.dimensions:
+            yield (
+                "dimension", dimension.value, dimension.unit,
+                to_millimetres(dimension.value, dimension.unit),
+                _text(dimension.label, dimension.location, " ".join(dimension.views), dimension.derived_from),
+                dimension.model_dump(exclude_none=True)
+            )
+        for material in technical.materials:
+            yield (
+                "material", material.quantity, material.unit, None,
+                _text(material.component, material.spec, material.grade, material.standard,
+                      material.location, material.finish, material.color),
+                material.model_dump(exclude_none=True)
+            )
+        for component in technical.components:
+            yield (
+                "component", component.count, None, None,
+                _text(component.type, component.description, component.size, component.material,
+                      component.location, component.connection_type),
+                component.model_dump(exclude_none=True)
+            )
+    for kind, codes in (("standard", result.standards), ("regional_code", result.regional_codes)):
+        for code in codes:
+            yield kind, None, None, None, code, {"code": code}
+    for specification in result.specifications:
+        yield "specification", None, None, None, specification, {"text": specification}
+
+
+def _match_expression(text: str) -> str:
+    """FTS5 query matching every word of ``text``; a trailing ``*`` keeps a prefix search."""
+    terms = re.findall(r"\w+\*?", text)
+    return " ".join(f'"{term.rstrip("*")}"' + ("*" if term.endswith("*") else "") for term in terms)
+
+
+class ResultStore:
+    """SQLite/FTS5 index of the facts in analysis results, by project and sheet."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """Initialize the store.
+
+        Args:
+            directory: Directory for the store database. If None, uses
+                       SKETCH_STORE_DIR env var (defaults to sketch-agent/.cache)
+        """
+        self.directory = Path(directory or os.getenv("SKETCH_STORE_DIR") or DEFAULT_STORE_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "store.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sheets (
+                id INTEGER PRIMARY KEY,
+                project TEXT NOT NULL,
+                sheet TEXT NOT NULL,
+                drawing_number TEXT,
+                revision TEXT,
+                document_type TEXT,
+                indexed_at REAL NOT NULL,
+                UNIQUE (project, sheet)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS facts (
+                id INTEGER PRIMARY KEY,
+                sheet_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                value REAL,
+                unit TEXT,
+                value_mm REAL,
+                text TEXT NOT NULL,
+                item TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS facts_sheet_kind ON facts (sheet_id, kind)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS facts_kind_value ON facts (kind, value_mm)")
+        try:
+            # External content: the index holds only tokens, the text stays in facts
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5("
+                "text, content='facts', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS facts_insert AFTER INSERT ON facts BEGIN "
+                "INSERT INTO facts_fts (rowid, text) VALUES (new.id, new.text); END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS facts_delete AFTER DELETE ON facts BEGIN "
+                "INSERT INTO facts_fts (facts_fts, rowid, text) VALUES ('delete', old.id, old.text); END"
+            )
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: text queries fall back to scanning
+            self.full_text = False
+
+    def put(self, result: SketchAnalysisResult, project: Optional[str] = None) -> int:
+        """Index ``result``'s facts, replacing the sheet's earlier ones; returns the fact count."""
+        if not result.sketch_id:
+            return 0
+        metadata = result.project_metadata
+        if project is None and metadata is not None:
+            project = metadata.project_number or metadata.project_title
+        facts = [
+            (kind, value, unit, value_mm, text, json.dumps(item, ensure_ascii=False))
+            for kind, value, unit, value_mm, text, item in _facts(result)
+            if text
+        ]
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO sheets (project, sheet, drawing_number, revision, document_type, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (project, sheet) DO UPDATE SET drawing_number = excluded.drawing_number, "
+                    "revision = excluded.revision, document_type = excluded.document_type, "
+                    "indexed_at = excluded.indexed_at",
+                    (
+                        project or "",
+                        result.sketch_id,
+                        metadata.drawing_number if metadata else None,
+                        metadata.revision if metadata else None,
+                        result.context_layer.document_type if result.context_layer else None,
+                        time.time()
+                    )
+                )
+                sheet_id = self._conn.execute(
+                    "SELECT id FROM sheets WHERE project = ? AND sheet = ?",
+                    (project or "", result.sketch_id)
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM facts WHERE sheet_id = ?", (sheet_id,))
+                self._conn.executemany(
+                    "INSERT INTO facts (sheet_id, kind, value, unit, value_mm, text, item) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(sheet_id, *fact) for fact in facts]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(facts)
+
+    def __call__(self, meter, result: Optional[SketchAnalysisResult], error: Optional[BaseException]) -> None:
+        """Telemetry sink: index every finished analysis."""
+        if result is not None:
+            self.put(result, store_project.get())
+
+    def query(
+        self,
+        text: Optional[str] = None,
+        kind: Optional[str] = None,
+        project: Optional[str] = None,
+        sheet: Optional[str] = None,
+        value: Optional[float] = None,
+        unit: Optional[str] = None,
+        limit: int = DEFAULT_QUERY_LIMIT
+    ) -> list[dict]:
+        """Facts matching every given filter, by project and sheet.
+
+        Args:
+            text: Words that must all appear in the fact (label, spec, grade,
+                  location, ...), e.g. "C40 concrete"; ``word*`` for a prefix
+            kind: One of FACT_KINDS
+            project: Project key the sheets were indexed under
+            sheet: Sheet id (sketch_id)
+            value: Dimension value (quantity or count for other kinds)
+            unit: Unit of ``value``; lengths match any unit within
+                  VALUE_TOLERANCE_MM, e.g. 3.6 m finds 3600 mm
+            limit: Maximum number of facts returned
+        """
+        if kind is not None and kind not in FACT_KINDS:
+            raise ValueError(f"Unknown kind '{kind}' (expected one of: {', '.join(FACT_KINDS)})")
+
+        where = []
+        params: list = []
+        if text and _match_expression(text):
+            if self.full_text:
+                # As a subquery the matching rowids are collected once; joined to
+                # facts_fts instead, SQLite re-runs the match per candidate row
+                where.append("f.id IN (SELECT rowid FROM facts_fts WHERE facts_fts MATCH ?)")
+                params.append(_match_expression(text))
+            else:
+                for term in re.findall(r"\w+", text):
+                    where.append("f.text LIKE ?")
+                    params.append(f"%{term}%")
+        if kind is not None:
+            # With a project or sheet, drive the query from that sheet's facts: the
+            # unary + keeps SQLite from scanning every fact of the kind instead
+            where.append("+f.kind = ?" if project is not None or sheet is not None else "f.kind = ?")
+            params.append(kind)
+        if project is not None:
+            where.append("s.project = ?")
+            params.append(project)
+        if sheet is not None:
+            where.append("s.sheet = ?")
+            params.append(sheet)
+        if value is not None:
+            value_mm = to_millimetres(value, unit)
+            if value_mm is not None:
+                where.append("f.value_mm BETWEEN ? AND ?")
+                params.extend((value_mm - VALUE_TOLERANCE_MM, value_mm + VALUE_TOLERANCE_MM))
+            else:
+                where.append("ABS(f.value - ?) < 1e-9")
+                params.append(value)
+                if unit:
+                    where.append("LOWER(f.unit) = LOWER(?)")
+                    params.append(unit)
+
+        sql = (
+            "SELECT s.project, s.sheet, s.drawing_number, s.revision, f.kind, f.item "
+            "FROM facts f JOIN sheets s ON s.id = f.sheet_id"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY s.project, s.sheet, f.id LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit)).fetchall()
+        return [
+            {
+                "project": project,
+                "sheet": sheet,
+                "drawing_number": drawing_number,
+                "revision": revision,
+                "kind": kind,
+                "item": json.loads(item),
+            }
+            for project, sheet, drawing_number, revision, kind, item in rows
+        ]
+
+    def projects(self) -> list[dict]:
+        """Indexed projects with their sheet and fact counts."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.project, COUNT(DISTINCT s.id), COUNT(f.id), MAX(s.indexed_at) "
+                "FROM sheets s LEFT JOIN facts f ON f.sheet_id = s.id GROUP BY s.project ORDER BY s.project"
+            ).fetchall()
+        return [
+            {"project": project, "sheets": sheets, "facts": facts, "indexed_at": indexed_at}
+            for project, sheets, facts, indexed_at in rows
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            sheets, projects = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT project) FROM sheets"
+            ).fetchone()
+            facts = self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+        return {"projects": projects, "sheets": sheets, "facts": facts, "full_text": self.full_text}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
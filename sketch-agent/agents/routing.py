@@ -0,0 +1,378 @@
+"""Multi-provider routing with hedged requests and circuit breakers.
+
+``RoutingVisionModel`` implements ``VisionModelProtocol`` over several
+provider instances. For each request it:
+
+1. Ranks the providers whose circuit breaker admits traffic by their
+   rolling p95 latency, penalized by recent error rate (providers without
+   samples yet are tried in configured order).
+2. Sends the request to the best one.
+3. If no answer has arrived after the hedge delay (fixed, or the primary's
+   own p95), fires the same request at the next provider; the first success
+   wins and the other request is cancelled.
+4. On failure, fails over to the next provider until one succeeds.
+
+A provider whose breaker trips after consecutive failures gets no traffic
+for a cooldown period, then a single half-open probe decides whether it
+closes again.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+from PIL import Image
+
+
+DEFAULT_ROUTER_PROVIDERS = "openai,anthropic,gemini"
+DEFAULT_HEDGE_DELAY = 45.0
+MIN_LATENCY_SAMPLES = 5
+ERROR_RATE_PENALTY = 4.0
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe -> closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def available(self) -> bool:
+        """Whether a request may be sent now (without claiming the probe)."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.cooldown
+        return not self._probe_in_flight
+
+    def acquire(self) -> bool:
+        """Claim permission to send; in half-open state only one probe passes."""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a claimed probe without an outcome (e.g. cancelled hedge)."""
+        self._probe_in_flight = False
+
+
+class ProviderHealth:
+    """Rolling latency and error statistics for one provider."""
+
+    def __init__(self, window: int = 100):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        self.outcomes.append(success)
+        if success and latency is not None:
+            self.latencies.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class RoutingVisionModel:
+    """Vision model that routes, hedges and fails over across providers."""
+
+    def __init__(
+        self,
+        models: Optional[dict[str, Any]] = None,
+        hedge_delay: Optional[str] = None,
+        failure_threshold: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        model: Optional[str] = None
+    ):
+        """Initialize the router.
+
+        Args:
+            models: Provider name -> vision model instance, in preference order.
+                    If None, built from VISION_ROUTER_PROVIDERS (or ``model``)
+                    and VISION_ROUTER_MODELS env vars, skipping providers
+                    without an API key
+            hedge_delay: Seconds before hedging to a second provider, "p95" to
+                         use the primary's rolling p95, or "off". If None, uses
+                         VISION_HEDGE_DELAY env var (default "p95")
+            failure_threshold: Consecutive failures that open a breaker (default 3)
+            cooldown: Seconds an open breaker waits before a half-open probe (default 60)
+            model: Comma-separated provider list; lets VISION_MODEL select the
+                   routed providers when VISION_PROVIDER=router
+        """
+        if models is None:
+            models = self._models_from_env(model)
+        if not models:
+            raise ValueError("Router has no usable providers (check API keys and VISION_ROUTER_PROVIDERS)")
+
+        self.models = models
+        self.hedge_delay = (hedge_delay or os.getenv("VISION_HEDGE_DELAY", "p95")).lower()
+
+        failure_threshold = failure_threshold or int(os.getenv("VISION_BREAKER_FAILURES", "3"))
+        cooldown = cooldown or float(os.getenv("VISION_BREAKER_COOLDOWN", "60"))
+        self.breakers = {name: CircuitBreaker(failure_threshold, cooldown) for name in models}
+        self.health = {name: ProviderHealth() for name in models}
+        self.wins = {name: 0 for name in models}
+        self.hedges = 0
+
+        # Used in result cache keys; names every routed provider/model pair
+        self.model_name = "router:" + ",".join(
+            f"{name}/{getattr(m, 'model_name', None) or getattr(m, 'model', '')}"
+            for name, m in models.items()
+        )
+
+    @property
+    def structured_output(self) -> bool:
+        # Members without schema support ignore it and answer free-form
+        return any(getattr(model, "structured_output", False) for model in self.models.values())
+
+    def _structured_options(self, name: str, schema: Optional[dict]) -> dict:
+        """Forward ``schema`` only to members that support it."""
+        if schema and getattr(self.models[name], "structured_output", False):
+            return {"schema": schema}
+        return {}
+
+    @staticmethod
+    def _models_from_env(provider_list: Optional[str]) -> dict[str, Any]:
+        from .vision_providers import VisionModelFactory
+
+        names = provider_list or os.getenv("VISION_ROUTER_PROVIDERS", DEFAULT_ROUTER_PROVIDERS)
+        overrides = {}
+        for pair in os.getenv("VISION_ROUTER_MODELS", "").split(","):
+            if "=" in pair:
+                name, model_name = pair.split("=", 1)
+                overrides[name.strip().lower()] = model_name.strip()
+
+        models = {}
+        for name in (n.strip().lower() for n in names.split(",")):
+            if not name or name == "router":
+                continue
+            try:
+                models[name] = VisionModelFactory.create(name, overrides.get(name))
+            except ValueError:
+                # Missing API key - leave this provider out of the pool
+                continue
+        return models
+
+    def _score(self, name: str) -> float:
+        health = self.health[name]
+        p95 = health.percentile(95)
+        if p95 is None:
+            # Unmeasured providers sort first (in configured order) so they
+            # get explored and acquire latency samples
+            return -1.0
+        return p95 * (1 + ERROR_RATE_PENALTY * health.error_rate)
+
+    def ranked(self) -> list[str]:
+        """Providers currently admitting traffic, best first."""
+        order = list(self.models)
+        available = [name for name in order if self.breakers[name].available()]
+        return sorted(available, key=lambda name: (self._score(name), order.index(name)))
+
+    def _hedge_after(self, name: str) -> Optional[float]:
+        if self.hedge_delay in ("off", "none", "0"):
+            return None
+        if self.hedge_delay == "p95":
+            return self.health[name].percentile(95) or DEFAULT_HEDGE_DELAY
+        return float(self.hedge_delay)
+
+    async def _call(
+        self,
+        name: str,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system: Optional[str],
+        schema: Optional[dict]
+    ) -> str:
+        """Call one provider, recording latency and outcome."""
+        breaker = self.breakers[name]
+        start = time.monotonic()
+        try:
+            response = await self.models[name].analyze_image(
+                image=image,
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system,
+                **self._structured_options(name, schema)
+            )
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            self.health[name].record(False)
+            raise
+
+        breaker.record_success()
+        self.health[name].record(True, time.monotonic() - start)
+        return response
+
+    async def analyze_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> str:
+        candidates = self.ranked()
+        running: dict[asyncio.Task, str] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> bool:
+            while candidates:
+                name = candidates.pop(0)
+                if self.breakers[name].acquire():
+                    task = asyncio.create_task(self._call(name, image, prompt, max_tokens, temperature, system, schema))
+                    running[task] = name
+                    return True
+            return False
+
+        if not launch():
+            raise Exception("All vision providers are unavailable (circuit breakers open)")
+
+        hedged = False
+        try:
+            while running:
+                timeout = None
+                if not hedged and candidates and len(running) == 1:
+                    timeout = self._hedge_after(next(iter(running.values())))
+
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Primary is slow: hedge with the next provider
+                    hedged = True
+                    if launch():
+                        self.hedges += 1
+                    continue
+
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is None:
+                        self.wins[name] += 1
+                        return task.result()
+                    last_error = task.exception()
+
+                # Fail over if nothing else is still in flight
+                if not running:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise Exception(f"All vision providers failed; last error: {last_error}")
+
+    async def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        """Stream from the best provider, failing over only before the first chunk.
+
+        Streams are not hedged: once text has been forwarded, switching
+        providers would interleave two different responses.
+        """
+        last_error: Optional[BaseException] = None
+        for name in self.ranked():
+            breaker = self.breakers[name]
+            if not breaker.acquire():
+                continue
+
+            start = time.monotonic()
+            started = False
+            try:
+                async for chunk in self.models[name].stream_image(
+                    image=image,
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system,
+                    **self._structured_options(name, schema)
+                ):
+                    started = True
+                    yield chunk
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                self.health[name].record(False)
+                if started:
+                    raise
+                last_error = e
+                continue
+
+            breaker.record_success()
+            self.health[name].record(True, time.monotonic() - start)
+            self.wins[name] += 1
+            return
+
+        raise Exception(f"All vision providers failed; last error: {last_error}")
+
+    def stats(self) -> dict:
+        """Per-provider routing statistics."""
+        return {
+            "hedges": self.hedges,
+            "providers": {
+                name: {
+                    "state": self.breakers[name].state,
+                    "p50_s": _round(self.health[name].percentile(50)),
+                    "p95_s": _round(self.health[name].percentile(95)),
+                    "error_rate": round(self.health[name].error_rate, 3),
+                    "wins": self.wins[name],
+                }
+                for name in self.models
+            }
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
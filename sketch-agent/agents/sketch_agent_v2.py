@@ -1,17 +1,76 @@
 """Main sketch analysis agent for construction drawings."""
 
+import asyncio
+import contextlib
 import json
 import time
 import os
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Callable, Iterable, Optional
 from PIL import Image
+from pydantic import ValidationError
 
 from .types import (
     SketchMetadata,
-    SketchAnalysisResult
+    SketchAnalysisResult,
+    BatchItem,
+    BatchResult,
+    AnalysisEvent,
+    PageText
 )
-from .vision_providers import VisionModelFactory, VisionModelProtocol
+from .vision_providers import VisionModelFactory, VisionModelProtocol, prewarm_connections
+from .result_cache import ResultCache, hash_image_pixels
+from .result_store import ResultStore
+from .image_preprocessing import (
+    ImageBudget,
+    PreparedImage,
+    Tile,
+    budget_for,
+    fit_scale,
+    load_image,
+    prepare_image_async
+)
+from .memory_budget import MemoryBudget, image_memory
+from .result_merge import merge_results
+from .pdf_source import DEFAULT_PDF_DPI, iter_pdf_pages
+from .pdf_text import (
+    TEXT_LAYER_DETAIL,
+    TextLayerStats,
+    apply_text_layer,
+    assists,
+    text_layer_facts,
+    text_page_result,
+    text_prompt
+)
+from .json_stream import IncrementalJSONParser
+from .json_extract import JSONExtractionError, extract_json, loads
+from .structured_output import analysis_schema
+from .rate_limiter import PRIORITY_BATCH, estimate_image_tokens, estimate_request_tokens, request_priority
+from .region_cache import (
+    REGION_FIELDS,
+    RegionCache,
+    RegionPlan,
+    fingerprint_title_region,
+    reusable_fields,
+    same_content
+)
+from .cascade import CascadePolicy, CascadeStats, parse_triage_spec, triage_target
+from .telemetry import TelemetryMeter, adopt_telemetry, current_meter, stage, start_telemetry
+
+
+DEFAULT_BATCH_CONCURRENCY = 8
+
+
+def _strip_fence(text: str) -> str:
+    """Drop a code fence a model put around a continuation anyway."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+    if text.endswith("```"):
+        text = text[:-3]
+    return text
+
+TelemetrySink = Callable[[TelemetryMeter, Optional[SketchAnalysisResult], Optional[BaseException]], None]
 
 
 class SketchAgent:
@@ -22,10 +81,26 @@ class SketchAgent:
     with GCC building standards.
     """
 
+    MAX_TOKENS = 8000
+    TEMPERATURE = 0.1
+    # Continuation requests allowed when a response is cut off unrecoverably
+    JSON_CONTINUATIONS = int(os.getenv("SKETCH_JSON_CONTINUATIONS", "1"))
+
     def __init__(
         self,
         provider: Optional[str] = None,
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        cache: Optional[ResultCache] = None,
+        use_cache: Optional[bool] = None,
+        refresh_cache: bool = False,
+        tiling: Optional[bool] = None,
+        region_cache: Optional[RegionCache] = None,
+        use_region_cache: Optional[bool] = None,
+        structured_output: Optional[bool] = None,
+        cascade: Optional[str] = None,
+        result_store: Optional[ResultStore] = None,
+        use_result_store: Optional[bool] = None,
+        memory_budget: Optional[MemoryBudget] = None
     ):
         """Initialize sketch agent.
 
@@ -33,6 +108,26 @@ class SketchAgent:
             provider: Vision provider (openai, anthropic, gemini, deepseek, qwen)
                      If None, uses VISION_PROVIDER env var (defaults to 'openai' for better quality)
             model_name: Optional model override. If None, uses VISION_MODEL env var
+            cache: Optional result cache instance (a default on-disk cache is used otherwise)
+            use_cache: Enable the result cache. If None, uses SKETCH_CACHE_ENABLED env var (default on)
+            refresh_cache: Skip cache lookups but still store fresh results
+            tiling: Split very large sheets into overlapping tiles analyzed concurrently.
+                    If None, uses SKETCH_TILING env var (default off)
+            region_cache: Optional title region cache instance
+            use_region_cache: Reuse title blocks already read on other sheets of a set.
+                              If None, uses SKETCH_REGION_CACHE env var (default off)
+            structured_output: Constrain answers to the result schema on providers that
+                               support it. If None, uses SKETCH_STRUCTURED_OUTPUT env var (default off)
+            cascade: Analyze each sheet with a cheap triage model first and rerun only
+                     complex or low-confidence ones on the main model: "on" for each
+                     provider's default triage model, "provider[:model]" to pin one, or
+                     "off". If None, uses SKETCH_CASCADE env var (default off)
+            result_store: Optional result store instance
+            use_result_store: Index every result's dimensions, materials, components and
+                              codes for queries across sheets. If None, uses
+                              SKETCH_STORE_ENABLED env var (default on)
+            memory_budget: Admission control for sheets in flight by estimated memory.
+                           If None, uses SKETCH_MEMORY_BUDGET_MB env var (default no limit)
         """
         # Determine provider
         self.provider = provider or os.getenv("VISION_PROVIDER", "openai")
@@ -52,9 +147,60 @@ class SketchAgent:
                 f"Make sure the API key is set in environment variables."
             )
 
+        # Additional providers requested per batch item, created on demand
+        self._extra_vision_models: dict[str, VisionModelProtocol] = {}
+
         # Load system prompt
         self.system_prompt = self._load_system_prompt()
 
+        # Result cache
+        if use_cache is None:
+            use_cache = os.getenv("SKETCH_CACHE_ENABLED", "1") != "0"
+        self.cache = (cache or ResultCache()) if use_cache else None
+        self.refresh_cache = refresh_cache
+
+        if tiling is None:
+            tiling = os.getenv("SKETCH_TILING", "off").lower() in ("1", "on", "auto", "true")
+        self.tiling = tiling
+
+        if use_region_cache is None:
+            use_region_cache = os.getenv("SKETCH_REGION_CACHE", "0").lower() in ("1", "on", "true")
+        self.region_cache = (region_cache or RegionCache()) if use_region_cache else None
+
+        if structured_output is None:
+            structured_output = os.getenv("SKETCH_STRUCTURED_OUTPUT", "0").lower() in ("1", "on", "true")
+        self.structured_output = structured_output
+
+        if cascade is None:
+            cascade = os.getenv("SKETCH_CASCADE", "off")
+        self.cascade_spec = parse_triage_spec(cascade)
+        self.cascade = CascadePolicy.from_env() if self.cascade_spec is not None else None
+        self.cascade_stats = CascadeStats()
+        # Provider -> triage model (None if it has no cheaper tier), created on demand
+        self._triage_models: dict[str, Optional[VisionModelProtocol]] = {}
+        if self.cascade is not None:
+            # A bad spec fails here rather than leaving the cascade off unnoticed
+            try:
+                self._get_triage_model(self.provider.lower())
+            except ValueError as e:
+                raise ValueError(f"Failed to initialize cascade triage model '{cascade}': {e}")
+
+        # PDF pages answered from, or helped by, their text layer
+        self.text_layer_stats = TextLayerStats()
+
+        # Called with (meter, result, error) after every analysis; see services/metrics.py
+        self.telemetry_sinks: list[TelemetrySink] = []
+
+        # Indexed facts of every result, queryable by project; see agents/result_store.py
+        if use_result_store is None:
+            use_result_store = os.getenv("SKETCH_STORE_ENABLED", "1") != "0"
+        self.result_store = (result_store or ResultStore()) if use_result_store else None
+        if self.result_store is not None:
+            self.telemetry_sinks.append(self.result_store)
+
+        # Per-worker memory budget checked before each sheet is loaded; see agents/memory_budget.py
+        self.memory_budget = memory_budget or MemoryBudget.from_env()
+
     def _load_system_prompt(self) -> str:
         """Load system prompt from file."""
         prompt_path = Path(__file__).parent.parent / "prompts" / "sketch_analysis_system.md"
@@ -64,11 +210,44 @@ class SketchAgent:
 
         return prompt_path.read_text(encoding="utf-8")
 
+    def _get_vision_model(self, provider: Optional[str] = None) -> VisionModelProtocol:
+        """Return the vision model for a provider, defaulting to the agent's own."""
+        if not provider or provider.lower() == self.provider.lower():
+            return self.vision_model
+
+        provider = provider.lower()
+        if provider not in self._extra_vision_models:
+            self._extra_vision_models[provider] = VisionModelFactory.create(provider)
+        return self._extra_vision_models[provider]
+
+    def load_budget(self, provider: Optional[str] = None) -> Optional[ImageBudget]:
+        """Resolution sheets for ``provider`` are loaded at; None loads them at full resolution.
+
+        Tiles and title region crops read the sheet's native detail, so with
+        tiling or the region cache on, nothing is reduced at load time.
+        """
+        if self.tiling or self.region_cache is not None:
+            return None
+        return budget_for(provider or self.provider)
+
+    async def prewarm(self) -> int:
+        """Open provider connections before the first drawing arrives.
+
+        Returns the number of connections opened; failures are ignored, the
+        first analysis then simply connects itself.
+        """
+        try:
+            return await prewarm_connections(self.vision_model)
+        except Exception:
+            return 0
+
     async def analyze_sketch(
         self,
         image: Image.Image,
         metadata: SketchMetadata,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        provider: Optional[str] = None,
+        text_layer: Optional[PageText] = None
     ) -> SketchAnalysisResult:
         """Analyze a construction drawing/sketch.
 
@@ -76,6 +255,10 @@ class SketchAgent:
             image: PIL Image object
             metadata: Sketch metadata (ID, filename, dimensions)
             context: Optional context about the project (e.g., "G+3 residential Dubai")
+            provider: Optional provider override (defaults to the agent's provider)
+            text_layer: Text layer of a vector PDF page. Its text is given to the
+                        model, the image is sent at reduced detail, and title block
+                        values, notes and dimension strings from it take precedence
 
         Returns:
             Structured analysis result with dimensions, materials, specs, etc.
@@ -85,86 +268,1023 @@ class SketchAgent:
             Exception: If analysis fails
         """
         start_time = time.time()
+        provider = (provider or self.provider).lower()
+        vision_model = self._get_vision_model(provider)
+        meter = self._begin_telemetry(provider, vision_model, metadata)
 
-        # Build analysis prompt
-        analysis_prompt = self._build_analysis_prompt(metadata, context)
+        if not assists(text_layer):
+            text_layer = None
 
-        # Call vision model
         try:
-            response = await self.vision_model.analyze_image(
+            # Serve repeated drawings from the result cache
+            cache_key, cached = await self._lookup_cache(
+                image, provider, vision_model, context, metadata, start_time, text_layer
+            )
+            if cached is not None:
+                return self._finish(meter, cached)
+
+            facts = None
+            if text_layer is not None:
+                with meter.stage("text_layer"):
+                    facts = text_layer_facts(text_layer)
+
+            # Leave out a title block already read on another sheet of the set
+            plan = await self._plan_regions(image, provider, vision_model)
+
+            # Size the image to what the provider actually feeds the model; with
+            # the text layer in hand, small print need not be legible, so less
+            with meter.stage("preprocess"):
+                prepared = await prepare_image_async(
+                    plan.image if plan else image,
+                    provider,
+                    tiling=self.tiling and facts is None,
+                    detail=TEXT_LAYER_DETAIL if facts is not None else 1.0
+                )
+            # Only the prepared images are sent: a caller that handed over its
+            # last reference to the sheet has it freed during the request
+            del image
+            if plan:
+                plan.image = None
+
+            if prepared.tiles:
+                result = await self._analyze_tiled(vision_model, prepared, metadata, context)
+                result = result.model_copy(update={
+                    "sketch_id": metadata.sketch_id,
+                    "processing_time": time.time() - start_time
+                })
+            else:
+                # Build analysis prompt
+                analysis_prompt = self._build_analysis_prompt(
+                    metadata,
+                    context,
+                    regions=plan.prompt_note if plan else None,
+                    text_layer=text_prompt(text_layer, facts) if facts is not None else None
+                )
+
+                # Call vision model (after the triage model, in cascade mode) and validate its JSON response
+                result = await self._request_cascaded(provider, vision_model, prepared.overview, analysis_prompt)
+                if facts is not None:
+                    result = apply_text_layer(result, facts)
+                    self.text_layer_stats.record(
+                        "assisted", self._detail_tokens_saved(provider, prepared.original_size)
+                    )
+
+                # Add metadata
+                result = result.model_copy(update={
+                    "sketch_id": metadata.sketch_id,
+                    "processing_time": time.time() - start_time
+                })
+                if plan:
+                    result = self._apply_regions(result, plan)
+
+            result = self._finish(meter, result)
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+        except Exception as e:
+            self._emit_telemetry(meter, None, e)
+            raise
+
+        return result
+
+    async def analyze_text_page(
+        self,
+        page_text: PageText,
+        metadata: SketchMetadata,
+        provider: Optional[str] = None
+    ) -> SketchAnalysisResult:
+        """Answer a text-only PDF page (specification, schedule) from its text layer.
+
+        No image and no vision request: the result carries the page's title
+        block fields, its text as ``specifications`` and any dimension
+        strings. ``provider`` only sizes the estimate of tokens saved.
+        """
+        start_time = time.time()
+        provider = (provider or self.provider).lower()
+        meter = self._begin_telemetry(provider, self._get_vision_model(provider), metadata)
+        meter.model = "pdf-text-layer"
+
+        try:
+            with meter.stage("text_layer"):
+                result = text_page_result(page_text)
+            result = result.model_copy(update={
+                "sketch_id": metadata.sketch_id,
+                "processing_time": time.time() - start_time
+            })
+            self.text_layer_stats.record("text_only", self._text_page_tokens_saved(provider, metadata))
+            return self._finish(meter, result)
+        except Exception as e:
+            self._emit_telemetry(meter, None, e)
+            raise
+
+    def _detail_tokens_saved(self, provider: str, size: tuple[int, int]) -> int:
+        """Image tokens saved by sending a sheet at ``TEXT_LAYER_DETAIL``."""
+        def image_tokens(detail: float) -> int:
+            scale = fit_scale(size, budget_for(provider, detail))
+            return estimate_image_tokens(provider, (round(size[0] * scale), round(size[1] * scale)))
+
+        return image_tokens(1.0) - image_tokens(TEXT_LAYER_DETAIL)
+
+    def _text_page_tokens_saved(self, provider: str, metadata: SketchMetadata) -> int:
+        """Input tokens the vision request for a text-only page would have cost."""
+        size = metadata.dimensions
+        scale = fit_scale(size, budget_for(provider))
+        return estimate_request_tokens(
+            provider,
+            (round(size[0] * scale), round(size[1] * scale)),
+            self._build_analysis_prompt(metadata, None),
+            0,
+            self.system_prompt
+        )
+
+    async def analyze_sketch_stream(
+        self,
+        image: Image.Image,
+        metadata: SketchMetadata,
+        context: Optional[str] = None,
+        provider: Optional[str] = None
+    ) -> AsyncIterator[AnalysisEvent]:
+        """Analyze a drawing, yielding top-level sections as they stream in.
+
+        Each section of the response (``project_metadata``, ``context_layer``,
+        ``technical_data``, ...) is yielded as a ``section`` event as soon as
+        its JSON closes; the validated result follows as a final ``result``
+        event. Cache hits, tiled sheets and sheets whose cascade triage answer
+        is kept yield only the ``result`` event; escalated sheets stream the
+        main model's answer.
+
+        Args:
+            image: PIL Image object
+            metadata: Sketch metadata (ID, filename, dimensions)
+            context: Optional context about the project
+            provider: Optional provider override (defaults to the agent's provider)
+
+        Yields:
+            AnalysisEvent objects
+
+        Raises:
+            ValueError: If vision model returns invalid JSON
+            Exception: If analysis fails
+        """
+        start_time = time.time()
+        provider = (provider or self.provider).lower()
+        vision_model = self._get_vision_model(provider)
+        meter = self._begin_telemetry(provider, vision_model, metadata)
+
+        try:
+            cache_key, cached = await self._lookup_cache(image, provider, vision_model, context, metadata, start_time)
+            if cached is not None:
+                yield AnalysisEvent(event="result", result=self._finish(meter, cached), elapsed=time.time() - start_time)
+                return
+
+            plan = await self._plan_regions(image, provider, vision_model)
+            with meter.stage("preprocess"):
+                prepared = await prepare_image_async(plan.image if plan else image, provider, tiling=self.tiling)
+            del image
+            if plan:
+                plan.image = None
+
+            if prepared.tiles:
+                result = await self._analyze_tiled(vision_model, prepared, metadata, context)
+                result = self._finish(meter, result.model_copy(update={
+                    "sketch_id": metadata.sketch_id,
+                    "processing_time": time.time() - start_time
+                }))
+                if cache_key is not None:
+                    self.cache.put(cache_key, result)
+                yield AnalysisEvent(event="result", result=result, elapsed=time.time() - start_time)
+                return
+
+            analysis_prompt = self._build_analysis_prompt(
+                metadata, context, regions=plan.prompt_note if plan else None
+            )
+
+            triaged = await self._triage(provider, prepared.overview, analysis_prompt)
+            if triaged is not None:
+                result = triaged.model_copy(update={
+                    "sketch_id": metadata.sketch_id,
+                    "processing_time": time.time() - start_time
+                })
+                if plan:
+                    result = self._apply_regions(result, plan)
+                result = self._finish(meter, result)
+                if cache_key is not None:
+                    self.cache.put(cache_key, result)
+                yield AnalysisEvent(event="result", result=result, elapsed=time.time() - start_time)
+                return
+
+            structured = self._structured_options(vision_model)
+            parser = IncrementalJSONParser()
+
+            try:
+                async for chunk in vision_model.stream_image(
+                    image=prepared.overview,
+                    prompt=analysis_prompt,
+                    max_tokens=self.MAX_TOKENS,
+                    temperature=self.TEMPERATURE,
+                    system=self.system_prompt,
+                    **structured
+                ):
+                    # Incremental parsing is the streaming path's parse stage
+                    with meter.stage("parse"):
+                        sections = parser.feed(chunk)
+                    for section, data in sections:
+                        yield AnalysisEvent(
+                            event="section",
+                            section=section,
+                            data=data,
+                            elapsed=time.time() - start_time
+                        )
+            except Exception as e:
+                raise Exception(f"Vision model analysis failed: {e}")
+
+            result = await self._parse_or_continue(
+                vision_model, prepared.overview, analysis_prompt, parser.text, structured=bool(structured)
+            )
+            result = result.model_copy(update={
+                "sketch_id": metadata.sketch_id,
+                "processing_time": time.time() - start_time
+            })
+            if plan:
+                result = self._apply_regions(result, plan)
+            result = self._finish(meter, result)
+
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+        except Exception as e:
+            self._emit_telemetry(meter, None, e)
+            raise
+
+        yield AnalysisEvent(event="result", result=result, elapsed=time.time() - start_time)
+
+    def _begin_telemetry(
+        self,
+        provider: str,
+        vision_model: VisionModelProtocol,
+        metadata: SketchMetadata
+    ) -> TelemetryMeter:
+        meter = adopt_telemetry()
+        meter.provider = provider
+        meter.model = self._model_label(vision_model)
+        meter.sketch_id = metadata.sketch_id
+        return meter
+
+    def _finish(self, meter: TelemetryMeter, result: SketchAnalysisResult) -> SketchAnalysisResult:
+        """Attach the telemetry block and hand the analysis to the sinks."""
+        meter.cache_hit = result.cache_hit
+        result = result.model_copy(update={"telemetry": meter.snapshot()})
+        self._emit_telemetry(meter, result, None)
+        return result
+
+    def _emit_telemetry(
+        self,
+        meter: TelemetryMeter,
+        result: Optional[SketchAnalysisResult],
+        error: Optional[BaseException]
+    ) -> None:
+        for sink in self.telemetry_sinks:
+            try:
+                sink(meter, result, error)
+            except Exception:
+                # Exporters must never fail an analysis
+                pass
+
+    async def _lookup_cache(
+        self,
+        image: Image.Image,
+        provider: str,
+        vision_model: VisionModelProtocol,
+        context: Optional[str],
+        metadata: SketchMetadata,
+        start_time: float,
+        text_layer: Optional[PageText] = None
+    ) -> tuple[Optional[str], Optional[SketchAnalysisResult]]:
+        """Return the cache key (None if caching is off) and any cached result."""
+        if self.cache is None:
+            return None, None
+
+        with stage("cache"):
+            # Hashing a large sheet's pixels takes most of a second: keep it off the loop
+            cache_key = await asyncio.to_thread(self._cache_key, image, provider, vision_model, context, text_layer)
+            cached = None if self.refresh_cache else self.cache.get(cache_key)
+        if cached is not None:
+            cached = cached.model_copy(update={
+                "sketch_id": metadata.sketch_id,
+                "processing_time": time.time() - start_time,
+                "cache_hit": True
+            })
+        return cache_key, cached
+
+    async def _request_analysis(
+        self,
+        vision_model: VisionModelProtocol,
+        image: Image.Image,
+        prompt: str
+    ) -> SketchAnalysisResult:
+        """Send one image to the vision model and validate its JSON answer."""
+        structured = self._structured_options(vision_model)
+        try:
+            response = await vision_model.analyze_image(
                 image=image,
-                prompt=analysis_prompt,
-                max_tokens=8000,
-                temperature=0.1
+                prompt=prompt,
+                max_tokens=self.MAX_TOKENS,
+                temperature=self.TEMPERATURE,
+                system=self.system_prompt,
+                **structured
             )
         except Exception as e:
             raise Exception(f"Vision model analysis failed: {e}")
 
-        # Parse JSON response
-        result_dict = self._parse_json_response(response)
+        return await self._parse_or_continue(vision_model, image, prompt, response, structured=bool(structured))
+
+    async def _request_cascaded(
+        self,
+        provider: str,
+        vision_model: VisionModelProtocol,
+        image: Image.Image,
+        prompt: str
+    ) -> SketchAnalysisResult:
+        """The triage model's answer if the cascade keeps it, else the main model's."""
+        triaged = await self._triage(provider, image, prompt)
+        if triaged is not None:
+            return triaged
+        return await self._request_analysis(vision_model, image, prompt)
+
+    async def _triage(self, provider: str, image: Image.Image, prompt: str) -> Optional[SketchAnalysisResult]:
+        """Cascade first pass: the triage model's answer if it can be kept, else None.
+
+        Records the outcome in the current meter and ``cascade_stats``. Does
+        nothing (returns None) with the cascade off or without a triage
+        model for ``provider``.
+        """
+        triage_model = self._get_triage_model(provider)
+        if triage_model is None:
+            return None
+
+        result, reason = None, None
+        with stage("triage"):
+            structured = self._structured_options(triage_model)
+            try:
+                response = await triage_model.analyze_image(
+                    image=image,
+                    prompt=prompt,
+                    max_tokens=self.cascade.triage_tokens,
+                    temperature=self.TEMPERATURE,
+                    system=self.system_prompt,
+                    **structured
+                )
+                result = self._parse_result(response, bool(structured))
+                reason = self.cascade.escalation_reason(result)
+            except JSONExtractionError as e:
+                reason = "truncated" if e.truncated else "triage_failed"
+            except Exception:
+                reason = "triage_failed"
+
+        self.cascade_stats.record(reason)
+        meter = current_meter.get()
+        if meter is not None:
+            meter.cascade = "escalated" if reason else "kept"
+            meter.cascade_reason = reason
+            if reason is None:
+                meter.model = self._model_label(triage_model)
+        return None if reason else result
+
+    def _get_triage_model(self, provider: str) -> Optional[VisionModelProtocol]:
+        """Cascade triage model for sheets sent to ``provider`` (None if there is none).
+
+        Raises:
+            ValueError: If the triage model cannot be created (unknown provider, missing API key)
+        """
+        if self.cascade is None:
+            return None
+        if provider not in self._triage_models:
+            target = triage_target(self.cascade_spec, provider)
+            self._triage_models[provider] = VisionModelFactory.create(*target) if target is not None else None
+        return self._triage_models[provider]
+
+    async def _parse_or_continue(
+        self,
+        vision_model: VisionModelProtocol,
+        image: Image.Image,
+        prompt: str,
+        response: str,
+        structured: bool = False
+    ) -> SketchAnalysisResult:
+        """Parse a response; if it was cut off too early to salvage, ask for the rest.
 
-        # Add metadata
-        result_dict["sketch_id"] = metadata.sketch_id
-        result_dict["processing_time"] = time.time() - start_time
+        The continuation request resends the image with the partial answer
+        and asks only for the missing tail, which costs a fraction of
+        re-running the whole analysis. It is sent free-form: a schema would
+        make the model start a new object instead.
+        """
+        try:
+            return self._parse_result(response, structured)
+        except JSONExtractionError as e:
+            if not e.truncated or self.JSON_CONTINUATIONS < 1:
+                raise
 
-        # Validate with Pydantic
         try:
-            result = SketchAnalysisResult(**result_dict)
+            tail = await vision_model.analyze_image(
+                image=image,
+                prompt=self._continuation_prompt(prompt, response),
+                max_tokens=self.MAX_TOKENS,
+                temperature=self.TEMPERATURE,
+                system=self.system_prompt
+            )
+        except Exception as e:
+            raise Exception(f"Vision model continuation failed: {e}")
+
+        with stage("parse"):
+            result = self._parse_json_response(response + _strip_fence(tail))
+        result.setdefault("warnings", [])
+        if isinstance(result["warnings"], list):
+            result["warnings"].append("Model response was cut off; completed with a continuation request")
+        return self._validate_result(result)
+
+    def _parse_result(self, response: str, structured: bool = False) -> SketchAnalysisResult:
+        """Validate a response straight from its JSON text, else extract and repair it first.
+
+        A well-formed object (the usual case, and the rule with structured
+        output) is validated by pydantic-core from the raw text in one pass,
+        without building an intermediate dict tree.
+
+        Raises:
+            JSONExtractionError: If no usable JSON could be extracted
+            ValueError: If the JSON does not match the result schema
+        """
+        start, end = response.find("{"), response.rfind("}") + 1
+        if 0 <= start < end:
+            try:
+                with stage("validate"):
+                    return SketchAnalysisResult.model_validate_json(response[start:end])
+            except ValidationError:
+                # Malformed, truncated or mistyped: take the tolerant path
+                pass
+
+        with stage("parse"):
+            result_dict = self._parse_json_response(response, structured)
+        return self._validate_result(result_dict)
+
+    @staticmethod
+    def _continuation_prompt(prompt: str, partial: str) -> str:
+        return (
+            f"{prompt}\n\n## Continuation\n"
+            "Your previous answer was cut off before the JSON was complete. It ended with:\n\n"
+            f"{partial}\n\n"
+            "Output ONLY the remaining characters of that JSON, starting exactly where it "
+            "stops. Do not repeat anything, and do not add a code fence or commentary."
+        )
+
+    @staticmethod
+    def _validate_result(result_dict: dict) -> SketchAnalysisResult:
+        try:
+            with stage("validate"):
+                return SketchAnalysisResult(**result_dict)
         except Exception as e:
             raise ValueError(f"Failed to validate result: {e}\n\nRaw result: {result_dict}")
 
-        return result
+    async def _analyze_tiled(
+        self,
+        vision_model: VisionModelProtocol,
+        prepared: PreparedImage,
+        metadata: SketchMetadata,
+        context: Optional[str]
+    ) -> SketchAnalysisResult:
+        """Analyze the overview and every tile concurrently, then merge.
+
+        Individual tile failures become warnings; the sheet only fails if
+        every request failed.
+        """
+        requests = [(prepared.overview, self._build_analysis_prompt(metadata, context))]
+        for tile in prepared.tiles:
+            requests.append((tile.image, self._build_analysis_prompt(metadata, context, tile)))
+
+        responses = await asyncio.gather(
+            *(self._request_analysis(vision_model, image, prompt) for image, prompt in requests),
+            return_exceptions=True
+        )
+
+        partials = []
+        warnings = []
+        first_error = None
+        for index, response in enumerate(responses):
+            part = "overview" if index == 0 else f"tile {index}/{len(prepared.tiles)}"
+            try:
+                if isinstance(response, BaseException):
+                    raise response
+                partials.append(response)
+            except Exception as e:
+                first_error = first_error or e
+                warnings.append(f"Analysis of {part} failed: {str(e)[:200]}")
+
+        if not partials:
+            raise first_error
+
+        merged = merge_results(partials)
+        return merged.model_copy(update={
+            "warnings": [
+                *merged.warnings,
+                *warnings,
+                f"Sheet analyzed as overview plus {len(prepared.tiles)} tiles and merged"
+            ]
+        })
+
+    def _structured_options(self, vision_model: VisionModelProtocol) -> dict:
+        """``schema`` keyword constraining the answer, or nothing for a free-form answer.
+
+        Only passed to models that declare ``structured_output``, so custom
+        models without the parameter keep working.
+        """
+        if self.structured_output and getattr(vision_model, "structured_output", False):
+            return {"schema": analysis_schema()}
+        return {}
+
+    @staticmethod
+    def _model_label(vision_model: VisionModelProtocol) -> Optional[str]:
+        model = getattr(vision_model, "model_name", None) or getattr(vision_model, "model", None)
+        return model if isinstance(model, str) else None
+
+    def _cache_key(
+        self,
+        image: Image.Image,
+        provider: str,
+        vision_model: VisionModelProtocol,
+        context: Optional[str],
+        text_layer: Optional[PageText] = None
+    ) -> str:
+        """Build the result cache key for an analysis request."""
+        extra = self._cache_extra()
+        if text_layer is not None:
+            # The text changes the prompt, and the image goes at reduced detail
+            extra["text_layer"] = [[run.text for run in text_layer.runs], TEXT_LAYER_DETAIL]
+        return ResultCache.make_key(
+            image_hash=hash_image_pixels(image),
+            provider=provider.lower(),
+            model=self._model_label(vision_model),
+            system_prompt=self.system_prompt,
+            context=context,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
+            extra=extra or None
+        )
+
+    def _cache_extra(self) -> dict:
+        """Agent options that change the answer for the same image and model."""
+        extra = {}
+        if self.tiling:
+            extra["tiling"] = self.tiling
+        if self.cascade is not None:
+            # Kept triage answers differ from the main model's; thresholds decide which are kept
+            extra["cascade"] = [list(self.cascade_spec), self.cascade.model_dump()]
+        return extra
+
+    async def _plan_regions(
+        self,
+        image: Image.Image,
+        provider: str,
+        vision_model: VisionModelProtocol
+    ) -> Optional[RegionPlan]:
+        """Look the sheet's title region up in the region cache.
+
+        Returns None when the sheet has to be read in full: the region cache
+        is off, the sheet is tiled, it has no ruled title block, its title
+        block is seen for the first time, or reading the region failed.
+        """
+        cache = self.region_cache
+        if cache is None or self.tiling:
+            return None
+
+        with stage("regions"):
+            fingerprint = await asyncio.to_thread(fingerprint_title_region, image)
+        cache.record("lookups")
+        if fingerprint is None:
+            cache.record("undetected")
+            return None
+
+        scope = RegionCache.make_scope(provider, self._model_label(vision_model), self.system_prompt)
+        entry, recurring = cache.match(scope, fingerprint)
+        if not recurring:
+            cache.record("misses")
+            return None
+
+        region = fingerprint.region
+        try:
+            extraction = await cache.extraction(
+                entry,
+                lambda: self._extract_region(vision_model, provider, image.crop(region.box), region.label)
+            )
+        except Exception:
+            # The title block is read with the rest of the sheet instead
+            cache.record("misses")
+            return None
+
+        # The per-sheet fields always come from the model: a thumbnail match
+        # cannot tell A-101 from A-102
+        reused = reusable_fields(extraction)
+        exact = same_content(fingerprint.thumbnail, cache.thumbnail(entry))
+        if exact:
+            send = region.remove_from(image)
+            note = (
+                f"The {region.label} has been blanked out of this image except its bottom-right "
+                "corner; the rest is identical on other sheets of this set and was read "
+                "separately. Do not report it as missing. From that corner, report only "
+                "project_metadata.drawing_number, sheet_of, revision, date and scale."
+            )
+        else:
+            # Same title block, different sheet
+            send = image
+            note = (
+                f"The {region.label} matches one already read for this drawing set; its "
+                "project details, personnel, legend and general notes are added afterwards. "
+                "From it, report only project_metadata.drawing_number, sheet_of, revision, "
+                "date and scale."
+            )
+
+        saved = self._region_tokens_saved(provider, image, send, reused, note)
+        cache.record("exact_hits" if exact else "layout_hits")
+        cache.record("tokens_saved", saved)
+        return RegionPlan(send, note, self._validate_result(reused), region.label, exact, saved)
+
+    async def _extract_region(
+        self,
+        vision_model: VisionModelProtocol,
+        provider: str,
+        image: Image.Image,
+        label: str
+    ) -> dict:
+        """Read a title region on its own, keeping only the fields it supplies."""
+        prepared = await prepare_image_async(image, provider)
+        result = await self._request_analysis(vision_model, prepared.overview, self._build_region_prompt(label))
+        return result.model_dump(mode="json", include=set(REGION_FIELDS), exclude_none=True)
+
+    @staticmethod
+    def _region_tokens_saved(
+        provider: str,
+        image: Image.Image,
+        send: Image.Image,
+        reused: dict,
+        note: str
+    ) -> int:
+        """Estimate tokens saved on one sheet: image area left out plus output not generated."""
+        budget = budget_for(provider)
+
+        def image_tokens(size: tuple[int, int]) -> int:
+            scale = fit_scale(size, budget)
+            return estimate_image_tokens(provider, (round(size[0] * scale), round(size[1] * scale)))
+
+        saved = image_tokens(image.size) - image_tokens(send.size) + (len(json.dumps(reused)) - len(note)) // 4
+        return max(0, saved)
+
+    @staticmethod
+    def _apply_regions(result: SketchAnalysisResult, plan: RegionPlan) -> SketchAnalysisResult:
+        """Merge the cached title region fields into the model's result."""
+        merged = merge_results([result, plan.reused])
+        warning = f"Reused the cached {plan.label} ({'identical' if plan.exact else 'same layout'})"
+        if plan.tokens_saved:
+            warning += f"; about {plan.tokens_saved} tokens saved"
+        return merged.model_copy(update={"warnings": [*merged.warnings, warning]})
+
+    async def iter_batch(
+        self,
+        items: Iterable[BatchItem],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        per_provider_limits: Optional[dict[str, int]] = None,
+        on_start: Optional[Callable[[int], None]] = None
+    ) -> AsyncIterator[BatchResult]:
+        """Analyze many drawings concurrently, yielding results as they finish.
+
+        Args:
+            items: Drawings to analyze
+            max_concurrency: Maximum analyses in flight across all providers
+            per_provider_limits: Optional per-provider caps, e.g. {"openai": 8, "gemini": 16}
+            on_start: Optional callback with the item's index when its analysis
+                      gets a slot (e.g. to journal it as in flight)
+
+        Yields:
+            BatchResult per item in completion order; ``index`` refers to the
+            item's position in ``items``. A failing item yields an error result
+            instead of aborting the batch.
+
+        ``items`` may be a lazy iterator (e.g. PDF pages rasterized on demand);
+        it is consumed only as analysis slots free up, so at most about
+        ``2 * max_concurrency`` items are materialized at once.
+        """
+        concurrency = max(1, max_concurrency)
+        global_limit = asyncio.Semaphore(concurrency)
+        admitted = asyncio.Semaphore(concurrency * 2)
+        provider_limits = {
+            name.lower(): asyncio.Semaphore(max(1, limit))
+            for name, limit in (per_provider_limits or {}).items()
+        }
+        finished: asyncio.Queue = asyncio.Queue()
+        iterator = iter(items)
+        tasks: set[asyncio.Task] = set()
+        end_of_items = object()
+
+        async def run(index: int, item: BatchItem) -> None:
+            try:
+                provider = (item.provider or self.provider).lower()
+                provider_limit = provider_limits.get(provider) or contextlib.nullcontext()
+                # Take the provider slot first so a saturated provider does not
+                # hold global slots that other providers could use
+                async with provider_limit:
+                    async with global_limit:
+                        if on_start is not None:
+                            on_start(index)
+                        result = await self._run_batch_item(index, item)
+                await finished.put(result)
+            finally:
+                admitted.release()
+
+        async def feed() -> None:
+            index = 0
+            while True:
+                await admitted.acquire()
+                # Do not rasterize more pages while sheets wait for memory
+                await self.memory_budget.wait_for_room()
+                try:
+                    # Producing an item may be CPU-heavy (PDF rasterization)
+                    item = await asyncio.to_thread(next, iterator, end_of_items)
+                except Exception as e:
+                    admitted.release()
+                    await finished.put(BatchResult(
+                        index=index,
+                        success=False,
+                        error=f"Failed to read item: {e}",
+                        error_type=type(e).__name__
+                    ))
+                    index += 1
+                    break
+
+                if item is end_of_items:
+                    admitted.release()
+                    break
+
+                task = asyncio.create_task(run(index, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                del item
+                index += 1
+
+            await finished.put(index)
+
+        feeder = asyncio.create_task(feed())
+        try:
+            total = None
+            yielded = 0
+            while total is None or yielded < total:
+                message = await finished.get()
+                if isinstance(message, int):
+                    total = message
+                    continue
+                yielded += 1
+                yield message
+        finally:
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    async def analyze_batch(
+        self,
+        items: Iterable[BatchItem],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        per_provider_limits: Optional[dict[str, int]] = None
+    ) -> list[BatchResult]:
+        """Analyze many drawings concurrently.
+
+        Same as ``iter_batch`` but collects the results in input order.
+        """
+        results = [
+            batch_result
+            async for batch_result in self.iter_batch(items, max_concurrency, per_provider_limits)
+        ]
+        return sorted(results, key=lambda r: r.index)
+
+    async def analyze_pdf(
+        self,
+        pdf_path: str,
+        context: Optional[str] = None,
+        dpi: int = DEFAULT_PDF_DPI,
+        pages: Optional[str] = None,
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> AsyncIterator[BatchResult]:
+        """Analyze a multi-page PDF drawing set, yielding one result per page.
+
+        Pages are rasterized lazily at up to ``dpi`` and analyzed
+        concurrently; each result carries its 1-based ``page`` number.
+        """
+        page_items = iter_pdf_pages(pdf_path, dpi=dpi, pages=pages, context=context, budget=self.load_budget())
+        async for batch_result in self.iter_batch(page_items, max_concurrency):
+            yield batch_result
+
+    async def _run_batch_item(self, index: int, item: BatchItem) -> BatchResult:
+        """Load and analyze one batch item, capturing any failure."""
+        start_time = time.time()
+        sketch_id = item.metadata.sketch_id if item.metadata else None
+        page = item.page
+
+        # Queue behind interactive requests at the provider rate limiter
+        request_priority.set(PRIORITY_BATCH)
+        meter = start_telemetry()
+
+        try:
+            if item.image is None and item.text_layer is not None and item.text_layer.text_only:
+                result = await self.analyze_text_page(item.text_layer, item.metadata, provider=item.provider)
+            else:
+                budget = self.load_budget(item.provider)
+                peak, _ = self._item_memory(item, budget)
+                # Wait for room in the memory budget before decoding the sheet
+                async with self.memory_budget.reserve(peak) as lease:
+                    with meter.stage("load"):
+                        image, metadata = await asyncio.to_thread(self._load_batch_item, index, item, budget)
+                    lease.resize(image_memory(image, budget)[1])
+                    sketch_id = metadata.sketch_id
+                    analysis = self.analyze_sketch(
+                        image, metadata, item.context, provider=item.provider, text_layer=item.text_layer
+                    )
+                    # The analysis holds the only reference now and drops it once the sheet is prepared
+                    del image
+                    result = await analysis
+        except Exception as e:
+            return BatchResult(
+                index=index,
+                sketch_id=sketch_id,
+                page=page,
+                success=False,
+                error=str(e),
+                error_type=type(e).__name__,
+                elapsed=time.time() - start_time
+            )
+
+        return BatchResult(
+            index=index,
+            sketch_id=sketch_id,
+            page=page,
+            success=True,
+            result=result,
+            elapsed=time.time() - start_time
+        )
+
+    @staticmethod
+    def _item_memory(item: BatchItem, budget: Optional[ImageBudget]) -> tuple[int, int]:
+        """``(peak, held)`` memory estimate for a batch item, from its image header."""
+        if item.image is not None:
+            return image_memory(item.image, budget)
+        try:
+            with Image.open(item.image_path) as image:
+                return image_memory(image, budget)
+        except Exception:
+            # Unreadable: loading reports the error
+            return 0, 0
+
+    @staticmethod
+    def _load_batch_item(
+        index: int,
+        item: BatchItem,
+        budget: Optional[ImageBudget] = None
+    ) -> tuple[Image.Image, SketchMetadata]:
+        """Resolve a batch item to an image (reduced for ``budget``) and metadata.
+
+        An image given in the item is moved out of it, so the analysis holds
+        the only reference. An item whose source could not be read raises
+        that error.
+        """
+        if item.error is not None:
+            raise item.error
+
+        if item.image is not None:
+            # Take the image out of the item, which lives as long as the analysis
+            image, item.image = item.image, None
+            metadata = item.metadata or SketchMetadata(
+                sketch_id=f"sheet-{index + 1}",
+                filename=getattr(image, "filename", "") or f"sheet-{index + 1}",
+                file_size=0,
+                dimensions=image.size
+            )
+            return image, metadata
+
+        if not item.image_path:
+            raise ValueError("Batch item needs either 'image' or 'image_path'")
+
+        path = Path(item.image_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Image not found: {item.image_path}")
+
+        image, original_size = load_image(path, budget)
+        metadata = item.metadata or SketchMetadata(
+            sketch_id=path.stem,
+            filename=path.name,
+            file_size=path.stat().st_size,
+            dimensions=original_size
+        )
+        return image, metadata
 
     def _build_analysis_prompt(
         self,
         metadata: SketchMetadata,
-        context: Optional[str]
+        context: Optional[str],
+        tile: Optional[Tile] = None,
+        regions: Optional[str] = None,
+        text_layer: Optional[str] = None
     ) -> str:
-        """Build complete analysis prompt combining system prompt with context."""
-        prompt_parts = [self.system_prompt]
+        """Build the per-sheet part of the prompt.
+
+        The system prompt is sent separately (``system=``) ahead of this tail,
+        so it forms an identical prefix on every request that provider
+        prompt caches can serve. Keep anything that varies per sheet here.
+        """
+        prompt_parts = []
 
         if context:
-            prompt_parts.append(f"\n## Project Context\n{context}")
+            prompt_parts.append(f"## Project Context\n{context}\n")
 
-        prompt_parts.append(f"\n## Drawing Metadata\n")
+        prompt_parts.append(f"## Drawing Metadata\n")
         prompt_parts.append(f"- Filename: {metadata.filename}")
         prompt_parts.append(f"- Image dimensions: {metadata.dimensions[0]}x{metadata.dimensions[1]} pixels")
+        if metadata.page_number:
+            prompt_parts.append(f"- Page: {metadata.page_number} of {metadata.page_count or '?'}")
+
+        if tile is not None and tile.box is not None:
+            left, top, right, bottom = tile.box
+            prompt_parts.append(f"\n## Tile\n")
+            prompt_parts.append(
+                f"This image is tile {tile.index} of {tile.count}, covering pixels "
+                f"({left}, {top}) to ({right}, {bottom}) of the full sheet. "
+                "Report only what is legible in this tile and leave other fields empty."
+            )
+
+        if regions:
+            prompt_parts.append(f"\n## Known Regions\n")
+            prompt_parts.append(regions)
+
+        if text_layer:
+            prompt_parts.append(f"\n## Text Layer\n")
+            prompt_parts.append(text_layer)
 
         prompt_parts.append("\n## Task\n")
         prompt_parts.append("Analyze this construction drawing and return ONLY valid JSON following the schema.")
 
         return "\n".join(prompt_parts)
 
-    def _parse_json_response(self, response: str) -> dict:
+    @staticmethod
+    def _build_region_prompt(label: str) -> str:
+        """Per-request prompt for reading a recurring title region on its own."""
+        return (
+            "## Region\n\n"
+            f"This image is only the {label} of a drawing sheet; the same region "
+            "appears on the other sheets of the set. Report only what it contains: "
+            "project_metadata (with personnel), specifications, standards, regional_codes "
+            "and notes (legend and general notes). Leave every other field empty.\n"
+            "\n## Task\n\n"
+            "Return ONLY valid JSON following the schema."
+        )
+
+    def _parse_json_response(self, response: str, structured: bool = False) -> dict:
         """Parse JSON from vision model response.
 
-        Handles markdown code blocks and extracts clean JSON.
+        Tolerates prose and markdown code blocks around the object, and
+        salvages truncated or malformed output (flagged in ``warnings``).
 
         Args:
             response: Raw text response from vision model
+            structured: The response was constrained to the schema, so it is
+                normally the bare object and is parsed directly
 
         Returns:
             Parsed dictionary
 
         Raises:
-            ValueError: If JSON is invalid
+            JSONExtractionError: If no usable JSON could be extracted (a
+                ValueError; ``truncated`` tells whether a continuation can help)
         """
-        # Remove markdown code blocks if present
-        cleaned = response.strip()
-
-        if cleaned.startswith("```json"):
-            cleaned = cleaned.replace("```json", "", 1)
-            cleaned = cleaned.rsplit("```", 1)[0]
-        elif cleaned.startswith("```"):
-            cleaned = cleaned.replace("```", "", 1)
-            cleaned = cleaned.rsplit("```", 1)[0]
-
-        cleaned = cleaned.strip()
+        if structured:
+            try:
+                result = loads(response)
+            except ValueError:
+                # Cut off at max_tokens: fall through to the repair
+                result = None
+            if isinstance(result, dict):
+                return result
 
+        # Finds the object inside fences/prose and repairs truncation
         try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError as e:
-            raise ValueError(
+            extracted = extract_json(response)
+        except JSONExtractionError as e:
+            error = JSONExtractionError(
                 f"Invalid JSON response from vision model: {e}\n\n"
-                f"Response preview:\n{response[:500]}..."
+                f"Response preview:\n{response[:500]}...",
+                truncated=e.truncated
             )
+            raise error from None
+
+        result = extracted.data
+        if extracted.repaired:
+            warnings = result.get("warnings")
+            if not isinstance(warnings, list):
+                warnings = [] if warnings is None else [str(warnings)]
+            reason = "was cut off" if extracted.truncated else "contained malformed JSON"
+            result["warnings"] = [
+                *warnings,
+                f"Model response {reason}; salvaged the complete part and dropped "
+                f"the last {extracted.dropped_chars} characters"
+            ]
+        return result
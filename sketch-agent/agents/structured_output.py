@@ -0,0 +1,139 @@
+"""JSON Schema for provider-side structured output.
+
+The analysis schema is derived from ``SketchAnalysisResult`` instead of
+being restated in the prompt, and handed to each provider's native
+constrained-decoding feature in the dialect it accepts:
+
+- OpenAI: ``response_format`` with a strict ``json_schema`` (every object
+  closed, every property required, optional ones nullable);
+- Anthropic: a single forced tool whose ``input_schema`` is the schema; the
+  answer is the tool call's input;
+- Gemini: ``response_schema`` in its OpenAPI subset (no ``$ref`` or
+  ``anyOf``, ``nullable`` instead of a null type).
+
+The model can then only produce a parseable object of the right shape, so
+no call is lost to prose, fences or mistyped fields. Fields the agent fills
+in itself (ids, timings, telemetry) are left out of the schema.
+"""
+
+import functools
+import json
+
+from .types import SketchAnalysisResult
+
+
+# Set by the agent after the model answers
+AGENT_FIELDS = ("sketch_id", "processing_time", "cache_hit", "telemetry")
+
+ANALYSIS_TOOL = "record_sketch_analysis"
+
+# Keywords that only document the Python model, or that strict modes reject
+_DROPPED_KEYWORDS = ("title", "default", "minimum", "maximum")
+
+
+def _map_schema(schema: dict, transform) -> dict:
+    """Copy of ``schema`` with ``transform`` applied to every subschema, children first.
+
+    Walks only schema positions, so a property that happens to be called
+    ``type`` or ``items`` is not mistaken for a keyword.
+    """
+    schema = dict(schema)
+    for key in ("properties", "$defs"):
+        if key in schema:
+            schema[key] = {name: _map_schema(child, transform) for name, child in schema[key].items()}
+    if "items" in schema:
+        schema["items"] = _map_schema(schema["items"], transform)
+    if "anyOf" in schema:
+        schema["anyOf"] = [_map_schema(child, transform) for child in schema["anyOf"]]
+    return transform(schema)
+
+
+def _strip(schema: dict) -> dict:
+    return {key: value for key, value in schema.items() if key not in _DROPPED_KEYWORDS}
+
+
+@functools.lru_cache(maxsize=1)
+def _analysis_schema() -> str:
+    schema = SketchAnalysisResult.model_json_schema()
+    for field in AGENT_FIELDS:
+        schema["properties"].pop(field, None)
+
+    # Drop definitions only the agent-filled fields used (telemetry)
+    defs = schema.pop("$defs", {})
+    used: set[str] = set()
+    pending = [schema]
+    while pending:
+        text = json.dumps(pending.pop())
+        for name in defs:
+            if name not in used and f'"#/$defs/{name}"' in text:
+                used.add(name)
+                pending.append(defs[name])
+    schema["$defs"] = {name: defs[name] for name in sorted(used)}
+    return json.dumps(_map_schema(schema, _strip))
+
+
+def analysis_schema() -> dict:
+    """JSON Schema of the fields the model fills in (a fresh copy)."""
+    return json.loads(_analysis_schema())
+
+
+def _close_object(schema: dict) -> dict:
+    """OpenAI strict mode: closed objects with every property required."""
+    if "properties" in schema:
+        schema["additionalProperties"] = False
+        schema["required"] = list(schema["properties"])
+    return schema
+
+
+def openai_response_format(schema: dict) -> dict:
+    """``response_format`` for OpenAI chat completions."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "sketch_analysis",
+            "strict": True,
+            "schema": _map_schema(schema, _close_object)
+        }
+    }
+
+
+def anthropic_tool(schema: dict) -> dict:
+    """Tool definition whose input is the analysis; force it with ``tool_choice``."""
+    return {
+        "name": ANALYSIS_TOOL,
+        "description": "Record the complete analysis of the drawing.",
+        "input_schema": schema
+    }
+
+
+def _gemini_node(schema: dict) -> dict:
+    if "anyOf" in schema:
+        options = [option for option in schema.pop("anyOf") if option.get("type") != "null"]
+        # Optional[X] -> X, nullable; unions of several types do not occur in the models
+        schema = {**schema, **options[0], "nullable": True}
+    schema.pop("additionalProperties", None)
+    return schema
+
+
+def _inline_refs(schema, defs: dict):
+    if isinstance(schema, list):
+        return [_inline_refs(value, defs) for value in schema]
+    if not isinstance(schema, dict):
+        return schema
+    if "$ref" in schema:
+        return _inline_refs(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    return {key: _inline_refs(value, defs) for key, value in schema.items() if key != "$defs"}
+
+
+def gemini_response_schema(schema: dict) -> dict:
+    """``response_schema`` for Gemini's generation config (no ``$ref``, no ``anyOf``)."""
+    return _map_schema(_inline_refs(schema, schema.get("$defs", {})), _gemini_node)
+
+
+def anthropic_content_text(content) -> str:
+    """Text of an Anthropic message: the analysis tool's input, else its text blocks."""
+    for block in content:
+        if block.type == "tool_use" and block.name == ANALYSIS_TOOL:
+            return json.dumps(block.input)
+    return "".join(block.text for block in content if block.type == "text")
+
@@ -0,0 +1,140 @@
+"""Per-analysis telemetry: stage timings, token usage and bytes sent.
+
+Each analysis runs with a ``TelemetryMeter`` installed in a context
+variable, so concurrent analyses (batch items, server requests) each record
+into their own meter, while the tile requests of one sheet, gathered as
+child tasks, record into the same one. Code anywhere on the hot path reports
+into whatever meter is current:
+
+- ``stage("parse")`` / ``record_span(...)`` for timed stages
+- ``record_usage(...)`` for provider-reported tokens
+- ``record_image_bytes(n)`` for encoded image payloads
+
+Stages: load, cache, text_layer (facts from a PDF page's text layer),
+regions, preprocess, triage (the cascade's cheap first pass, wrapping its
+own request stages), encode, queue (rate limiter), retry (backoff),
+pool_wait / connect / upload (HTTP connection pool, new connections,
+sending the body), request, first_byte / last_byte (streaming: time from
+sending to the first / last chunk), parse, validate. A
+well-formed answer is validated straight from its JSON text, so its parsing
+counts as validate; parse then covers only extraction and repair. When a
+sheet makes several requests (tiling, an escalated cascade), stage times are
+summed across them.
+
+Callers that load the image themselves may ``start_telemetry()`` first and
+time the load; ``SketchAgent`` adopts that meter instead of starting a new one.
+"""
+
+import contextlib
+import contextvars
+import time
+from typing import Iterator, Optional
+
+from .types import Telemetry, TokenUsage
+
+
+class TelemetryMeter:
+    """Collects spans, usage and bytes for one analysis."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_ns = time.time_ns()
+        self.provider: Optional[str] = None
+        self.model: Optional[str] = None
+        self.sketch_id: Optional[str] = None
+        self.cache_hit = False
+        # "kept" or "escalated" when the analysis went through the cascade
+        self.cascade: Optional[str] = None
+        self.cascade_reason: Optional[str] = None
+        self.usage = TokenUsage()
+        self.image_bytes = 0
+        # (stage, start, end) as perf_counter() values
+        self.spans: list[tuple[str, float, float]] = []
+        self._adopted = False
+
+    def record_span(self, name: str, start: float, end: float) -> None:
+        self.spans.append((name, start, end))
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start, time.perf_counter()))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def snapshot(self) -> Telemetry:
+        """Summarize into the result's ``telemetry`` block."""
+        stages: dict[str, float] = {}
+        for name, start, end in self.spans:
+            stages[name] = stages.get(name, 0.0) + (end - start) * 1000
+        return Telemetry(
+            provider=self.provider,
+            model=self.model,
+            total_ms=round(self.elapsed() * 1000, 3),
+            stages={name: round(ms, 3) for name, ms in stages.items()},
+            image_bytes=self.image_bytes,
+            usage=self.usage.model_copy(),
+            cascade=self.cascade,
+            cascade_reason=self.cascade_reason
+        )
+
+
+current_meter: contextvars.ContextVar[Optional[TelemetryMeter]] = contextvars.ContextVar(
+    "current_meter", default=None
+)
+
+
+def start_telemetry() -> TelemetryMeter:
+    """Install and return a fresh meter for the analysis running in this context."""
+    meter = TelemetryMeter()
+    current_meter.set(meter)
+    return meter
+
+
+def adopt_telemetry() -> TelemetryMeter:
+    """Meter for a new analysis: one a caller started for it, else a fresh one."""
+    meter = current_meter.get()
+    if meter is None or meter._adopted:
+        meter = start_telemetry()
+    meter._adopted = True
+    return meter
+
+
+def stage(name: str):
+    """Time a block as ``name`` in the current meter (no-op outside an analysis)."""
+    meter = current_meter.get()
+    return meter.stage(name) if meter is not None else contextlib.nullcontext()
+
+
+def record_span(name: str, start: float, end: float) -> None:
+    meter = current_meter.get()
+    if meter is not None:
+        meter.record_span(name, start, end)
+
+
+def record_image_bytes(size: int) -> None:
+    meter = current_meter.get()
+    if meter is not None:
+        meter.image_bytes += size
+
+
+def record_usage(
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cached_input_tokens: int = 0,
+    cache_write_tokens: int = 0
+) -> None:
+    """Add one request's usage to the current meter (no-op outside an analysis)."""
+    meter = current_meter.get()
+    if meter is None:
+        return
+    usage = meter.usage
+    usage.requests += 1
+    usage.input_tokens += input_tokens or 0
+    usage.output_tokens += output_tokens or 0
+    usage.cached_input_tokens += cached_input_tokens or 0
+    usage.cache_write_tokens += cache_write_tokens or 0
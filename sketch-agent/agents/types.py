@@ -3,6 +3,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Any
 from datetime import datetime
+from PIL import Image
 
 
 class SketchMetadata(BaseModel):
@@ -12,6 +13,8 @@ class SketchMetadata(BaseModel):
     file_size: int
     dimensions: tuple[int, int]
     uploaded_at: Optional[datetime] = None
+    page_number: Optional[int] = Field(None, description="1-based page within a multi-page PDF")
+    page_count: Optional[int] = None
 
 
 class InferredCapacity(BaseModel):
@@ -113,6 +116,35 @@ class RevisionInfo(BaseModel):
     description: Optional[str] = None
 
 
+class TokenUsage(BaseModel):
+    """Provider-reported token usage, summed over every request for one sheet."""
+    requests: int = 0
+    input_tokens: int = Field(0, description="All input tokens, including cached ones")
+    output_tokens: int = 0
+    cached_input_tokens: int = Field(0, description="Input tokens served from the provider's prompt cache")
+    cache_write_tokens: int = Field(0, description="Input tokens written to the provider's prompt cache")
+
+
+class Telemetry(BaseModel):
+    """Where the time of one analysis went, plus what it sent and consumed."""
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    total_ms: float = 0.0
+    stages: dict[str, float] = Field(
+        default_factory=dict,
+        description="Stage -> milliseconds (load, cache, text_layer, regions, preprocess, triage, encode, "
+                    "queue, retry, pool_wait, connect, upload, request, first_byte, last_byte, "
+                    "parse, validate), summed over requests"
+    )
+    image_bytes: int = Field(0, description="Encoded image bytes sent to the provider")
+    usage: TokenUsage = Field(default_factory=TokenUsage, description="Token usage reported by the provider")
+    cascade: Optional[str] = Field(
+        None,
+        description="Cascade outcome: 'kept' (triage answer used) or 'escalated' (main model rerun)"
+    )
+    cascade_reason: Optional[str] = Field(None, description="Why the sheet was escalated")
+
+
 class SketchAnalysisResult(BaseModel):
     """Complete analysis result for a construction drawing with new detailed schema."""
     sketch_id: Optional[str] = None
@@ -131,8 +163,107 @@ class SketchAnalysisResult(BaseModel):
     revisions: list[RevisionInfo] = Field(default_factory=list)
     confidence_score: Optional[float] = Field(None, ge=0.0, le=1.0)
     processing_time: Optional[float] = None
+    cache_hit: bool = Field(False, description="True if served from the result cache")
+    telemetry: Optional[Telemetry] = Field(None, description="Per-stage timings, bytes sent and token usage")
     notes: Optional[str] = Field(None, description="Additional notes")
     warnings: list[str] = Field(default_factory=list)
 
     class Config:
         extra = "allow"
+
+
+class TextRun(BaseModel):
+    """One line of text from a PDF's text layer."""
+    text: str
+    # (x0, y0, x1, y1) in page points, origin top left
+    bbox: tuple[float, float, float, float]
+
+
+class PageText(BaseModel):
+    """Positioned text of one vector PDF page, extracted without rasterizing."""
+    page_number: int
+    size: tuple[float, float] = Field(..., description="Page width and height in points")
+    runs: list[TextRun] = Field(default_factory=list)
+    path_ops: int = Field(0, description="Vector paths painted on the page (lines, curves, fills)")
+    image_share: float = Field(0.0, description="Share of the page covered by raster images")
+    text_only: bool = Field(False, description="Specs, schedules and other pages without drawing content")
+
+    @property
+    def chars(self) -> int:
+        return sum(len(run.text) for run in self.runs)
+
+
+class BatchItem(BaseModel):
+    """One drawing in a batch analysis request.
+
+    Either ``image`` or ``image_path`` must be set, except for text-only PDF
+    pages, which carry just their ``text_layer``, and PDF pages that could
+    not be read, which carry just their ``error``. Images given by path are
+    loaded lazily when the item starts, so a large set is never held in
+    memory at once.
+    """
+    image: Optional[Image.Image] = None
+    image_path: Optional[str] = None
+    metadata: Optional[SketchMetadata] = None
+    context: Optional[str] = None
+    provider: Optional[str] = Field(None, description="Provider override for this item")
+    page: Optional[int] = Field(None, description="Source PDF page number")
+    text_layer: Optional[PageText] = Field(
+        None,
+        description="Text layer of a vector PDF page; text-only pages come without an image"
+    )
+    error: Optional[Exception] = Field(None, description="Why the source page could not be read")
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class BatchResult(BaseModel):
+    """Outcome of one batch item; failures are isolated per item."""
+    index: int
+    sketch_id: Optional[str] = None
+    page: Optional[int] = None
+    success: bool
+    result: Optional[SketchAnalysisResult] = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    elapsed: Optional[float] = None
+
+
+class AnalysisEvent(BaseModel):
+    """Streaming analysis event.
+
+    ``section`` events carry one completed top-level section of the response
+    as raw (unvalidated) data; the final ``result`` event carries the
+    validated result.
+    """
+    event: str = Field(..., description="'section' or 'result'")
+    section: Optional[str] = None
+    data: Any = None
+    result: Optional[SketchAnalysisResult] = None
+    elapsed: float = 0.0
+
+
+class ProviderBatchEntry(BaseModel):
+    """One drawing submitted as part of a provider batch job."""
+    index: int
+    custom_id: str = Field(..., description="Request id echoed back by the provider")
+    metadata: SketchMetadata
+    source: Optional[str] = Field(None, description="Image or PDF path the sheet came from")
+    page: Optional[int] = None
+    context: Optional[str] = None
+
+
+class ProviderBatchJob(BaseModel):
+    """Locally persisted state of an asynchronous provider batch job."""
+    job_id: str
+    provider: str
+    model: str
+    remote_id: Optional[str] = Field(None, description="Batch id assigned by the provider")
+    status: str = Field("building", description="Provider status, or 'collected' once results are saved")
+    created_at: datetime
+    submitted_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    request_counts: dict[str, int] = Field(default_factory=dict)
+    entries: list[ProviderBatchEntry] = Field(default_factory=list)
+    error: Optional[str] = None
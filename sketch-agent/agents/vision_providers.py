@@ -6,16 +6,64 @@ Supports 5 vision providers:
 - Google Gemini (Gemini 2.0 Flash, Gemini 1.5 Pro)
 - DeepSeek (DeepSeek-Chat via OpenAI-compatible API)
 - Qwen (Qwen-VL via DashScope OpenAI-compatible API)
+
+plus a "router" pseudo-provider that spreads requests over several of them
+with hedging and failover (see ``routing.py``), and a "mock" provider that
+replays recorded responses for benchmarks (see ``mock_provider.py``).
+
+The system prompt is passed separately from the per-sheet prompt and always
+sent as the first, byte-identical part of the request, so provider prompt
+caches can serve it: explicit ``cache_control`` on Anthropic, automatic
+prefix caching on OpenAI-compatible APIs, and a ``CachedContent`` (or at
+least a fixed system instruction) on Gemini. Token usage, including cached
+tokens, is reported through ``telemetry.record_usage``.
+
+Provider SDKs are imported, and their clients built, on first use (the
+``client`` / ``model`` properties) rather than at module load. A process
+only ever talks to one or two providers, and importing all three SDKs
+(``google.generativeai`` pulls in grpc and protobuf) dominated CLI startup.
+
+With a ``schema`` (see ``structured_output.py``), OpenAI, Anthropic and
+Gemini constrain the answer to it natively; DeepSeek and Qwen ignore it and
+answer free-form as before.
+
+The OpenAI-compatible and Anthropic clients all share one pooled HTTP
+transport (``http_transport.py``); ``prewarm_connections`` opens its
+connections ahead of the first request.
 """
 
-from typing import Protocol, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Protocol, Optional
 from PIL import Image
-import base64
-import io
+import asyncio
+import datetime
 import os
-from openai import AsyncOpenAI
-from anthropic import AsyncAnthropic
-import google.generativeai as genai
+import time
+
+from .image_encoding import DEFAULT_ACCEPTED_FORMATS, DEFAULT_MAX_IMAGE_BYTES, encode_image_async
+from .rate_limiter import estimate_request_tokens, get_limiter, openai_detail
+from .structured_output import (
+    ANALYSIS_TOOL,
+    anthropic_content_text,
+    anthropic_tool,
+    gemini_response_schema,
+    openai_response_format
+)
+from .telemetry import record_usage
+from .mock_provider import MockVisionModel
+from .routing import RoutingVisionModel
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+    from anthropic import AsyncAnthropic
+    from openai import AsyncOpenAI
+
+
+# Formats accepted by providers without GIF support
+STILL_IMAGE_FORMATS = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
 
 
 class VisionModelProtocol(Protocol):
@@ -26,92 +74,226 @@ class VisionModelProtocol(Protocol):
         image: Image.Image,
         prompt: str,
         max_tokens: int = 4000,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
     ) -> str:
-        """Analyze an image and return text response."""
+        """Analyze an image and return text response.
+
+        ``system`` is the stable, cacheable instruction prefix; ``prompt``
+        is the per-image tail. ``schema`` (JSON Schema) constrains the answer
+        to matching JSON on providers with ``structured_output``; the others
+        ignore it and answer free-form.
+        """
+        ...
+
+    def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        """Analyze an image and yield the text response as it is generated."""
         ...
 
 
+def _openai_messages(prompt: str, image_url: dict, system: Optional[str] = None) -> list[dict]:
+    """Chat messages for OpenAI-compatible vision APIs.
+
+    The system message goes first and never varies, so the provider's
+    automatic prefix cache can serve it across requests.
+    """
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({
+        "role": "user",
+        "content": [
+            {"type": "text", "text": prompt},
+            {
+                "type": "image_url",
+                "image_url": image_url
+            }
+        ]
+    })
+    return messages
+
+
+def _record_openai_usage(usage) -> None:
+    """Record usage from an OpenAI-compatible response.
+
+    OpenAI and DashScope report cache hits in ``prompt_tokens_details``;
+    DeepSeek reports ``prompt_cache_hit_tokens``.
+    """
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or getattr(usage, "prompt_cache_hit_tokens", None)
+    record_usage(
+        input_tokens=usage.prompt_tokens,
+        output_tokens=usage.completion_tokens,
+        cached_input_tokens=cached or 0
+    )
+
+
+# (SDK, API key, base URL, HTTP client) -> SDK client shared by all model instances
+_sdk_clients: dict[tuple, object] = {}
+
+
+def _sdk_client(sdk: str, api_key: str, base_url: Optional[str] = None):
+    """OpenAI or Anthropic SDK client on the shared pooled transport.
+
+    Model instances with the same key and endpoint (e.g. DeepSeek models
+    created per agent or per batch item) share one client, and all clients
+    share the connection pool in ``http_transport``.
+    """
+    from .http_transport import sdk_client_options
+
+    options = sdk_client_options()
+    key = (sdk, api_key, base_url, options["http_client"])
+    client = _sdk_clients.get(key)
+    if client is None:
+        if sdk == "anthropic":
+            from anthropic import AsyncAnthropic as client_class
+        else:
+            from openai import AsyncOpenAI as client_class
+        # Retries are owned by the shared rate limiter
+        client = client_class(api_key=api_key, base_url=base_url, max_retries=0, **options)
+        _sdk_clients[key] = client
+    return client
+
+
+def _openai_client(api_key: str, base_url: Optional[str] = None) -> "AsyncOpenAI":
+    return _sdk_client("openai", api_key, base_url)
+
+
+async def _stream_openai_chat(client: "AsyncOpenAI", **request) -> AsyncIterator[str]:
+    """Yield text deltas from an OpenAI-compatible streaming chat completion."""
+    stream = await client.chat.completions.create(
+        stream=True,
+        stream_options={"include_usage": True},
+        **request
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if getattr(chunk, "usage", None):
+            _record_openai_usage(chunk.usage)
+
+
 class OpenAIVisionModel:
     """OpenAI GPT-4o Vision implementation."""
 
+    provider = "openai"
+    accepted_formats = DEFAULT_ACCEPTED_FORMATS
+    # Documented per-image cap
+    max_image_bytes = 20_000_000
+    structured_output = True
+
     def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o"):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment")
 
-        self.client = AsyncOpenAI(api_key=self.api_key)
         self.model = model
 
-    def _image_to_base64(self, image: Image.Image) -> str:
-        """Convert PIL Image to base64 string."""
-        buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode()
+    @property
+    def client(self) -> "AsyncOpenAI":
+        return _openai_client(self.api_key)
+
+    async def _request(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system: Optional[str],
+        schema: Optional[dict] = None
+    ) -> dict:
+        encoded = await encode_image_async(image, self.accepted_formats, self.max_image_bytes)
+        request = {
+            "model": self.model,
+            "messages": _openai_messages(prompt, {"url": encoded.data_url, "detail": openai_detail(image.size)}, system),
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if schema:
+            request["response_format"] = openai_response_format(schema)
+        return request
 
     async def analyze_image(
         self,
         image: Image.Image,
         prompt: str,
         max_tokens: int = 4000,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
     ) -> str:
-        base64_image = self._image_to_base64(image)
-
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=max_tokens,
-            temperature=temperature
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        response = await get_limiter(self.provider).run(
+            lambda: self.client.chat.completions.create(**request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
         )
+        _record_openai_usage(response.usage)
 
         return response.choices[0].message.content or ""
 
+    async def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        async for text in get_limiter(self.provider).stream(
+            lambda: _stream_openai_chat(self.client, **request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        ):
+            yield text
+
 
 class AnthropicVisionModel:
     """Anthropic Claude 3.5 Sonnet Vision implementation."""
 
+    provider = "anthropic"
+    accepted_formats = DEFAULT_ACCEPTED_FORMATS
+    # 5 MB per image once base64-encoded
+    max_image_bytes = 3_750_000
+    structured_output = True
+
     def __init__(self, api_key: Optional[str] = None, model: str = "claude-3-5-sonnet-20241022"):
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment")
 
-        self.client = AsyncAnthropic(api_key=self.api_key)
         self.model = model
 
-    def _image_to_base64(self, image: Image.Image) -> str:
-        buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode()
+    @property
+    def client(self) -> "AsyncAnthropic":
+        return _sdk_client("anthropic", self.api_key)
 
-    async def analyze_image(
+    async def _request(
         self,
         image: Image.Image,
         prompt: str,
-        max_tokens: int = 4000,
-        temperature: float = 0.1
-    ) -> str:
-        base64_image = self._image_to_base64(image)
-
-        response = await self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            messages=[
+        max_tokens: int,
+        temperature: float,
+        system: Optional[str],
+        schema: Optional[dict] = None
+    ) -> dict:
+        encoded = await encode_image_async(image, self.accepted_formats, self.max_image_bytes)
+        request = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [
                 {
                     "role": "user",
                     "content": [
@@ -119,8 +301,8 @@ class AnthropicVisionModel:
                             "type": "image",
                             "source": {
                                 "type": "base64",
-                                "media_type": "image/png",
-                                "data": base64_image
+                                "media_type": encoded.media_type,
+                                "data": encoded.base64
                             }
                         },
                         {
@@ -130,146 +312,403 @@ class AnthropicVisionModel:
                     ]
                 }
             ]
+        }
+        if system:
+            # Cache breakpoint after the system prompt: later requests read it
+            # from the prompt cache at a fraction of the input price
+            request["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        if schema:
+            # Forced tool call: the answer is the tool input, validated against
+            # the schema. Tools precede the system prompt, so the breakpoint
+            # above caches them too
+            request["tools"] = [anthropic_tool(schema)]
+            request["tool_choice"] = {"type": "tool", "name": ANALYSIS_TOOL}
+        return request
+
+    @staticmethod
+    def _record_usage(usage) -> None:
+        # input_tokens excludes cache reads and writes; report the total
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        record_usage(
+            input_tokens=usage.input_tokens + cache_read + cache_write,
+            output_tokens=usage.output_tokens,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write
         )
 
-        content = response.content[0]
-        return content.text if content.type == "text" else ""
+    async def analyze_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> str:
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        response = await get_limiter(self.provider).run(
+            lambda: self.client.messages.create(**request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        )
+        self._record_usage(response.usage)
+
+        return anthropic_content_text(response.content)
+
+    async def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        async for text in get_limiter(self.provider).stream(
+            lambda: self._stream(request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        ):
+            yield text
+
+    async def _stream(self, request: dict) -> AsyncIterator[str]:
+        async with self.client.messages.stream(**request) as stream:
+            async for event in stream:
+                if event.type != "content_block_delta":
+                    continue
+                # Text, or the analysis tool's input as it is generated
+                if event.delta.type == "text_delta":
+                    yield event.delta.text
+                elif event.delta.type == "input_json_delta":
+                    yield event.delta.partial_json
+            message = await stream.get_final_message()
+            self._record_usage(message.usage)
 
 
 class GeminiVisionModel:
-    """Google Gemini 2.0 Flash Vision implementation."""
+    """Google Gemini 2.0 Flash Vision implementation.
+
+    The system prompt is uploaded once as a ``CachedContent`` and requests
+    reference it. Explicit caching has a provider-side minimum size and is
+    not available on every model; when creating the cache fails, the prompt
+    is sent as a fixed system instruction instead (implicit caching may still
+    apply).
+    """
+
+    provider = "gemini"
+    accepted_formats = STILL_IMAGE_FORMATS
+    # Inline data shares the 20 MB request cap with the prompt
+    max_image_bytes = 15_000_000
+    structured_output = True
 
     def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.0-flash-exp"):
         self.api_key = api_key or os.getenv("GOOGLE_GENERATIVE_AI_API_KEY")
         if not self.api_key:
             raise ValueError("GOOGLE_GENERATIVE_AI_API_KEY not found in environment")
 
-        genai.configure(api_key=self.api_key)
         self.model_name = model
-        self.model = genai.GenerativeModel(model)
-
-    async def analyze_image(
+        self._genai = None
+        self._model: Optional["genai.GenerativeModel"] = None
+
+        self.context_cache = os.getenv("SKETCH_GEMINI_CONTEXT_CACHE", "1").lower() in ("1", "true", "on")
+        self.cache_ttl = int(os.getenv("SKETCH_GEMINI_CACHE_TTL_S", "3600"))
+        # system prompt -> (model bound to it, monotonic expiry or None)
+        self._system_models: dict[str, tuple["genai.GenerativeModel", Optional[float]]] = {}
+        self._system_lock = asyncio.Lock()
+
+    @property
+    def genai(self):
+        """The configured ``google.generativeai`` module (imported on first use)."""
+        if self._genai is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+        return self._genai
+
+    @property
+    def model(self) -> "genai.GenerativeModel":
+        if self._model is None:
+            self._model = self.genai.GenerativeModel(self.model_name)
+        return self._model
+
+    async def _model_for(self, system: Optional[str]) -> "genai.GenerativeModel":
+        """Model bound to ``system``, via a cached content when possible."""
+        if not system:
+            return self.model
+
+        entry = self._system_models.get(system)
+        if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+            return entry[0]
+
+        async with self._system_lock:
+            entry = self._system_models.get(system)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return entry[0]
+
+            genai = self.genai
+            model, expires = None, None
+            if self.context_cache:
+                try:
+                    cached = await asyncio.to_thread(
+                        genai.caching.CachedContent.create,
+                        model=self.model_name,
+                        system_instruction=system,
+                        ttl=datetime.timedelta(seconds=self.cache_ttl)
+                    )
+                    model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+                    # Recreate a little before the provider expires it
+                    expires = time.monotonic() + self.cache_ttl * 0.9
+                except Exception:
+                    # Below the minimum cacheable size or unsupported model:
+                    # stop trying and use a plain system instruction
+                    self.context_cache = False
+
+            if model is None:
+                model = genai.GenerativeModel(self.model_name, system_instruction=system)
+            self._system_models[system] = (model, expires)
+            return model
+
+    async def _request(
         self,
         image: Image.Image,
         prompt: str,
-        max_tokens: int = 4000,
-        temperature: float = 0.1
-    ) -> str:
+        max_tokens: int,
+        temperature: float,
+        schema: Optional[dict] = None
+    ) -> dict:
+        encoded = await encode_image_async(image, self.accepted_formats, self.max_image_bytes)
         generation_config = {
             "max_output_tokens": max_tokens,
             "temperature": temperature
         }
+        if schema:
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = gemini_response_schema(schema)
+        return {
+            "contents": [prompt, {"mime_type": encoded.media_type, "data": encoded.data}],
+            "generation_config": generation_config
+        }
+
+    @staticmethod
+    def _record_usage(response) -> None:
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is None:
+            return
+        record_usage(
+            input_tokens=metadata.prompt_token_count,
+            output_tokens=metadata.candidates_token_count,
+            cached_input_tokens=getattr(metadata, "cached_content_token_count", 0)
+        )
 
-        response = await self.model.generate_content_async(
-            [prompt, image],
-            generation_config=generation_config
+    async def analyze_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> str:
+        model = await self._model_for(system)
+        request = await self._request(image, prompt, max_tokens, temperature, schema)
+        response = await get_limiter(self.provider).run(
+            lambda: model.generate_content_async(**request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
         )
+        self._record_usage(response)
 
         return response.text
 
+    async def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        model = await self._model_for(system)
+        request = await self._request(image, prompt, max_tokens, temperature, schema)
+        async for text in get_limiter(self.provider).stream(
+            lambda: self._stream(model, request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        ):
+            yield text
+
+    async def _stream(self, model: "genai.GenerativeModel", request: dict) -> AsyncIterator[str]:
+        response = await model.generate_content_async(stream=True, **request)
+        async for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+        self._record_usage(response)
+
 
 class DeepSeekVisionModel:
     """DeepSeek Vision (OpenAI-compatible) implementation."""
 
+    provider = "deepseek"
+    accepted_formats = STILL_IMAGE_FORMATS
+    max_image_bytes = DEFAULT_MAX_IMAGE_BYTES
+    # No JSON Schema support: ``schema`` is ignored
+    structured_output = False
+
     def __init__(self, api_key: Optional[str] = None, model: str = "deepseek-chat"):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
             raise ValueError("DEEPSEEK_API_KEY not found in environment")
 
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url="https://api.deepseek.com"
-        )
         self.model = model
 
-    def _image_to_base64(self, image: Image.Image) -> str:
-        buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode()
+    @property
+    def client(self) -> "AsyncOpenAI":
+        return _openai_client(self.api_key, base_url="https://api.deepseek.com")
+
+    async def _request(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system: Optional[str],
+        schema: Optional[dict] = None
+    ) -> dict:
+        encoded = await encode_image_async(image, self.accepted_formats, self.max_image_bytes)
+        return {
+            "model": self.model,
+            "messages": _openai_messages(prompt, {"url": encoded.data_url}, system),
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
 
     async def analyze_image(
         self,
         image: Image.Image,
         prompt: str,
         max_tokens: int = 4000,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
     ) -> str:
-        base64_image = self._image_to_base64(image)
-
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=max_tokens,
-            temperature=temperature
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        response = await get_limiter(self.provider).run(
+            lambda: self.client.chat.completions.create(**request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
         )
+        _record_openai_usage(response.usage)
 
         return response.choices[0].message.content or ""
 
+    async def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        async for text in get_limiter(self.provider).stream(
+            lambda: _stream_openai_chat(self.client, **request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        ):
+            yield text
+
 
 class QwenVisionModel:
     """Qwen VL (DashScope API) implementation."""
 
+    provider = "qwen"
+    accepted_formats = STILL_IMAGE_FORMATS
+    # 10 MB per image once base64-encoded
+    max_image_bytes = 7_500_000
+    # No JSON Schema support: ``schema`` is ignored
+    structured_output = False
+
     def __init__(self, api_key: Optional[str] = None, model: str = "qwen-vl-max"):
         self.api_key = api_key or os.getenv("DASHSCOPE_API_KEY")
         if not self.api_key:
             raise ValueError("DASHSCOPE_API_KEY not found in environment")
 
-        # Qwen uses OpenAI-compatible API via DashScope
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
-        )
         self.model = model
 
-    def _image_to_base64(self, image: Image.Image) -> str:
-        buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode()
+    @property
+    def client(self) -> "AsyncOpenAI":
+        # Qwen uses OpenAI-compatible API via DashScope
+        return _openai_client(self.api_key, base_url="https://dashscope.aliyuncs.com/compatible-mode/v1")
+
+    async def _request(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system: Optional[str],
+        schema: Optional[dict] = None
+    ) -> dict:
+        encoded = await encode_image_async(image, self.accepted_formats, self.max_image_bytes)
+        return {
+            "model": self.model,
+            "messages": _openai_messages(prompt, {"url": encoded.data_url}, system),
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
 
     async def analyze_image(
         self,
         image: Image.Image,
         prompt: str,
         max_tokens: int = 4000,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
     ) -> str:
-        base64_image = self._image_to_base64(image)
-
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=max_tokens,
-            temperature=temperature
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        response = await get_limiter(self.provider).run(
+            lambda: self.client.chat.completions.create(**request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
         )
+        _record_openai_usage(response.usage)
 
         return response.choices[0].message.content or ""
 
+    async def stream_image(
+        self,
+        image: Image.Image,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.1,
+        system: Optional[str] = None,
+        schema: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        request = await self._request(image, prompt, max_tokens, temperature, system, schema)
+        async for text in get_limiter(self.provider).stream(
+            lambda: _stream_openai_chat(self.client, **request),
+            estimate_request_tokens(self.provider, image.size, prompt, max_tokens, system)
+        ):
+            yield text
+
+
+async def prewarm_connections(vision_model: VisionModelProtocol, connections: Optional[int] = None) -> int:
+    """Open pooled connections to the model's API (a router's: every member's).
+
+    Returns the number of connections opened. Providers outside the shared
+    transport (Gemini, mock) are skipped.
+    """
+    from .http_transport import prewarm
+
+    members = getattr(vision_model, "models", None)
+    models = members.values() if isinstance(members, dict) else [vision_model]
+    pooled = (OpenAIVisionModel, AnthropicVisionModel, DeepSeekVisionModel, QwenVisionModel)
+    urls = [str(model.client.base_url) for model in models if isinstance(model, pooled)]
+    if not urls:
+        return 0
+    return await prewarm(urls, connections)
+
 
 class VisionModelFactory:
     """Factory for creating vision model instances."""
@@ -279,7 +718,9 @@ class VisionModelFactory:
         "anthropic": AnthropicVisionModel,
         "gemini": GeminiVisionModel,
         "deepseek": DeepSeekVisionModel,
-        "qwen": QwenVisionModel
+        "qwen": QwenVisionModel,
+        "router": RoutingVisionModel,
+        "mock": MockVisionModel
     }
 
     @staticmethod
@@ -287,8 +728,9 @@ class VisionModelFactory:
         """Create a vision model instance.
 
         Args:
-            provider: Provider name (openai, anthropic, gemini, deepseek, qwen)
-            model: Optional model name override
+            provider: Provider name (openai, anthropic, gemini, deepseek, qwen, router, mock)
+            model: Optional model name override (for "router", a comma-separated
+                   provider list; for "mock", a recorded response file or directory)
 
         Returns:
             Vision model instance
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the sketch agent's Python hot paths.
+
+Runs against the ``mock`` vision provider (recorded responses, simulated
+latency), so it needs no network or API keys and measures only our own
+overhead:
+
+- single: end-to-end ``analyze_sketch`` latency with zero provider latency
+- batch: throughput at several concurrency levels with simulated latency
+- encode: image encoding cost by image size
+- parse: JSON parse + pydantic validation cost per recorded response
+- startup: wall time of a one-shot ``main_standalone.py`` run and of importing the agent
+
+Usage:
+    python benchmarks/bench_agent.py [--quick] [--only single,batch] [--json results.json]
+    python benchmarks/bench_agent.py --baseline results.json [--tolerance 0.2]
+
+With ``--baseline``, exits non-zero if any timing regressed by more than the
+tolerance against a previous ``--json`` run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Must be set before the agent reads its configuration
+os.environ.setdefault("SKETCH_CACHE_ENABLED", "0")
+os.environ.setdefault("SKETCH_STORE_ENABLED", "0")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import image_encoding
+from agents.image_encoding import encode_image
+from agents.mock_provider import DEFAULT_RESPONSES, MockVisionModel, load_responses
+from agents.sketch_agent_v2 import SketchAgent
+from agents.types import BatchItem, SketchMetadata
+from bench_preprocessing import synthetic_sheet
+
+
+AGENT_ROOT = Path(__file__).parent.parent
+
+
+def _metadata(sketch_id: str, size: tuple[int, int]) -> SketchMetadata:
+    return SketchMetadata(sketch_id=sketch_id, filename=f"{sketch_id}.png", file_size=0, dimensions=size)
+
+
+def _summary_ms(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+    }
+
+
+def _mock_agent(**mock_options) -> SketchAgent:
+    agent = SketchAgent(provider="mock", use_cache=False)
+    agent.vision_model = MockVisionModel(**mock_options)
+    return agent
+
+
+def bench_single(quick: bool) -> dict:
+    runs = 10 if quick else 30
+    sheet = synthetic_sheet(2480, 1754)
+    agent = _mock_agent(latency_ms=0)
+
+    async def run() -> list[float]:
+        samples = []
+        for i in range(runs):
+            # Fresh image each run so the encoding memo does not hide the cost
+            image = sheet.copy()
+            start = time.perf_counter()
+            await agent.analyze_sketch(image, _metadata(f"single-{i}", image.size))
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    return {"sheet": "2480x1754", **_summary_ms(asyncio.run(run()))}
+
+
+def bench_batch(quick: bool) -> dict:
+    items_per_level = 16 if quick else 64
+    levels = [1, 8, 32] if quick else [1, 4, 8, 16, 32]
+    latency_ms = 200
+    sheet = synthetic_sheet(1240, 877)
+    rows = []
+
+    for concurrency in levels:
+        agent = _mock_agent(latency_ms=latency_ms, latency_sigma=0.3, seed=1)
+
+        def items():
+            for i in range(items_per_level):
+                image = sheet.copy()
+                yield BatchItem(image=image, metadata=_metadata(f"batch-{i}", image.size))
+
+        start = time.perf_counter()
+        results = asyncio.run(agent.analyze_batch(items(), max_concurrency=concurrency))
+        elapsed = time.perf_counter() - start
+
+        # Throughput the mock latency alone would allow at this concurrency
+        ideal = min(concurrency, items_per_level) / (latency_ms / 1000)
+        rows.append({
+            "concurrency": concurrency,
+            "items": items_per_level,
+            "failed": sum(not r.success for r in results),
+            "wall_s": round(elapsed, 3),
+            "sheets_per_s": round(items_per_level / elapsed, 2),
+            "efficiency": round(items_per_level / elapsed / ideal, 3),
+        })
+
+    return {"mock_latency_s": latency_ms / 1000, "levels": rows}
+
+
+def bench_encode(quick: bool) -> dict:
+    sizes = [(1024, 724), (2048, 1448), (4096, 2896)] + ([] if quick else [(8192, 5793)])
+    rows = []
+
+    for width, height in sizes:
+        image = synthetic_sheet(width, height)
+        samples = []
+        for _ in range(3):
+            image_encoding._memo.clear()
+            start = time.perf_counter()
+            encoded = encode_image(image)
+            samples.append(time.perf_counter() - start)
+        rows.append({
+            "size": f"{width}x{height}",
+            "bytes": len(encoded),
+            **_summary_ms(samples),
+        })
+
+    return {"sizes": rows}
+
+
+def bench_parse(quick: bool) -> dict:
+    iterations = 200 if quick else 2000
+    agent = _mock_agent()
+    rows = []
+
+    for path in sorted(DEFAULT_RESPONSES.iterdir()):
+        (response,) = load_responses(path)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parsed = agent._parse_json_response(response)
+        parse_s = (time.perf_counter() - start) / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            agent._validate_result(parsed)
+        validate_s = (time.perf_counter() - start) / iterations
+
+        rows.append({
+            "response": path.name,
+            "bytes": len(response),
+            "parse_us": round(parse_s * 1e6, 2),
+            "validate_us": round(validate_s * 1e6, 2),
+        })
+
+    return {"iterations": iterations, "responses": rows}
+
+
+def bench_startup(quick: bool) -> dict:
+    runs = 2 if quick else 5
+    env = {**os.environ, "VISION_PROVIDER": "mock", "SKETCH_CACHE_ENABLED": "0", "SKETCH_STORE_ENABLED": "0"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = Path(tmp) / "sheet.png"
+        synthetic_sheet(1240, 877).save(image_path)
+
+        def wall(cmd: list[str]) -> list[float]:
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                subprocess.run(cmd, cwd=AGENT_ROOT, env=env, check=True, capture_output=True)
+                samples.append(time.perf_counter() - start)
+            return samples
+
+        one_shot = wall([sys.executable, "main_standalone.py", str(image_path)])
+        imports = wall([sys.executable, "-c", "import agents.sketch_agent_v2"])
+
+    return {"one_shot": _summary_ms(one_shot), "import_agent": _summary_ms(imports)}
+
+
+SUITES = {
+    "single": bench_single,
+    "batch": bench_batch,
+    "encode": bench_encode,
+    "parse": bench_parse,
+    "startup": bench_startup,
+}
+
+
+def _timings(results: dict, prefix: str = "") -> dict[str, float]:
+    """Flatten lower-is-better timings (``*_ms``, ``*_us``, ``wall_s``) for comparison."""
+    flat = {}
+    if isinstance(results, dict):
+        label = results.get("size") or results.get("response") or results.get("concurrency")
+        base = f"{prefix}[{label}]" if label is not None else prefix
+        for key, value in results.items():
+            path = f"{base}.{key}" if base else key
+            if isinstance(value, (dict, list)):
+                flat.update(_timings(value, path))
+            elif key.endswith(("_ms", "_us")) or key == "wall_s":
+                flat[path] = value
+    elif isinstance(results, list):
+        for value in results:
+            flat.update(_timings(value, prefix))
+    return flat
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    current = _timings(results)
+    regressions = []
+    for key, before in _timings(baseline).items():
+        after = current.get(key)
+        if after is None or not before:
+            continue
+        if after > before * (1 + tolerance):
+            regressions.append(f"{key}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", help=f"Comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and sizes")
+    parser.add_argument("--json", metavar="PATH", help="Write machine-readable results")
+    parser.add_argument("--baseline", metavar="PATH", help="Fail on regressions against a previous --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (default 0.2)")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(SUITES)
+    unknown = [name for name in selected if name not in SUITES]
+    if unknown:
+        parser.error(f"Unknown suite(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in selected:
+        start = time.perf_counter()
+        results[name] = SUITES[name](args.quick)
+        print(f"== {name} ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+        print(json.dumps(results[name], indent=2), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "suites": results,
+    }
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline.get("suites", {}), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
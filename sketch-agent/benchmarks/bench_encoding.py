@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Benchmark line-art aware image compression against the previous encoding.
+
+For ``tmp/om.png`` and synthetic sheets, encodes each image for every
+provider with compression off (original file bytes, else RGB PNG) and on
+(``SKETCH_IMAGE_COMPRESSION=auto``), and reports the representation chosen,
+the base64 payload, and the encode time.
+
+End-to-end latency is measured with ``OpenAIVisionModel`` against a local
+stand-in for ``/v1/chat/completions`` that reads the request body at
+``--uplink-mbps`` and answers with a recorded mock response, so the upload
+cost of the payload shows up as it would on a real link.
+
+Usage:
+    python benchmarks/bench_encoding.py [--uplink-mbps 20] [--runs 3] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import image_encoding
+from agents.image_encoding import encode_image
+from agents.mock_provider import DEFAULT_RESPONSES, load_responses
+from agents.vision_providers import (
+    AnthropicVisionModel,
+    DeepSeekVisionModel,
+    GeminiVisionModel,
+    OpenAIVisionModel,
+    QwenVisionModel
+)
+from bench_preprocessing import SAMPLE_DRAWING, synthetic_sheet
+
+
+PROVIDERS = {
+    model.provider: model
+    for model in (OpenAIVisionModel, AnthropicVisionModel, GeminiVisionModel, DeepSeekVisionModel, QwenVisionModel)
+}
+
+
+def sheets() -> list[tuple[str, Image.Image]]:
+    result = []
+    if SAMPLE_DRAWING.exists():
+        result.append(("om.png", Image.open(SAMPLE_DRAWING)))
+    result.append(("synthetic A3", synthetic_sheet(2048, 1448)))
+    result.append(("synthetic A1", synthetic_sheet(4000, 2800)))
+    return result
+
+
+def _encode(image: Image.Image, mode: str, accepted: dict, max_bytes: int):
+    image_encoding.COMPRESSION = mode
+    image_encoding._memo.clear()
+    start = time.perf_counter()
+    encoded = encode_image(image, accepted, max_bytes)
+    return encoded, (time.perf_counter() - start) * 1000
+
+
+def measure_encoding(name: str, image: Image.Image) -> list[dict]:
+    rows = []
+    for provider, model in PROVIDERS.items():
+        for mode in ("off", "auto"):
+            encoded, elapsed = _encode(image, mode, model.accepted_formats, model.max_image_bytes)
+            rows.append({
+                "sheet": name,
+                "provider": provider,
+                "compression": mode,
+                "kind": encoded.kind or "-",
+                "media_type": encoded.media_type,
+                "payload_bytes": len(encoded.base64),
+                "encode_ms": round(elapsed, 1),
+            })
+    return rows
+
+
+class ThrottledCompletions(BaseHTTPRequestHandler):
+    """Reads the request body at a fixed rate, then returns a chat completion."""
+
+    bytes_per_second: float
+    answer: str
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        chunk = 64 * 1024
+        while remaining:
+            start = time.perf_counter()
+            read = len(self.rfile.read(min(chunk, remaining)))
+            remaining -= read
+            time.sleep(max(0.0, read / self.bytes_per_second - (time.perf_counter() - start)))
+
+        body = json.dumps({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(uplink_mbps: float) -> ThreadingHTTPServer:
+    ThrottledCompletions.bytes_per_second = uplink_mbps * 1_000_000 / 8
+    ThrottledCompletions.answer = load_responses(DEFAULT_RESPONSES)[0]
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledCompletions)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _request_ms(model, image: Image.Image, mode: str) -> float:
+    image_encoding.COMPRESSION = mode
+    image_encoding._memo.clear()
+    start = time.perf_counter()
+    await model.analyze_image(image, "Analyze this drawing.", max_tokens=1000)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure_requests(images: list[tuple[str, Image.Image]], uplink_mbps: float, runs: int) -> list[dict]:
+    server = start_server(uplink_mbps)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    model = OpenAIVisionModel()
+
+    async def run() -> list[dict]:
+        rows = []
+        for name, image in images:
+            for mode in ("off", "auto"):
+                await _request_ms(model, image, mode)
+                samples = [await _request_ms(model, image, mode) for _ in range(runs)]
+                rows.append({
+                    "sheet": name,
+                    "compression": mode,
+                    "request_ms": round(statistics.median(samples), 1),
+                })
+        return rows
+
+    try:
+        return asyncio.run(run())
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uplink-mbps", type=float, default=20.0, help="Simulated upload bandwidth")
+    parser.add_argument("--runs", type=int, default=3, help="Requests per sheet and mode (median reported)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    images = sheets()
+    report = {"uplink_mbps": args.uplink_mbps, "encoding": [], "requests": []}
+    for name, image in images:
+        report["encoding"].extend(measure_encoding(name, image))
+    try:
+        report["requests"] = measure_requests(images, args.uplink_mbps, args.runs)
+    except ImportError as e:
+        print(f"Skipping end-to-end requests: {e}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    header = f"{'sheet':<14} {'provider':<10} {'mode':<5} {'kind':<15} {'type':<11} {'payload':>11} {'encode_ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in report["encoding"]:
+        print(
+            f"{row['sheet']:<14} {row['provider']:<10} {row['compression']:<5} {row['kind']:<15} "
+            f"{row['media_type']:<11} {row['payload_bytes']:>11,} {row['encode_ms']:>10.1f}"
+        )
+
+    if report["requests"]:
+        print()
+        print(f"OpenAI request latency at {args.uplink_mbps:g} Mbit/s uplink (median of {args.runs})")
+        header = f"{'sheet':<14} {'mode':<5} {'request_ms':>11}"
+        print(header)
+        print("-" * len(header))
+        for row in report["requests"]:
+            print(f"{row['sheet']:<14} {row['compression']:<5} {row['request_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Benchmark peak memory of a batch of very large scans.
+
+Builds two synthetic A0 scans at ``--dpi`` (grayscale line art, one PNG and
+one JPEG) and analyzes ``--sheets`` copies of them with the ``mock``
+provider (``--latency-ms`` of simulated model time per request) at
+concurrency 1, 8 and 32, three ways:
+
+- ``full``: sheets loaded at full resolution (``SKETCH_REDUCED_LOADING=0``),
+  no memory budget - the previous behaviour;
+- ``reduced``: sheets decoded straight to about twice the provider budget
+  (JPEG draft mode, PNG reduce);
+- ``budget``: reduced loading plus admission control with
+  ``--budget-mb`` (``SKETCH_MEMORY_BUDGET_MB``).
+
+Each run is a separate process so its peak RSS (``ru_maxrss``) is its own.
+Reports peak RSS, wall time and, for the budget runs, how many sheets
+waited for memory.
+
+Usage:
+    python benchmarks/bench_memory.py [--sheets 32] [--dpi 200] [--latency-ms 2000] [--budget-mb 512] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Must be set before the agent reads its configuration
+os.environ.setdefault("SKETCH_CACHE_ENABLED", "0")
+os.environ.setdefault("SKETCH_STORE_ENABLED", "0")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+A0_MM = (1189, 841)
+CONCURRENCY = (1, 8, 32)
+MODES = ("full", "reduced", "budget")
+
+
+def build_scans(directory: Path, dpi: int) -> list[str]:
+    """An A0 plan as a grayscale scan: grid, walls, hatching and dimension text."""
+    from PIL import Image, ImageDraw
+
+    width, height = (round(mm / 25.4 * dpi) for mm in A0_MM)
+    image = Image.new("L", (width, height), 238)
+    draw = ImageDraw.Draw(image)
+    step = dpi  # one grid bay per inch
+    for x in range(step, width, step):
+        draw.line((x, 0, x, height), fill=90, width=2)
+    for y in range(step, height, step):
+        draw.line((0, y, width, y), fill=90, width=2)
+    for i, x in enumerate(range(step, width - step, step)):
+        for j, y in enumerate(range(step, height - step, step)):
+            draw.rectangle((x + 8, y + 8, x + step - 8, y + step - 8), outline=20, width=4)
+            if (i + j) % 3 == 0:
+                for k in range(0, step - 16, 12):
+                    draw.line((x + 8 + k, y + step - 8, x + 8, y + step - 8 - k), fill=60)
+            draw.text((x + 14, y + 14), f"{(i * 7 + j) % 90 + 10}00", fill=0)
+    paths = [str(directory / "scan_a0.png"), str(directory / "scan_a0.jpg")]
+    image.save(paths[0], optimize=False)
+    image.save(paths[1], quality=85)
+    return paths
+
+
+async def run_batch(paths: list[str], sheets: int, concurrency: int) -> dict:
+    from agents.sketch_agent_v2 import SketchAgent
+    from agents.types import BatchItem
+
+    agent = SketchAgent(provider="mock", use_cache=False)
+    items = [BatchItem(image_path=paths[i % len(paths)]) for i in range(sheets)]
+    start = time.perf_counter()
+    failed = 0
+    async for batch_result in agent.iter_batch(items, concurrency):
+        failed += not batch_result.success
+    return {
+        "wall_s": round(time.perf_counter() - start, 2),
+        "failed": failed,
+        "memory": agent.memory_budget.snapshot(),
+    }
+
+
+def child(args) -> None:
+    """One run in this process; prints its report as JSON."""
+    import PIL.Image  # noqa: F401 - counted in the baseline, not the run
+    import agents.sketch_agent_v2  # noqa: F401
+
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    report = asyncio.run(run_batch(args.paths, args.sheets, args.concurrency))
+    report["baseline_rss_mb"] = round(baseline_mb)
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    print(json.dumps(report))
+
+
+def run_child(paths: list[str], mode: str, concurrency: int, args) -> dict:
+    env = dict(os.environ, SKETCH_MOCK_LATENCY_MS=str(args.latency_ms))
+    env["SKETCH_REDUCED_LOADING"] = "0" if mode == "full" else "1"
+    env["SKETCH_MEMORY_BUDGET_MB"] = str(args.budget_mb) if mode == "budget" else "0"
+    command = [
+        sys.executable, __file__, "--child",
+        "--sheets", str(args.sheets), "--concurrency", str(concurrency), *paths
+    ]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    row = {"mode": mode, "concurrency": concurrency}
+    if completed.returncode != 0:
+        # Killed by the OOM killer, typically
+        return row | {"error": completed.stderr.strip().splitlines()[-1:] or f"exit {completed.returncode}"}
+    return row | json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, default=32)
+    parser.add_argument("--dpi", type=int, default=200, help="Scan resolution of the synthetic A0 sheets")
+    parser.add_argument("--latency-ms", type=float, default=2000, help="Simulated model time per request")
+    parser.add_argument("--budget-mb", type=int, default=512, help="Memory budget of the 'budget' runs")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--concurrency", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build_scans(Path(tmp), args.dpi)
+        from PIL import Image
+        with Image.open(paths[0]) as scan:
+            size = scan.size
+        rows = [
+            run_child(paths, mode, concurrency, args)
+            for concurrency in CONCURRENCY
+            for mode in MODES
+        ]
+
+    report = {"sheets": args.sheets, "scan_size": size, "budget_mb": args.budget_mb, "runs": rows}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(
+        f"{args.sheets} A0 scans ({size[0]}x{size[1]}, grayscale PNG/JPEG), "
+        f"{args.latency_ms:g} ms simulated model time, budget {args.budget_mb} MB"
+    )
+    header = f"{'concurrency':>11} {'mode':<8} {'peak_rss_mb':>11} {'wall_s':>7} {'waited':>6}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if "error" in row:
+            print(f"{row['concurrency']:>11} {row['mode']:<8} {'failed: ' + str(row['error']):>11}")
+            continue
+        waited = row["memory"]["waited"] if row["mode"] == "budget" else ""
+        print(
+            f"{row['concurrency']:>11} {row['mode']:<8} {row['peak_rss_mb']:>11,} "
+            f"{row['wall_s']:>7.2f} {waited:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
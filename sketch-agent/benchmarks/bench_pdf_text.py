@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Benchmark PDF text-layer extraction on a sample drawing set.
+
+Builds a vector PDF set: ``tmp/om.pdf`` (a CAD export), synthetic plans
+with a title block, specification pages and schedules. The set is then
+analyzed with the ``mock`` provider (``--latency-ms`` of simulated model
+time per request) twice: with the text layer off (every page rasterized
+and sent to the model) and on (text-only pages answered from the text
+layer, the others sent at reduced detail with their text in the prompt).
+
+Reports vision requests, input and output tokens, wall time and the
+per-page extraction cost, plus the title block read from each page.
+
+Usage:
+    python benchmarks/bench_pdf_text.py [--latency-ms 3000] [--concurrency 4] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Must be set before the agent reads its configuration
+os.environ.setdefault("SKETCH_CACHE_ENABLED", "0")
+os.environ.setdefault("SKETCH_STORE_ENABLED", "0")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.pdf_source import _open_document, iter_pdf_pages
+from agents.pdf_text import extract_page_text, text_layer_facts
+from agents.sketch_agent_v2 import SketchAgent
+from agents.types import TokenUsage
+
+
+SAMPLE_PDF = Path(__file__).parent.parent / "tmp" / "om.pdf"
+
+A1 = (2384, 1684)
+A3 = (1191, 842)
+
+
+def _title_block(page, number: int, title: str) -> None:
+    """Border and a labelled title block, as CAD templates draw them."""
+    import pymupdf
+
+    width, height = page.rect.width, page.rect.height
+    page.draw_rect(pymupdf.Rect(20, 20, width - 20, height - 20), width=1.5)
+    left, top = width - 420, height - 140
+    page.draw_rect(pymupdf.Rect(left, top, width - 20, height - 20), width=1)
+    for y in (top + 40, top + 80):
+        page.draw_line((left, y), (width - 20, y))
+    for x in (left + 130, left + 260):
+        page.draw_line((x, top + 40), (x, height - 20))
+    cells = [
+        (left + 5, top + 8, "PROJECT TITLE", "MARINA VIEW TOWER - PODIUM WORKS"),
+        (left + 5, top + 48, "PROJECT No.", "P-2291"),
+        (left + 135, top + 48, "SCALE", "1:100" if number % 2 else "NTS"),
+        (left + 265, top + 48, "DATE", "12.05.2026"),
+        (left + 5, top + 88, "DRAWING No.", f"MVT-ARC-{100 + number:03d}"),
+        (left + 135, top + 88, "REV.", "C"),
+        (left + 265, top + 88, "DRAWN", "JK"),
+    ]
+    for x, y, label, value in cells:
+        page.insert_text((x, y + 6), label, fontsize=6)
+        page.insert_text((x, y + 22), value, fontsize=9)
+    page.insert_text((40, 50), title, fontsize=16)
+
+
+def _spec_page(document, number: int) -> None:
+    import pymupdf
+
+    page = document.new_page(width=A3[0], height=A3[1])
+    _title_block(page, number, f"SPECIFICATION - SECTION 0{number} 30 00")
+    clauses = [
+        f"{i}. Concrete for {part} shall be grade C{30 + 5 * (i % 3)}/{37 + 5 * (i % 3)} to BS EN 206 with "
+        f"a maximum water/cement ratio of 0.{40 + i % 5} and minimum cover of {40 + 5 * (i % 4)} mm."
+        for i, part in enumerate(["footings", "raft", "columns", "walls", "slabs", "beams", "stairs",
+                                  "ramps", "tanks", "plinths", "kerbs", "pits"] * 2, 1)
+    ]
+    page.insert_textbox(pymupdf.Rect(40, 80, A3[0] - 460, A3[1] - 40), "\n".join(clauses), fontsize=8)
+
+
+def _schedule_page(document, number: int) -> None:
+    page = document.new_page(width=A3[0], height=A3[1])
+    _title_block(page, number, "DOOR SCHEDULE")
+    columns = ["MARK", "SIZE (W x H)", "TYPE", "MATERIAL", "FIRE RATING", "HARDWARE", "REMARKS"]
+    x_positions = [40 + 105 * i for i in range(len(columns))]
+    for row in range(32):
+        y = 90 + row * 18
+        page.draw_line((40, y - 12), (40 + 105 * len(columns), y - 12), width=0.3)
+        values = columns if row == 0 else [
+            f"D{number}{row:02d}", f"{800 + 100 * (row % 4)} x 2100", ["Single", "Double", "Sliding"][row % 3],
+            ["Timber", "Steel", "Aluminium"][row % 3], ["-", "FD30", "FD60"][row % 3],
+            f"Set H{row % 6 + 1}", "Vision panel" if row % 5 == 0 else ""
+        ]
+        for x, value in zip(x_positions, values):
+            page.insert_text((x, y), value, fontsize=7)
+
+
+def _plan_page(document, number: int) -> None:
+    page = document.new_page(width=A1[0], height=A1[1])
+    _title_block(page, number, f"LEVEL {number} GENERAL ARRANGEMENT PLAN")
+    width, height = A1
+    for i in range(24):
+        x = 120 + i * 80
+        page.draw_line((x, 100), (x, height - 200), width=0.4, dashes="[6 3] 0")
+        page.insert_text((x - 4, 90), chr(65 + i % 26), fontsize=10)
+    for j in range(16):
+        y = 120 + j * 80
+        page.draw_line((100, y), (width - 460, y), width=0.4, dashes="[6 3] 0")
+    # Walls, door swings and hatching
+    for i in range(23):
+        for j in range(15):
+            x, y = 120 + i * 80, 120 + j * 80
+            page.draw_rect((x + 6, y + 6, x + 74, y + 74), width=1.2)
+            page.draw_circle((x + 6, y + 40), 12, width=0.3)
+            if (i + j) % 3 == 0:
+                for k in range(0, 68, 6):
+                    page.draw_line((x + 6 + k, y + 74), (x + 6, y + 74 - k), width=0.2)
+    for i in range(23):
+        page.insert_text((140 + i * 80, height - 170), "8000", fontsize=7)
+    page.insert_text((40, height - 120), "1. ALL DIMENSIONS ARE IN MILLIMETERS UNLESS NOTED OTHERWISE.", fontsize=8)
+    page.insert_text((40, height - 108), "2. DO NOT SCALE FROM THIS DRAWING; USE FIGURED DIMENSIONS ONLY.", fontsize=8)
+
+
+def build_sample_set(path: Path) -> list[str]:
+    """Write the sample set to ``path``; returns the kind of each page."""
+    import pymupdf
+
+    document = pymupdf.open()
+    kinds = []
+    if SAMPLE_PDF.exists():
+        with pymupdf.open(str(SAMPLE_PDF)) as sample:
+            document.insert_pdf(sample, to_page=0)
+        kinds.append("cad drawing")
+    for number in (1, 2):
+        _plan_page(document, number)
+        kinds.append("plan")
+    for number in (3, 4, 5):
+        _spec_page(document, number)
+        kinds.append("specification")
+    for number in (6, 7):
+        _schedule_page(document, number)
+        kinds.append("schedule")
+    document.save(str(path))
+    document.close()
+    return kinds
+
+
+def extraction_costs(path: Path) -> list[dict]:
+    """Per page: extraction time, text size, path count and whether it is text only."""
+    rows = []
+    with _open_document(str(path)) as document:
+        for page_number in range(1, document.page_count + 1):
+            start = time.perf_counter()
+            page_text = extract_page_text(document, page_number)
+            elapsed = (time.perf_counter() - start) * 1000
+            facts = text_layer_facts(page_text) if page_text else None
+            metadata = facts.project_metadata if facts else None
+            rows.append({
+                "page": page_number,
+                "extract_ms": round(elapsed, 1),
+                "chars": page_text.chars if page_text else 0,
+                "path_ops": page_text.path_ops if page_text else 0,
+                "text_only": bool(page_text and page_text.text_only),
+                "drawing_number": metadata.drawing_number if metadata else None,
+                "revision": metadata.revision if metadata else None,
+                "scale": metadata.scale if metadata else None,
+            })
+    return rows
+
+
+async def run_set(path: Path, text_layer: bool, concurrency: int) -> dict:
+    agent = SketchAgent(provider="mock", use_cache=False)
+    usage = TokenUsage()
+    start = time.perf_counter()
+    failed = 0
+    async for batch_result in agent.iter_batch(
+        iter_pdf_pages(str(path), pages=None, text_layer=text_layer), concurrency
+    ):
+        if not batch_result.success:
+            failed += 1
+            continue
+        page_usage = batch_result.result.telemetry.usage
+        for field in ("requests", "input_tokens", "output_tokens"):
+            setattr(usage, field, getattr(usage, field) + getattr(page_usage, field))
+    return {
+        "text_layer": text_layer,
+        "requests": usage.requests,
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "failed": failed,
+        "wall_s": round(time.perf_counter() - start, 2),
+        "stats": agent.text_layer_stats.snapshot() if text_layer else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=3000, help="Simulated model time per request")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    os.environ["SKETCH_MOCK_LATENCY_MS"] = str(args.latency_ms)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sample_set.pdf"
+        kinds = build_sample_set(path)
+        pages = extraction_costs(path)
+        for row, kind in zip(pages, kinds):
+            row["kind"] = kind
+        runs = [asyncio.run(run_set(path, text_layer, args.concurrency)) for text_layer in (False, True)]
+
+    off, on = runs
+    report = {
+        "pages": pages,
+        "runs": runs,
+        "requests_saved": off["requests"] - on["requests"],
+        "input_tokens_saved": off["input_tokens"] - on["input_tokens"],
+        "output_tokens_saved": off["output_tokens"] - on["output_tokens"],
+        "time_saved_s": round(off["wall_s"] - on["wall_s"], 2),
+        "median_extract_ms": round(statistics.median(row["extract_ms"] for row in pages), 1),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    header = f"{'page':>4} {'kind':<14} {'extract_ms':>10} {'chars':>6} {'paths':>7} {'text_only':>9}  title block"
+    print(header)
+    print("-" * len(header))
+    for row in pages:
+        title = " ".join(str(row[f]) for f in ("drawing_number", "revision", "scale") if row[f])
+        print(
+            f"{row['page']:>4} {row['kind']:<14} {row['extract_ms']:>10.1f} {row['chars']:>6} "
+            f"{row['path_ops']:>7} {str(row['text_only']):>9}  {title}"
+        )
+    print()
+    print(f"{len(pages)} pages, {args.latency_ms:g} ms simulated model time, concurrency {args.concurrency}")
+    header = f"{'text layer':<10} {'requests':>8} {'input_tok':>10} {'output_tok':>10} {'wall_s':>7}"
+    print(header)
+    print("-" * len(header))
+    for run in runs:
+        print(
+            f"{'on' if run['text_layer'] else 'off':<10} {run['requests']:>8} {run['input_tokens']:>10,} "
+            f"{run['output_tokens']:>10,} {run['wall_s']:>7.2f}"
+        )
+    print(
+        f"saved: {report['requests_saved']} requests, {report['input_tokens_saved']:,} input and "
+        f"{report['output_tokens_saved']:,} output tokens, {report['time_saved_s']} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
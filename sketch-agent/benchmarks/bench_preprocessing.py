@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark provider-aware downscaling/tiling against the full-resolution path.
+
+For each provider budget and test sheet, reports the bytes that would be
+sent (base64 payload), local preprocessing + encoding wall time, and the
+estimated upload time at a given uplink bandwidth.
+
+Usage:
+    python benchmarks/bench_preprocessing.py [--uplink-mbps 20] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import image_encoding
+from agents.image_encoding import encode_image
+from agents.image_preprocessing import PROVIDER_BUDGETS, prepare_image
+
+
+SAMPLE_DRAWING = Path(__file__).parent.parent / "tmp" / "om.png"
+
+
+def synthetic_sheet(width: int, height: int) -> Image.Image:
+    """Line-art sheet with a grid, boxes, dimension strings and a title block."""
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    step = max(40, width // 60)
+    for x in range(0, width, step):
+        draw.line([(x, 0), (x, height)], fill=(200, 200, 200), width=1)
+    for y in range(0, height, step):
+        draw.line([(0, y), (width, y)], fill=(200, 200, 200), width=1)
+    for i in range(0, width - 4 * step, 3 * step):
+        draw.rectangle([i + step, step * 2, i + 3 * step, step * 6], outline="black", width=3)
+        draw.text((i + step, step * 6 + 10), f"{(i % 9000) + 1200} mm", fill="black")
+    draw.rectangle([width - 12 * step, height - 5 * step, width - step, height - step], outline="black", width=4)
+    draw.text((width - 11 * step, height - 4 * step), "PROJECT: SAMPLE TOWER  DWG A-101  REV C", fill="black")
+    return image
+
+
+def _clear_memo():
+    image_encoding._memo.clear()
+
+
+def _payload(images: list[Image.Image]) -> int:
+    return sum(len(encode_image(image).base64) for image in images)
+
+
+def measure(name: str, image: Image.Image, provider: str, uplink_mbps: float) -> list[dict]:
+    rows = []
+
+    def row(path: str, elapsed: float, payload: int, requests: int) -> dict:
+        return {
+            "sheet": name,
+            "size": f"{image.width}x{image.height}",
+            "provider": provider,
+            "path": path,
+            "requests": requests,
+            "payload_bytes": payload,
+            "local_s": round(elapsed, 3),
+            "est_upload_s": round(payload * 8 / (uplink_mbps * 1e6), 3),
+        }
+
+    _clear_memo()
+    start = time.perf_counter()
+    payload = _payload([image])
+    rows.append(row("full", time.perf_counter() - start, payload, 1))
+
+    _clear_memo()
+    start = time.perf_counter()
+    prepared = prepare_image(image, provider)
+    payload = _payload([prepared.overview])
+    rows.append(row("downscaled", time.perf_counter() - start, payload, 1))
+
+    _clear_memo()
+    start = time.perf_counter()
+    prepared = prepare_image(image, provider, tiling=True)
+    images = [prepared.overview, *(tile.image for tile in prepared.tiles)]
+    payload = _payload(images)
+    rows.append(row("tiled", time.perf_counter() - start, payload, len(images)))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uplink-mbps", type=float, default=20.0)
+    parser.add_argument("--providers", default=",".join(PROVIDER_BUDGETS))
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    sheets = {"A3@150dpi": synthetic_sheet(2480, 1754), "A1@200dpi": synthetic_sheet(6622, 4677)}
+    if SAMPLE_DRAWING.exists():
+        sheets = {"om.png": Image.open(SAMPLE_DRAWING), **sheets}
+
+    rows = []
+    for name, image in sheets.items():
+        for provider in args.providers.split(","):
+            rows.extend(measure(name, image, provider, args.uplink_mbps))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    header = f"{'sheet':<10} {'provider':<10} {'path':<11} {'req':>3} {'payload':>12} {'local_s':>8} {'upload_s':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['sheet']:<10} {r['provider']:<10} {r['path']:<11} {r['requests']:>3} "
+            f"{r['payload_bytes']:>12,} {r['local_s']:>8.3f} {r['est_upload_s']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Benchmark result validation and serialization on a large synthetic takeoff.
+
+Compares the dict path (extract the JSON into dicts, ``SketchAnalysisResult(**d)``,
+``model_dump()``, indented ``json.dumps``) with the fast path the agent and
+CLI now use (``model_validate_json`` on the response text, compact output
+serialized from the model by ``utils.json_output``). Reports the median of
+several runs for each step, and the output size.
+
+Usage:
+    python benchmarks/bench_results.py [--items 1000] [--runs 20] [--json]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.sketch_agent_v2 import SketchAgent
+from agents.types import SketchAnalysisResult
+from utils.json_output import dumps
+
+
+def synthetic_response(items: int, seed: int = 1) -> str:
+    """A fenced model answer with ``items`` dimensions, materials and components."""
+    rng = random.Random(seed)
+    technical = {"dimensions": [], "materials": [], "components": [], "quantities": {"concrete_volume_m3": 412.5}}
+    for i in range(items):
+        kind = i % 3
+        if kind == 0:
+            technical["dimensions"].append({
+                "label": f"Grid {i % 24} to {i % 24 + 1} spacing",
+                "value": round(rng.uniform(300, 9000), 1),
+                "unit": "mm",
+                "views": ["Ground Floor Plan", "Section A-A"],
+                "derived_from": None,
+                "location": f"Bay {i % 12}",
+                "confidence": 0.9,
+            })
+        elif kind == 1:
+            technical["materials"].append({
+                "component": f"Beam B{i}",
+                "spec": "UB 305x165x40 S355 to BS EN 10025",
+                "location": f"Level {i % 4}",
+                "grade": "S355",
+                "standard": "BS EN 10025",
+                "quantity": float(i % 17 + 1),
+                "unit": "nr",
+                "finish": "Hot-dip galvanized",
+                "color": None,
+            })
+        else:
+            technical["components"].append({
+                "type": "Column",
+                "description": f"Steel column C{i} on pad footing",
+                "size": "UC 203x203x46",
+                "count": i % 9 + 1,
+                "location": f"Grid {chr(65 + i % 8)}/{i % 20}",
+                "material": "S355",
+                "connection_type": "Bolted base plate",
+            })
+
+    answer = {
+        "context_layer": {"document_type": "Structural General Arrangement", "key_features": ["Steel frame"]},
+        "project_metadata": {"project_title": "Logistics Warehouse", "drawing_number": "S-201", "revision": "C"},
+        "technical_data": technical,
+        "specifications": [f"Specification clause {n}" for n in range(40)],
+        "standards": ["BS EN 1993-1-1", "Dubai Building Code 2021"],
+        "confidence_score": 0.82,
+    }
+    return "```json\n" + json.dumps(answer, indent=2) + "\n```"
+
+
+def median_ms(fn, runs: int) -> float:
+    fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000, help="Technical data entries in the result")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    agent = SketchAgent(provider="mock", use_cache=False)
+    response = synthetic_response(args.items)
+    result = agent._parse_result(response)
+
+    def dict_validate():
+        return SketchAnalysisResult(**agent._parse_json_response(response))
+
+    def dict_serialize():
+        return json.dumps({"success": True, "result": result.model_dump()}, indent=2)
+
+    def fast_validate():
+        return agent._parse_result(response)
+
+    def fast_serialize():
+        return dumps({"success": True, "result": result})
+
+    report = {"items": args.items, "response_bytes": len(response), "paths": {}}
+    for name, validate, serialize in (
+        ("dict", dict_validate, dict_serialize),
+        ("fast", fast_validate, fast_serialize),
+    ):
+        validate_ms = median_ms(validate, args.runs)
+        serialize_ms = median_ms(serialize, args.runs)
+        report["paths"][name] = {
+            "validate_ms": round(validate_ms, 2),
+            "serialize_ms": round(serialize_ms, 2),
+            "total_ms": round(validate_ms + serialize_ms, 2),
+            "output_bytes": len(serialize()),
+        }
+    dict_path, fast_path = report["paths"]["dict"], report["paths"]["fast"]
+    report["speedup"] = round(dict_path["total_ms"] / fast_path["total_ms"], 2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.items} items, {len(response):,} byte response, median of {args.runs} runs")
+    header = f"{'path':<6} {'validate_ms':>12} {'serialize_ms':>13} {'total_ms':>9} {'output':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in report["paths"].items():
+        print(
+            f"{name:<6} {row['validate_ms']:>12.2f} {row['serialize_ms']:>13.2f} "
+            f"{row['total_ms']:>9.2f} {row['output_bytes']:>10,}"
+        )
+    print(f"speedup: {report['speedup']}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Benchmark result-store queries against rescanning result JSON.
+
+Indexes ``--sheets`` synthetic results (spread over ``--projects``
+projects, ~60 facts each) into a temporary ``ResultStore`` and times typical
+cross-sheet questions two ways: from the store's indexes, and the way
+callers answered them before - parsing every stored result JSON and walking
+its tree. Reports indexing cost per sheet and the median query time.
+
+Usage:
+    python benchmarks/bench_store.py [--sheets 2000] [--projects 10] [--runs 20] [--json]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.result_store import ResultStore, to_millimetres
+from agents.types import (
+    DetailedComponent,
+    DetailedDimension,
+    DetailedMaterial,
+    ProjectMetadata,
+    SketchAnalysisResult,
+    TechnicalData
+)
+
+
+GRADES = ["C25/30", "C30/37", "C32/40", "C35/45", "C40/50", "C45/55"]
+LABELS = ["Grid spacing", "Slab thickness", "Wall height", "Beam depth", "Column width", "Door width"]
+
+
+def synthetic_result(project: int, sheet: int, rng: random.Random) -> SketchAnalysisResult:
+    dimensions = [
+        DetailedDimension(
+            label=f"{rng.choice(LABELS)} {chr(65 + i % 8)}",
+            value=rng.choice([150, 200, 250, 600, 900, 1200, 3000, 6000, 7500, 9000]),
+            unit="mm",
+            views=["Plan"],
+            location=f"Bay {i % 12}"
+        )
+        for i in range(30)
+    ]
+    materials = [
+        DetailedMaterial(
+            component=rng.choice(["Pad footing", "Raft slab", "Core wall", "Transfer beam", "Column"]),
+            spec=f"Reinforced concrete {grade} to BS EN 206",
+            grade=grade,
+            standard="BS EN 206",
+            location=f"Level {i % 6}"
+        )
+        for i, grade in enumerate(rng.choices(GRADES, k=12))
+    ]
+    components = [
+        DetailedComponent(type="Column", description=f"Steel column C{i}", size="UC 203x203x46", count=i % 9 + 1)
+        for i in range(10)
+    ]
+    return SketchAnalysisResult(
+        sketch_id=f"S-{sheet:04d}",
+        project_metadata=ProjectMetadata(project_number=f"P-{project:03d}", drawing_number=f"S-{sheet:04d}"),
+        technical_data=TechnicalData(dimensions=dimensions, materials=materials, components=components),
+        specifications=[f"Clause {n}: concrete cover {rng.choice([40, 50, 75])} mm" for n in range(6)],
+        standards=["BS EN 206", "BS EN 1992-1-1"],
+        regional_codes=["Dubai Building Code 2021"]
+    )
+
+
+QUERIES = {
+    "C40 concrete, all projects": dict(text="C40 concrete", kind="material"),
+    "C40 concrete, one project": dict(text="C40 concrete", kind="material", project="P-003"),
+    "'grid spacing' = 6 m, all projects": dict(text="grid spacing", kind="dimension", value=6, unit="m"),
+    "dimensions of 6 m, one project": dict(kind="dimension", value=6000, unit="mm", project="P-003"),
+    "standard BS EN 206, all projects": dict(text="BS EN 206", kind="standard"),
+}
+
+
+def scan(blobs: list[tuple[str, str]], text=None, kind=None, project=None, value=None, unit=None) -> list:
+    """The pre-store way: parse every result and walk its tree."""
+    words = [word.lower() for word in (text or "").split()]
+    target_mm = to_millimetres(value, unit)
+    matches = []
+    for blob_project, blob in blobs:
+        if project is not None and blob_project != project:
+            continue
+        result = json.loads(blob)
+        technical = result.get("technical_data") or {}
+        facts = {
+            "dimension": technical.get("dimensions", []),
+            "material": technical.get("materials", []),
+            "component": technical.get("components", []),
+            "standard": [{"code": code} for code in result.get("standards", [])],
+        }[kind]
+        for fact in facts:
+            haystack = " ".join(str(v) for v in fact.values() if v is not None).lower()
+            if not all(word in haystack for word in words):
+                continue
+            if target_mm is not None and abs((to_millimetres(fact.get("value"), fact.get("unit")) or -1) - target_mm) > 0.5:
+                continue
+            matches.append(fact)
+    return matches
+
+
+def median_ms(fn, runs: int) -> float:
+    fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=20, help="Runs per query (median reported)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    results = [
+        (f"P-{sheet % args.projects:03d}", synthetic_result(sheet % args.projects, sheet, rng))
+        for sheet in range(args.sheets)
+    ]
+    blobs = [(project, result.model_dump_json()) for project, result in results]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(tmp)
+        start = time.perf_counter()
+        facts = sum(store.put(result, project) for project, result in results)
+        index_ms = (time.perf_counter() - start) * 1000
+        db_bytes = (Path(tmp) / "store.sqlite3").stat().st_size
+
+        rows = []
+        for name, query in QUERIES.items():
+            indexed = store.query(limit=10_000, **query)
+            scanned = scan(blobs, **query)
+            rows.append({
+                "query": name,
+                "matches": len(indexed),
+                "scan_matches": len(scanned),
+                "store_ms": round(median_ms(lambda: store.query(limit=10_000, **query), args.runs), 2),
+                "scan_ms": round(median_ms(lambda: scan(blobs, **query), max(3, args.runs // 5)), 2),
+            })
+        store.close()
+
+    report = {
+        "sheets": args.sheets,
+        "facts": facts,
+        "index_ms_per_sheet": round(index_ms / args.sheets, 3),
+        "store_bytes": db_bytes,
+        "queries": rows,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(
+        f"{args.sheets} sheets, {facts:,} facts indexed at {report['index_ms_per_sheet']:.2f} ms/sheet "
+        f"({db_bytes / 1e6:.1f} MB)"
+    )
+    header = f"{'query':<42} {'matches':>8} {'store_ms':>9} {'scan_ms':>9} {'speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['query']:<42} {row['matches']:>8} {row['store_ms']:>9.2f} {row['scan_ms']:>9.1f} "
+            f"{row['scan_ms'] / max(row['store_ms'], 0.001):>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
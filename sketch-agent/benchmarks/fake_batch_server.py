@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Local fake of the OpenAI and Anthropic batch endpoints.
+
+Serves just enough of both APIs for ``submit-batch`` / ``collect-batch`` to
+run end to end offline:
+
+- OpenAI: ``POST /v1/files``, ``POST /v1/batches``, ``GET /v1/batches/{id}``,
+  ``GET /v1/files/{id}/content``
+- Anthropic: ``POST /v1/messages/batches``, ``GET /v1/messages/batches/{id}``,
+  ``GET /v1/messages/batches/{id}/results``
+
+Jobs report in progress for ``--delay`` seconds, then complete with the
+recorded mock responses (cycled over the requests). ``--fail-every N`` makes
+every Nth request fail.
+
+Usage:
+    python benchmarks/fake_batch_server.py --port 8765 [--delay 2] [--fail-every 0]
+
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake \\
+        python main_standalone.py submit-batch drawings/ --provider openai
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=fake \\
+        python main_standalone.py submit-batch drawings/ --provider anthropic
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.mock_provider import DEFAULT_RESPONSES, load_responses
+
+
+class FakeBatchState:
+    def __init__(self, delay: float, fail_every: int):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.responses = itertools.cycle(load_responses(DEFAULT_RESPONSES))
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}{uuid.uuid4().hex[:12]}"
+
+    def ready(self, batch: dict) -> bool:
+        return time.time() - batch["created"] >= self.delay
+
+    def outcomes(self, requests: list[dict]):
+        """Yield (custom_id, text or None) per request; None means failed."""
+        with self.lock:
+            for number, request in enumerate(requests, 1):
+                failed = self.fail_every and number % self.fail_every == 0
+                yield request["custom_id"], None if failed else next(self.responses)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Handler(BaseHTTPRequestHandler):
+    state: FakeBatchState
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, payload: dict, status: int = 200) -> None:
+        self._send(json.dumps(payload).encode(), "application/json", status)
+
+    def _send(self, body: bytes, content_type: str, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    # -- OpenAI ---------------------------------------------------------------
+
+    def _openai_batch(self, batch_id: str) -> dict:
+        batch = self.state.batches[batch_id]
+        lines = [json.loads(l) for l in self.state.files[batch["input_file_id"]].splitlines() if l.strip()]
+        payload = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": batch["input_file_id"],
+            "completion_window": "24h",
+            "created_at": int(batch["created"]),
+            "status": "in_progress",
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            "metadata": batch.get("metadata"),
+        }
+        if not self.state.ready(batch):
+            return payload
+
+        if "output_file_id" not in batch:
+            output, errors = [], []
+            for custom_id, text in self.state.outcomes(lines):
+                if text is None:
+                    errors.append({
+                        "id": self.state.new_id("batch_req_"),
+                        "custom_id": custom_id,
+                        "response": {"status_code": 500, "body": {"error": {"message": "Injected failure"}}},
+                        "error": None,
+                    })
+                    continue
+                output.append({
+                    "id": self.state.new_id("batch_req_"),
+                    "custom_id": custom_id,
+                    "response": {"status_code": 200, "body": {
+                        "id": self.state.new_id("chatcmpl-"),
+                        "object": "chat.completion",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": text}}],
+                        "usage": {"prompt_tokens": 3000, "completion_tokens": len(text) // 4,
+                                  "total_tokens": 3000 + len(text) // 4},
+                    }},
+                    "error": None,
+                })
+            batch["output_file_id"] = self.state.new_id("file-")
+            self.state.files[batch["output_file_id"]] = "\n".join(json.dumps(o) for o in output).encode()
+            batch["error_file_id"] = None
+            if errors:
+                batch["error_file_id"] = self.state.new_id("file-")
+                self.state.files[batch["error_file_id"]] = "\n".join(json.dumps(e) for e in errors).encode()
+            batch["failed"] = len(errors)
+
+        payload.update({
+            "status": "completed",
+            "completed_at": int(time.time()),
+            "output_file_id": batch["output_file_id"],
+            "error_file_id": batch["error_file_id"],
+            "request_counts": {"total": len(lines), "completed": len(lines) - batch["failed"],
+                               "failed": batch["failed"]},
+        })
+        return payload
+
+    def _upload_file(self) -> None:
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self._body()
+        )
+        data = next(part.get_content() for part in message.iter_parts()
+                    if part.get_param("name", header="content-disposition") == "file")
+        if isinstance(data, str):
+            data = data.encode()
+        file_id = self.state.new_id("file-")
+        self.state.files[file_id] = data
+        self._json({"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                    "filename": "batch.jsonl", "purpose": "batch", "status": "processed"})
+
+    # -- Anthropic ------------------------------------------------------------
+
+    def _anthropic_batch(self, batch_id: str) -> dict:
+        batch = self.state.batches[batch_id]
+        count = len(batch["requests"])
+        ready = self.state.ready(batch)
+        if ready and "results" not in batch:
+            batch["results"] = []
+            for custom_id, text in self.state.outcomes(batch["requests"]):
+                if text is None:
+                    result = {"type": "errored", "error": {"type": "error", "error": {
+                        "type": "api_error", "message": "Injected failure"}}}
+                else:
+                    result = {"type": "succeeded", "message": {
+                        "id": self.state.new_id("msg_"), "type": "message", "role": "assistant",
+                        "model": batch["model"], "content": [{"type": "text", "text": text}],
+                        "stop_reason": "end_turn", "stop_sequence": None,
+                        "usage": {"input_tokens": 700, "output_tokens": len(text) // 4,
+                                  "cache_read_input_tokens": 2300, "cache_creation_input_tokens": 0},
+                    }}
+                batch["results"].append({"custom_id": custom_id, "result": result})
+
+        succeeded = sum(r["result"]["type"] == "succeeded" for r in batch.get("results", []))
+        host = self.headers.get("Host")
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ready else "in_progress",
+            "request_counts": {
+                "processing": 0 if ready else count,
+                "succeeded": succeeded,
+                "errored": len(batch.get("results", [])) - succeeded,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": _iso(batch["created"]),
+            "expires_at": _iso(batch["created"] + 86400),
+            "ended_at": _iso(time.time()) if ready else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"http://{host}/v1/messages/batches/{batch_id}/results" if ready else None,
+        }
+
+    # -- Routing --------------------------------------------------------------
+
+    def do_POST(self):
+        if self.path == "/v1/files":
+            return self._upload_file()
+        if self.path == "/v1/batches":
+            request = json.loads(self._body())
+            batch_id = self.state.new_id("batch_")
+            self.state.batches[batch_id] = {"created": time.time(), **request}
+            return self._json(self._openai_batch(batch_id))
+        if self.path == "/v1/messages/batches":
+            requests = json.loads(self._body())["requests"]
+            batch_id = self.state.new_id("msgbatch_")
+            self.state.batches[batch_id] = {
+                "created": time.time(),
+                "requests": requests,
+                "model": requests[0]["params"]["model"] if requests else "",
+            }
+            return self._json(self._anthropic_batch(batch_id))
+        self._json({"error": {"message": f"Unknown endpoint {self.path}"}}, 404)
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in self.state.batches:
+            return self._json(self._openai_batch(parts[2]))
+        if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content":
+            if parts[2] in self.state.files:
+                return self._send(self.state.files[parts[2]], "application/jsonl")
+        if parts[:3] == ["v1", "messages", "batches"] and len(parts) >= 4 and parts[3] in self.state.batches:
+            if len(parts) == 4:
+                return self._json(self._anthropic_batch(parts[3]))
+            if parts[4] == "results":
+                batch = self.state.batches[parts[3]]
+                body = "\n".join(json.dumps(r) for r in batch.get("results", []))
+                return self._send(body.encode(), "application/binary")
+        self._json({"error": {"message": f"Not found: {self.path}"}}, 404)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=2.0, help="Seconds before a job completes")
+    parser.add_argument("--fail-every", type=int, default=0, help="Fail every Nth request (0: never)")
+    args = parser.parse_args()
+
+    Handler.state = FakeBatchState(args.delay, args.fail_every)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Fake batch server on http://{args.host}:{args.port}", file=sys.stderr)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,14 @@
 Standalone CLI for sketch analysis - called by Node.js via child_process.
 
 Usage:
-    python main_standalone.py <image_path> [context]
+    python main_standalone.py <image_path> [context] [--stream]
+    python main_standalone.py <drawings.pdf> [context] [--dpi 150] [--pages 1-5] [--job ID]
+    python main_standalone.py --batch manifest.json [--concurrency N] [--stream] [--job ID]
+    python main_standalone.py --server [--socket PATH] [--concurrency N] [--metrics-port PORT]
+    python main_standalone.py submit-batch <dir|drawings.pdf|manifest.json> [context] [--provider P]
+    python main_standalone.py collect-batch [job_id] [--wait]
+    python main_standalone.py job-status [job_id] [--results]
+    python main_standalone.py query [text] [--kind K] [--project P] [--sheet S] [--value V [--unit U]]
 
 Returns JSON to stdout:
     Success: {"success": true, "result": {...}}
@@ -12,28 +19,112 @@ Returns JSON to stdout:
 Examples:
     python main_standalone.py uploads/sketch.png
     python main_standalone.py uploads/sketch.png "G+3 residential Dubai Marina"
+
+With --stream, each top-level section of the response (project_metadata,
+context_layer, technical_data, ...) is printed as a JSON line
+{"event": "section", "section": ..., "data": ...} as soon as the model has
+produced it, followed by the usual result object on a single line.
+
+Batch mode analyzes a whole drawing set concurrently. The manifest is a JSON
+list of image paths (or {"image_path", "context", "provider"} objects), or an
+object {"items": [...], "context": "...", "per_provider_limits": {...}}.
+Results are returned in manifest order; --stream also emits one JSON line per
+drawing as it finishes.
+
+PDF input is rasterized lazily one page at a time and analyzed concurrently.
+Results stream out as JSON lines, one per page as it finishes (with "page"
+attached), followed by a summary line {"success": true, "pages": N, ...}.
+PDFs listed in a batch manifest are expanded into their pages the same way.
+
+With --job ID, a batch or PDF run is journaled sheet by sheet (see
+agents/job_journal.py). If it dies partway, running the same command again
+analyzes only the unfinished sheets and reports the stored results for the
+rest; job-status reports a job's progress, also while it is running.
+
+submit-batch sends a whole drawing set as one asynchronous provider batch
+job (OpenAI Batch API / Anthropic Message Batches: cheaper, higher limits,
+results within 24h) and saves the job state locally; collect-batch polls it
+and returns the results in the batch output format. With no job id it lists
+saved jobs. See agents/provider_batch.py.
+
+Every result's dimensions, materials, components, standards, regional codes
+and specifications are indexed in a local store under --project (or the
+manifest's "project", else the title block's project number). query searches
+it, e.g. query "C40 concrete" --kind material --project P-2291; query
+--projects lists what is indexed. See agents/result_store.py.
+
+Drawings are decoded (and PDF pages rendered) no larger than about twice
+what the provider is sent, and each waits for room in the per-worker memory
+budget (SKETCH_MEMORY_BUDGET_MB) before it is decoded; see
+agents/memory_budget.py.
+
+Server mode keeps one warm SketchAgent and answers JSON-lines requests on
+stdin/stdout (or a Unix socket); see services/worker_server.py.
 """
 
 import sys
-import json
-import asyncio
 import os
 from pathlib import Path
-from PIL import Image
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+if "--import-profile" in sys.argv:
+    # Installed before anything heavy is imported
+    from utils.import_profile import start_import_profile
+    start_import_profile()
+
+import json
+import time
+import asyncio
+import argparse
+from typing import Awaitable, Callable
+from PIL import Image
+
 from agents.sketch_agent_v2 import SketchAgent
-from agents.types import SketchMetadata
+from agents.image_preprocessing import load_image
+from agents.memory_budget import image_memory
+from agents.telemetry import start_telemetry
+from agents.types import SketchMetadata, BatchItem, BatchResult, TokenUsage
+from agents.pdf_source import DEFAULT_PDF_DPI, is_pdf, iter_pdf_pages
+from agents.job_journal import JobJournal, iter_job, plan_job_sheets
+from agents.result_store import DEFAULT_QUERY_LIMIT, FACT_KINDS, ResultStore, store_project
+from agents.provider_batch import (
+    POLL_INTERVAL,
+    BatchJobStore,
+    check_batch_provider,
+    collect_provider_batch,
+    submit_provider_batch,
+)
+from utils.json_output import dumps, pretty_output
+
 
+def _add_usage(total: TokenUsage, batch_result: BatchResult) -> None:
+    """Accumulate one item's token usage into a batch total."""
+    telemetry = batch_result.result.telemetry if batch_result.result else None
+    if telemetry is None:
+        return
+    usage = telemetry.usage
+    for field in TokenUsage.model_fields:
+        setattr(total, field, getattr(total, field) + getattr(usage, field))
 
-async def analyze_sketch_cli(image_path: str, context: str = None):
+
+async def analyze_sketch_cli(
+    image_path: str,
+    context: str = None,
+    agent: SketchAgent = None,
+    agent_options: dict = None,
+    on_section: Callable[[dict], Awaitable[None]] = None
+):
     """Analyze sketch from command line.
 
     Args:
         image_path: Path to image file
         context: Optional project context
+        agent: Optional pre-initialized agent (reused across requests in server mode)
+        agent_options: Keyword arguments for SketchAgent when no agent is given
+        on_section: Optional coroutine called with each top-level section of the
+                    response as soon as it streams in
 
     Returns:
         Dictionary with success status and result/error
@@ -47,36 +138,69 @@ async def analyze_sketch_cli(image_path: str, context: str = None):
                 "error_type": "FileNotFoundError"
             }
 
-        # Load image
+        # Initialize agent
+        # Provider and model determined from environment variables
+        if agent is None:
+            agent = SketchAgent(**(agent_options or {}))
+
+        # Reserve the worker's memory budget for the sheet, estimated from its header
+        budget = agent.load_budget()
         try:
-            image = Image.open(image_path)
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Failed to load image: {str(e)}",
-                "error_type": type(e).__name__
-            }
+            with Image.open(image_path) as header:
+                peak, _ = image_memory(header, budget)
+        except Exception:
+            peak = 0
 
-        # Create metadata
-        file_stat = os.stat(image_path)
-        metadata = SketchMetadata(
-            sketch_id=Path(image_path).stem,
-            filename=Path(image_path).name,
-            file_size=file_stat.st_size,
-            dimensions=image.size
-        )
+        async with agent.memory_budget.reserve(peak) as lease:
+            # Load image (decoded here so the telemetry "load" stage covers it),
+            # no larger than the provider is sent
+            meter = start_telemetry()
+            try:
+                with meter.stage("load"):
+                    image, original_size = await asyncio.to_thread(load_image, image_path, budget)
+                    await asyncio.to_thread(image.load)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"Failed to load image: {str(e)}",
+                    "error_type": type(e).__name__
+                }
+            lease.resize(image_memory(image, budget)[1])
 
-        # Initialize agent
-        # Provider and model determined from environment variables
-        agent = SketchAgent()
+            # Create metadata
+            file_stat = os.stat(image_path)
+            metadata = SketchMetadata(
+                sketch_id=Path(image_path).stem,
+                filename=Path(image_path).name,
+                file_size=file_stat.st_size,
+                dimensions=original_size
+            )
 
-        # Analyze
-        result = await agent.analyze_sketch(image, metadata, context)
+            # Analyze; the analysis then holds the only reference to the image
+            # and drops it once prepared, freeing it during the request
+            if on_section is None:
+                analysis = agent.analyze_sketch(image, metadata, context)
+            else:
+                analysis = agent.analyze_sketch_stream(image, metadata, context)
+            del image
+            if on_section is None:
+                result = await analysis
+            else:
+                async for event in analysis:
+                    if event.event == "section":
+                        await on_section({
+                            "event": "section",
+                            "section": event.section,
+                            "data": event.data,
+                            "elapsed": event.elapsed
+                        })
+                    else:
+                        result = event.result
 
-        # Return success
+        # Return success (the model is serialized once, by utils.json_output)
         return {
             "success": True,
-            "result": result.model_dump()
+            "result": result
         }
 
     except ValueError as e:
@@ -95,10 +219,727 @@ async def analyze_sketch_cli(image_path: str, context: str = None):
         }
 
 
+def _load_manifest(manifest_path: str) -> tuple[list[BatchItem], dict]:
+    """Read a batch manifest into batch items and batch-level options."""
+    manifest_file = Path(manifest_path)
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+
+    options = {}
+    if isinstance(manifest, dict):
+        options = manifest
+        entries = manifest.get("items", [])
+    else:
+        entries = manifest
+
+    if not isinstance(entries, list):
+        raise ValueError("Manifest 'items' must be a list")
+
+    default_context = options.get("context")
+    items = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"image_path": entry}
+        image_path = Path(entry["image_path"])
+        # Relative paths are resolved against the manifest's directory
+        if not image_path.is_absolute():
+            image_path = manifest_file.parent / image_path
+        items.append(BatchItem(
+            image_path=str(image_path),
+            context=entry.get("context", default_context),
+            provider=entry.get("provider")
+        ))
+
+    return items, options
+
+
+def _expand_pdfs(items: list[BatchItem], dpi: int, text_layer: bool = None, load_budget: Callable = None):
+    """Yield batch items, replacing each PDF with its pages (rasterized lazily).
+
+    ``load_budget`` maps an item's provider to the budget its pages are
+    rendered for (``SketchAgent.load_budget``); without it, pages render at ``dpi``.
+    """
+    for item in items:
+        if item.image_path and is_pdf(item.image_path):
+            budget = load_budget(item.provider) if load_budget else None
+            for page_item in iter_pdf_pages(
+                item.image_path, dpi=dpi, context=item.context, text_layer=text_layer, budget=budget
+            ):
+                page_item.provider = item.provider
+                yield page_item
+        else:
+            yield item
+
+
+def _configure_transport(concurrency: int, server: bool = False) -> None:
+    """Size the shared HTTP connection pool for ``concurrency`` analyses.
+
+    Imported here so single-drawing runs load httpx only with the provider SDK.
+    """
+    from agents.http_transport import configure_transport
+
+    configure_transport(concurrency, server)
+
+
+def _open_job(job_id: str, source: str, items: list[BatchItem], pages: str = None):
+    """Register a run of a journaled job.
+
+    Returns the journal, the sheets still to analyze and the results of the
+    sheets finished by earlier runs.
+    """
+    journal = JobJournal()
+    pending = journal.start(job_id, str(Path(source).resolve()), plan_job_sheets(items, pages))
+    return journal, pending, journal.results(job_id)
+
+
+def _close_job(journal: JobJournal, job_id: str, stored: list[BatchResult]) -> dict:
+    journal.finish(job_id)
+    return journal.progress(job_id) | {"resumed": len(stored)}
+
+
+async def analyze_pdf_cli(
+    pdf_path: str,
+    context: str = None,
+    dpi: int = DEFAULT_PDF_DPI,
+    pages: str = None,
+    max_concurrency: int = 8,
+    agent_options: dict = None,
+    job_id: str = None
+):
+    """Analyze a multi-page PDF, printing one JSON line per page as it finishes.
+
+    With ``job_id`` the run is journaled: pages finished by an earlier run of
+    the same job are printed from the journal instead of being analyzed again.
+
+    Returns:
+        Summary dictionary (page results have already been printed)
+    """
+    start_time = time.time()
+
+    journal = None
+    if job_id:
+        try:
+            journal, pending, stored = _open_job(job_id, pdf_path, [BatchItem(image_path=pdf_path, context=context)], pages)
+        except (ImportError, RuntimeError, ValueError, OSError) as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "error_type": type(e).__name__
+            }
+
+    _configure_transport(max_concurrency)
+    try:
+        agent = SketchAgent(**(agent_options or {}))
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+    # Connect while the first pages are rendered
+    prewarm = asyncio.create_task(agent.prewarm())
+
+    succeeded = failed = 0
+    usage = TokenUsage()
+    if journal is not None:
+        for batch_result in stored:
+            succeeded += 1
+            print(dumps(batch_result), flush=True)
+        page_results = iter_job(agent, journal, job_id, pending, dpi, max_concurrency)
+    else:
+        page_results = agent.analyze_pdf(
+            pdf_path,
+            context=context,
+            dpi=dpi,
+            pages=pages,
+            max_concurrency=max_concurrency
+        )
+    try:
+        async for batch_result in page_results:
+            if batch_result.success:
+                succeeded += 1
+            else:
+                failed += 1
+            _add_usage(usage, batch_result)
+            print(dumps(batch_result), flush=True)
+    except (ImportError, RuntimeError, ValueError) as e:
+        # Unreadable PDF or PyMuPDF missing
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+
+    prewarm.cancel()
+
+    summary = {
+        "success": True,
+        "pages": succeeded + failed,
+        "succeeded": succeeded,
+        "failed": failed,
+        "usage": usage.model_dump(),
+        "batch_time": time.time() - start_time
+    }
+    if agent.region_cache is not None:
+        summary["region_cache"] = agent.region_cache.stats()
+    if agent.cascade is not None:
+        summary["cascade"] = agent.cascade_stats.snapshot()
+    if agent.text_layer_stats.text_only or agent.text_layer_stats.assisted:
+        summary["text_layer"] = agent.text_layer_stats.snapshot()
+    if agent.memory_budget.limit is not None:
+        summary["memory"] = agent.memory_budget.snapshot()
+    if journal is not None:
+        summary["job"] = _close_job(journal, job_id, stored)
+    return summary
+
+
+async def analyze_batch_cli(
+    manifest_path: str,
+    max_concurrency: int = 8,
+    stream: bool = False,
+    agent: SketchAgent = None,
+    agent_options: dict = None,
+    job_id: str = None
+):
+    """Analyze every drawing in a batch manifest concurrently.
+
+    Args:
+        manifest_path: Path to JSON manifest
+        max_concurrency: Maximum analyses in flight
+        stream: Print one JSON line per drawing as it finishes
+        agent: Optional pre-initialized agent
+        agent_options: Keyword arguments for SketchAgent when no agent is given
+        job_id: Journal the run under this id; re-running it analyzes only
+                the drawings not finished yet (see agents/job_journal.py)
+
+    Returns:
+        Dictionary with per-drawing results in manifest order
+    """
+    start_time = time.time()
+
+    try:
+        items, options = _load_manifest(manifest_path)
+    except (OSError, ValueError, KeyError) as e:
+        return {
+            "success": False,
+            "error": f"Failed to load manifest: {e}",
+            "error_type": type(e).__name__
+        }
+
+    dpi = options.get("dpi", DEFAULT_PDF_DPI)
+    if options.get("project"):
+        store_project.set(options["project"])
+    journal = None
+    if job_id:
+        try:
+            journal, pending, stored = _open_job(job_id, manifest_path, items)
+        except (ImportError, RuntimeError, ValueError, OSError) as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "error_type": type(e).__name__
+            }
+
+    max_concurrency = options.get("max_concurrency", max_concurrency)
+    _configure_transport(max_concurrency)
+    try:
+        if agent is None:
+            agent = SketchAgent(**(agent_options or {}))
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+    # Connect while the first drawings are loaded
+    prewarm = asyncio.create_task(agent.prewarm())
+
+    results = {}
+    usage = TokenUsage()
+    if journal is not None:
+        for batch_result in stored:
+            results[batch_result.index] = batch_result
+            if stream:
+                print(dumps(batch_result), flush=True)
+        batch_results = iter_job(
+            agent, journal, job_id, pending, dpi, max_concurrency, options.get("per_provider_limits")
+        )
+    else:
+        batch_results = agent.iter_batch(
+            _expand_pdfs(items, dpi, load_budget=agent.load_budget),
+            max_concurrency=max_concurrency,
+            per_provider_limits=options.get("per_provider_limits")
+        )
+    async for batch_result in batch_results:
+        results[batch_result.index] = batch_result
+        _add_usage(usage, batch_result)
+        if stream:
+            print(dumps(batch_result), flush=True)
+
+    prewarm.cancel()
+    results = [results[index] for index in sorted(results)]
+
+    succeeded = sum(1 for r in results if r.success)
+    summary = {
+        "success": True,
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "usage": usage.model_dump(),
+        "batch_time": time.time() - start_time
+    }
+    if agent.region_cache is not None:
+        summary["region_cache"] = agent.region_cache.stats()
+    if agent.cascade is not None:
+        summary["cascade"] = agent.cascade_stats.snapshot()
+    if agent.text_layer_stats.text_only or agent.text_layer_stats.assisted:
+        summary["text_layer"] = agent.text_layer_stats.snapshot()
+    if agent.memory_budget.limit is not None:
+        summary["memory"] = agent.memory_budget.snapshot()
+    if journal is not None:
+        summary["job"] = _close_job(journal, job_id, stored)
+    return summary
+
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+
+
+def _batch_source_items(source: str, context: str = None, dpi: int = DEFAULT_PDF_DPI, pages: str = None):
+    """Batch items for a directory of drawings, a PDF set or a manifest.
+
+    Every page is rasterized: provider batch jobs send each one as an image
+    request, so text-only pages are not answered from their text layer.
+    """
+    path = Path(source)
+    if path.is_dir():
+        items = [
+            BatchItem(image_path=str(p), context=context)
+            for p in sorted(path.iterdir())
+            if p.suffix.lower() in IMAGE_SUFFIXES or (p.suffix.lower() == ".pdf" and is_pdf(str(p)))
+        ]
+        return _expand_pdfs(items, dpi, text_layer=False)
+    if is_pdf(source):
+        return iter_pdf_pages(source, dpi=dpi, pages=pages, context=context, text_layer=False)
+    if path.suffix.lower() == ".json":
+        items, options = _load_manifest(source)
+        return _expand_pdfs(items, options.get("dpi", dpi), text_layer=False)
+    if not path.exists():
+        raise FileNotFoundError(f"Not found: {source}")
+    return [BatchItem(image_path=source, context=context)]
+
+
+def _job_summary(job) -> dict:
+    return job.model_dump(mode="json", exclude={"entries"}) | {"items": len(job.entries)}
+
+
+async def submit_batch_cli(
+    source: str,
+    context: str = None,
+    provider: str = None,
+    dpi: int = DEFAULT_PDF_DPI,
+    pages: str = None,
+    agent_options: dict = None
+):
+    """Submit a drawing set as one provider batch job and save its state."""
+    try:
+        provider = provider or os.getenv("VISION_PROVIDER", "openai")
+        check_batch_provider(provider)
+        agent = SketchAgent(provider=provider, **(agent_options or {}))
+        job = await submit_provider_batch(
+            agent,
+            _batch_source_items(source, context, dpi, pages),
+            BatchJobStore(),
+            provider=provider
+        )
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+
+    return {"success": True, "job": _job_summary(job)}
+
+
+async def collect_batch_cli(
+    job_id: str = None,
+    wait: bool = False,
+    poll_interval: float = POLL_INTERVAL,
+    agent_options: dict = None
+):
+    """Poll a provider batch job; once it has ended, return its results.
+
+    Without a job id, list the saved jobs instead.
+    """
+    try:
+        store = BatchJobStore()
+        if job_id is None:
+            return {"success": True, "jobs": [_job_summary(job) for job in store.jobs()]}
+
+        job = store.load(job_id)
+        agent = SketchAgent(provider=job.provider, model_name=job.model, **(agent_options or {}))
+        job, results = await collect_provider_batch(agent, job_id, store, wait=wait, poll_interval=poll_interval)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+
+    if results is None:
+        return {"success": True, "ready": False, "job": _job_summary(job)}
+
+    if agent.result_store is not None:
+        # Provider batch results are parsed here, not by an analysis, so index them explicitly
+        for batch_result in results:
+            if batch_result.result is not None:
+                agent.result_store.put(batch_result.result, store_project.get())
+
+    usage = TokenUsage()
+    for batch_result in results:
+        _add_usage(usage, batch_result)
+    succeeded = sum(1 for r in results if r.success)
+    return {
+        "success": True,
+        "ready": True,
+        "job": _job_summary(job),
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "usage": usage.model_dump()
+    }
+
+
+def job_status_cli(job_id: str = None, results: bool = False):
+    """Progress of a journaled job, readable while it runs; without an id, list all jobs."""
+    try:
+        journal = JobJournal()
+        if job_id is None:
+            return {"success": True, "jobs": journal.jobs()}
+        response = {"success": True, "job": journal.progress(job_id)}
+        if results:
+            response["results"] = journal.results(job_id)
+        return response
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+
+
+def query_cli(
+    text: str = None,
+    kind: str = None,
+    project: str = None,
+    sheet: str = None,
+    value: float = None,
+    unit: str = None,
+    limit: int = DEFAULT_QUERY_LIMIT,
+    projects: bool = False
+):
+    """Search the result store; with ``projects``, list the indexed projects instead."""
+    try:
+        store = ResultStore()
+        start = time.perf_counter()
+        if projects:
+            response = {"success": True, "projects": store.projects()}
+        else:
+            facts = store.query(text, kind=kind, project=project, sheet=sheet, value=value, unit=unit, limit=limit)
+            response = {"success": True, "facts": facts, "count": len(facts)}
+        response["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return response
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+
+
+class _JSONArgumentParser(argparse.ArgumentParser):
+    """Argument parser that reports usage errors as JSON on stdout."""
+
+    usage_hint = "python main_standalone.py <image_path> [context]"
+
+    def error(self, message):
+        print(json.dumps({
+            "success": False,
+            "error": f"{message}. Usage: {self.usage_hint}",
+            "error_type": "InvalidArguments"
+        }))
+        sys.exit(1)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = _JSONArgumentParser(description="Analyze construction drawings")
+    parser.add_argument("image_path", nargs="?", help="Path to image file")
+    parser.add_argument("context", nargs="?", help="Optional project context")
+    parser.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="Analyze all drawings listed in a JSON manifest concurrently"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print partial output as JSON lines: response sections for a single "
+             "image, finished drawings in batch mode"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the result cache"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached results and re-analyze, updating the cache"
+    )
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        default=DEFAULT_PDF_DPI,
+        help=f"Rasterization DPI for PDF input (default: {DEFAULT_PDF_DPI})"
+    )
+    parser.add_argument(
+        "--pages",
+        help="Pages to analyze from a PDF, e.g. '1-3,7' (default: all)"
+    )
+    parser.add_argument(
+        "--tiles",
+        action="store_true",
+        help="Split very large sheets into overlapping tiles analyzed concurrently"
+    )
+    parser.add_argument(
+        "--region-cache",
+        action="store_true",
+        help="Reuse title blocks already read on other sheets of a set (cached on disk)"
+    )
+    parser.add_argument(
+        "--structured",
+        action="store_true",
+        help="Constrain answers to the result JSON Schema (OpenAI, Anthropic, Gemini)"
+    )
+    parser.add_argument(
+        "--cascade",
+        nargs="?",
+        const="on",
+        metavar="PROVIDER[:MODEL]",
+        help="Triage every sheet with a cheap model first and rerun only complex or "
+             "low-confidence ones on the main model (default triage model: the provider's own)"
+    )
+    parser.add_argument(
+        "--project",
+        help="Index results in the result store under this project (default: the "
+             "title block's project number or title)"
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Do not index results in the result store"
+    )
+    parser.add_argument(
+        "--job",
+        metavar="JOB_ID",
+        help="Journal a batch or PDF run under JOB_ID; running it again analyzes only "
+             "the sheets not finished yet"
+    )
+    parser.add_argument(
+        "--server",
+        action="store_true",
+        help="Run as a long-lived JSON-lines worker on stdin/stdout"
+    )
+    parser.add_argument(
+        "--socket",
+        help="Serve on this Unix socket path instead of stdin/stdout (implies --server)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("SKETCH_WORKER_CONCURRENCY", "8")),
+        help="Maximum analyses in flight in batch and server mode (default: 8)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("SKETCH_METRICS_PORT", "0")) or None,
+        help="In server mode, serve Prometheus metrics at http://127.0.0.1:PORT/metrics"
+    )
+    parser.add_argument(
+        "--import-profile",
+        action="store_true",
+        help="Print module import times (including deferred SDK imports) to stderr at exit"
+    )
+    return parser
+
+
+def _build_batch_job_parser(command: str) -> argparse.ArgumentParser:
+    parser = _JSONArgumentParser(prog=f"main_standalone.py {command}")
+    parser.usage_hint = (
+        "python main_standalone.py submit-batch <dir|drawings.pdf|manifest.json> [context] [--provider P]"
+        if command == "submit-batch"
+        else "python main_standalone.py collect-batch [job_id] [--wait]"
+    )
+    parser.add_argument("--import-profile", action="store_true", help="Print module import times to stderr at exit")
+    if command == "submit-batch":
+        parser.add_argument("source", help="Directory of drawings, PDF set or batch manifest")
+        parser.add_argument("context", nargs="?", help="Optional project context")
+        parser.add_argument("--provider", help="openai or anthropic (default: VISION_PROVIDER)")
+        parser.add_argument("--dpi", type=int, default=DEFAULT_PDF_DPI, help="Rasterization DPI for PDF input")
+        parser.add_argument("--pages", help="Pages to submit from a PDF, e.g. '1-3,7'")
+    else:
+        parser.add_argument("job_id", nargs="?", help="Job to collect (omit to list saved jobs)")
+        parser.add_argument("--wait", action="store_true", help="Keep polling until the job has ended")
+        parser.add_argument("--project", help="Index the collected results in the result store under this project")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=POLL_INTERVAL,
+            help=f"Seconds before the first re-poll with --wait, backing off from there (default: {POLL_INTERVAL:g})"
+        )
+    return parser
+
+
+def batch_job_main(command: str, argv: list[str]):
+    """Entry point for the submit-batch / collect-batch subcommands."""
+    args = _build_batch_job_parser(command).parse_args(argv)
+    # Provider batch output never goes through the result cache
+    agent_options = {"use_cache": False}
+    if command == "collect-batch" and args.project:
+        store_project.set(args.project)
+
+    if command == "submit-batch":
+        result = asyncio.run(submit_batch_cli(
+            args.source,
+            args.context,
+            provider=args.provider,
+            dpi=args.dpi,
+            pages=args.pages,
+            agent_options=agent_options
+        ))
+    else:
+        result = asyncio.run(collect_batch_cli(
+            args.job_id,
+            wait=args.wait,
+            poll_interval=args.poll_interval,
+            agent_options=agent_options
+        ))
+
+    print(dumps(result, pretty=pretty_output()))
+    sys.exit(0 if result["success"] else 1)
+
+
+def job_status_main(argv: list[str]):
+    """Entry point for the job-status subcommand."""
+    parser = _JSONArgumentParser(prog="main_standalone.py job-status")
+    parser.usage_hint = "python main_standalone.py job-status [job_id] [--results]"
+    parser.add_argument("job_id", nargs="?", help="Job to report (omit to list journaled jobs)")
+    parser.add_argument("--results", action="store_true", help="Include the results of finished sheets")
+    args = parser.parse_args(argv)
+
+    result = job_status_cli(args.job_id, results=args.results)
+    print(dumps(result, pretty=pretty_output()))
+    sys.exit(0 if result["success"] else 1)
+
+
+def query_main(argv: list[str]):
+    """Entry point for the query subcommand."""
+    parser = _JSONArgumentParser(prog="main_standalone.py query")
+    parser.usage_hint = "python main_standalone.py query [text] [--kind K] [--project P] [--sheet S] [--value V [--unit U]]"
+    parser.add_argument("text", nargs="?", help="Words every matching fact contains, e.g. 'C40 concrete' ('word*' for a prefix)")
+    parser.add_argument("--kind", choices=FACT_KINDS, help="Only facts of this kind")
+    parser.add_argument("--project", help="Only sheets indexed under this project")
+    parser.add_argument("--sheet", help="Only this sheet (sketch id, e.g. 'set-p3')")
+    parser.add_argument("--value", type=float, help="Dimension value (quantity or count for other kinds)")
+    parser.add_argument("--unit", help="Unit of --value; lengths match in any unit, e.g. 3.6 m finds 3600 mm")
+    parser.add_argument("--limit", type=int, default=DEFAULT_QUERY_LIMIT, help=f"Maximum facts returned (default: {DEFAULT_QUERY_LIMIT})")
+    parser.add_argument("--projects", action="store_true", help="List indexed projects with sheet and fact counts")
+    args = parser.parse_args(argv)
+
+    result = query_cli(
+        args.text,
+        kind=args.kind,
+        project=args.project,
+        sheet=args.sheet,
+        value=args.value,
+        unit=args.unit,
+        limit=args.limit,
+        projects=args.projects
+    )
+    print(dumps(result, pretty=pretty_output()))
+    sys.exit(0 if result["success"] else 1)
+
+
+async def run_server(
+    socket_path: str = None,
+    max_concurrency: int = 8,
+    agent_options: dict = None,
+    metrics_port: int = None
+):
+    """Run the persistent worker with one shared agent."""
+    from services.worker_server import SketchWorkerServer
+
+    _configure_transport(max_concurrency, server=True)
+    server = SketchWorkerServer(
+        analyze_sketch_cli,
+        agent=SketchAgent(**(agent_options or {})),
+        max_concurrency=max_concurrency,
+        metrics_port=metrics_port
+    )
+
+    if socket_path:
+        await server.serve_unix(socket_path)
+    else:
+        await server.serve_stdio()
+
+
 def main():
     """Main entry point for CLI."""
+    if len(sys.argv) > 1 and sys.argv[1] in ("submit-batch", "collect-batch"):
+        batch_job_main(sys.argv[1], sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "job-status":
+        job_status_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        query_main(sys.argv[2:])
+
+    args = _build_parser().parse_args()
+    agent_options = {
+        "use_cache": False if args.no_cache else None,
+        "refresh_cache": args.refresh,
+        "tiling": True if args.tiles else None,
+        "use_region_cache": True if args.region_cache else None,
+        "structured_output": True if args.structured else None,
+        "cascade": args.cascade,
+        "use_result_store": False if args.no_store else None
+    }
+    if args.project:
+        store_project.set(args.project)
+
+    if args.server or args.socket:
+        try:
+            asyncio.run(run_server(args.socket, args.concurrency, agent_options, args.metrics_port))
+        except (ValueError, FileNotFoundError) as e:
+            print(json.dumps({
+                "success": False,
+                "error": str(e),
+                "error_type": type(e).__name__
+            }))
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.batch:
+        result = asyncio.run(analyze_batch_cli(
+            args.batch,
+            args.concurrency,
+            args.stream,
+            agent_options=agent_options,
+            job_id=args.job
+        ))
+        print(dumps(result, pretty=pretty_output() and not args.stream))
+        sys.exit(0 if result["success"] else 1)
+
     # Parse arguments
-    if len(sys.argv) < 2:
+    if not args.image_path:
         print(json.dumps({
             "success": False,
             "error": "Usage: python main_standalone.py <image_path> [context]",
@@ -106,14 +947,37 @@ def main():
         }))
         sys.exit(1)
 
-    image_path = sys.argv[1]
-    context = sys.argv[2] if len(sys.argv) > 2 else None
+    image_path = args.image_path
+    context = args.context
+
+    if is_pdf(image_path):
+        summary = asyncio.run(analyze_pdf_cli(
+            image_path,
+            context,
+            dpi=args.dpi,
+            pages=args.pages,
+            max_concurrency=args.concurrency,
+            agent_options=agent_options,
+            job_id=args.job
+        ))
+        print(dumps(summary))
+        sys.exit(0 if summary["success"] else 1)
 
     # Run analysis
-    result = asyncio.run(analyze_sketch_cli(image_path, context))
+    on_section = None
+    if args.stream:
+        async def on_section(event: dict):
+            print(dumps(event), flush=True)
+
+    result = asyncio.run(analyze_sketch_cli(
+        image_path,
+        context,
+        agent_options=agent_options,
+        on_section=on_section
+    ))
 
-    # Output JSON to stdout
-    print(json.dumps(result, indent=2))
+    # Output JSON to stdout (indented only for a terminal)
+    print(dumps(result, pretty=pretty_output() and not args.stream))
 
     # Exit code: 0 for success, 1 for failure
     sys.exit(0 if result["success"] else 1)
@@ -0,0 +1,186 @@
+"""Prometheus text-format metrics for the worker server.
+
+A ``SketchMetrics`` instance is registered as a telemetry sink on the shared
+agent (``agent.telemetry_sinks``) and aggregates every analysis it sees:
+
+    sketch_analyses_total{provider,outcome}      counter (success, error, cache_hit)
+    sketch_analysis_seconds{provider}            histogram of end-to-end time
+    sketch_stage_seconds{stage}                  histogram per pipeline stage
+    sketch_tokens_total{provider,kind}           counter (input, output, cached_input, cache_write)
+    sketch_image_bytes_total{provider}           counter of encoded image bytes sent
+    sketch_cascade_total{outcome,reason}         counter of cascade triage outcomes (kept, escalated)
+
+``render()`` returns the exposition text; ``serve_metrics()`` exposes it at
+``GET /metrics`` on a plain asyncio HTTP listener, so no client library is
+needed.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from agents.telemetry import TelemetryMeter
+from agents.types import SketchAnalysisResult
+
+
+# Seconds; wide enough for sub-millisecond parse and multi-minute tiled sheets
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+INF_BUCKET = 'le="+Inf"'
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class SketchMetrics:
+    """Aggregates analysis telemetry into Prometheus counters and histograms."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters: dict[str, dict[Labels, float]] = {
+            "sketch_analyses_total": {},
+            "sketch_tokens_total": {},
+            "sketch_image_bytes_total": {},
+            "sketch_cascade_total": {},
+        }
+        self.histograms: dict[str, dict[Labels, _Histogram]] = {
+            "sketch_analysis_seconds": {},
+            "sketch_stage_seconds": {},
+        }
+        # Extra gauges supplied at render time (worker in-flight, queue, ...)
+        self.gauge_sources: list = []
+
+    def _inc(self, name: str, labels: Labels, amount: float = 1) -> None:
+        series = self.counters[name]
+        series[labels] = series.get(labels, 0) + amount
+
+    def _observe(self, name: str, labels: Labels, value: float) -> None:
+        series = self.histograms[name]
+        if labels not in series:
+            series[labels] = _Histogram()
+        series[labels].observe(value)
+
+    def __call__(
+        self,
+        meter: TelemetryMeter,
+        result: Optional[SketchAnalysisResult],
+        error: Optional[BaseException]
+    ) -> None:
+        """Telemetry sink: record one finished (or failed) analysis."""
+        provider = meter.provider or "unknown"
+        if error is not None:
+            outcome = "error"
+        elif meter.cache_hit:
+            outcome = "cache_hit"
+        else:
+            outcome = "success"
+
+        self._inc("sketch_analyses_total", (("provider", provider), ("outcome", outcome)))
+        self._observe("sketch_analysis_seconds", (("provider", provider),), meter.elapsed())
+
+        for name, start, end in meter.spans:
+            self._observe("sketch_stage_seconds", (("stage", name),), end - start)
+
+        usage = meter.usage
+        for kind, count in (
+            ("input", usage.input_tokens),
+            ("output", usage.output_tokens),
+            ("cached_input", usage.cached_input_tokens),
+            ("cache_write", usage.cache_write_tokens),
+        ):
+            if count:
+                self._inc("sketch_tokens_total", (("provider", provider), ("kind", kind)), count)
+        if meter.image_bytes:
+            self._inc("sketch_image_bytes_total", (("provider", provider),), meter.image_bytes)
+        if meter.cascade:
+            self._inc(
+                "sketch_cascade_total",
+                (("outcome", meter.cascade), ("reason", meter.cascade_reason or "none"))
+            )
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+
+        for name, series in self.counters.items():
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for name, series in self.histograms.items():
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in sorted(series.items()):
+                for bound, count in zip(BUCKETS, hist.counts):
+                    bucket = 'le="%s"' % bound
+                    lines.append(f"{name}_bucket{_labels(labels, bucket)} {count}")
+                lines.append(f"{name}_bucket{_labels(labels, INF_BUCKET)} {hist.total}")
+                lines.append(f"{name}_sum{_labels(labels)} {round(hist.sum, 6)}")
+                lines.append(f"{name}_count{_labels(labels)} {hist.total}")
+
+        gauges = {"sketch_uptime_seconds": round(time.time() - self.started_at, 1)}
+        for source in self.gauge_sources:
+            gauges.update(source())
+        for name, value in gauges.items():
+            if value is None:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(metrics: SketchMetrics, port: int, host: str = "127.0.0.1") -> asyncio.AbstractServer:
+    """Expose ``metrics.render()`` at ``GET /metrics`` on ``host:port``."""
+
+    async def on_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            # Drain headers; the request has no body we care about
+            while (await reader.readline()).strip():
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", metrics.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(on_client, host=host, port=port)
@@ -0,0 +1,107 @@
+"""Optional OpenTelemetry export of analysis telemetry.
+
+Enabled with ``SKETCH_OTEL=1`` (or whenever ``OTEL_EXPORTER_OTLP_ENDPOINT`` is
+set). Each analysis becomes a ``sketch.analyze`` span with one child span per
+recorded stage (load, preprocess, encode, queue, request, first_byte, ...),
+carrying provider, model, token and byte counts as attributes.
+
+Spans are built after the analysis finishes from the meter's recorded
+timestamps, so the hot path never touches the OpenTelemetry API. Requires
+``opentelemetry-sdk`` and, for OTLP, ``opentelemetry-exporter-otlp``; the
+standard ``OTEL_*`` environment variables configure the exporter.
+"""
+
+import os
+import sys
+from typing import Optional
+
+from agents.telemetry import TelemetryMeter
+from agents.types import SketchAnalysisResult
+
+
+def otel_enabled() -> bool:
+    flag = os.getenv("SKETCH_OTEL")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "on")
+    return bool(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))
+
+
+class OTelSpanExporter:
+    """Telemetry sink that turns a finished meter into OpenTelemetry spans."""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def __call__(
+        self,
+        meter: TelemetryMeter,
+        result: Optional[SketchAnalysisResult],
+        error: Optional[BaseException]
+    ) -> None:
+        from opentelemetry import trace
+        from opentelemetry.trace import Status, StatusCode
+
+        def wall_ns(perf: float) -> int:
+            # Spans are recorded on perf_counter(); anchor them to the meter's wall start
+            return meter.started_ns + int((perf - meter.started) * 1e9)
+
+        usage = meter.usage
+        root = self.tracer.start_span(
+            "sketch.analyze",
+            start_time=meter.started_ns,
+            attributes={
+                "sketch.id": meter.sketch_id or "",
+                "sketch.provider": meter.provider or "",
+                "sketch.model": meter.model or "",
+                "sketch.cache_hit": meter.cache_hit,
+                "sketch.image_bytes": meter.image_bytes,
+                "sketch.requests": usage.requests,
+                "sketch.input_tokens": usage.input_tokens,
+                "sketch.output_tokens": usage.output_tokens,
+                "sketch.cached_input_tokens": usage.cached_input_tokens,
+                "sketch.cascade": meter.cascade or "",
+                "sketch.cascade_reason": meter.cascade_reason or "",
+            }
+        )
+        parent = trace.set_span_in_context(root)
+        for name, start, end in meter.spans:
+            span = self.tracer.start_span(f"sketch.{name}", context=parent, start_time=wall_ns(start))
+            span.end(end_time=wall_ns(end))
+
+        if error is not None:
+            root.record_exception(error)
+            root.set_status(Status(StatusCode.ERROR, str(error)))
+        root.end(end_time=wall_ns(meter.started + meter.elapsed()))
+
+
+def create_otel_exporter() -> Optional[OTelSpanExporter]:
+    """Build the span exporter, or None if disabled or OpenTelemetry is missing."""
+    if not otel_enabled():
+        return None
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        print(
+            "OpenTelemetry export disabled: install with "
+            "'pip install opentelemetry-sdk opentelemetry-exporter-otlp'",
+            file=sys.stderr
+        )
+        return None
+
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter()
+    except ImportError:
+        # SDK without the OTLP exporter: write spans to stderr instead
+        span_exporter = ConsoleSpanExporter(out=sys.stderr)
+
+    provider = TracerProvider(resource=Resource.create({
+        "service.name": os.getenv("OTEL_SERVICE_NAME", "sketch-agent")
+    }))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    return OTelSpanExporter(trace.get_tracer("sketch-agent"))
@@ -0,0 +1,396 @@
+"""Long-lived sketch analysis worker (JSON-lines over stdin/stdout or a Unix socket).
+
+Keeps one warm SketchAgent (provider client, loaded system prompt, open HTTP
+connections) for the lifetime of the process instead of paying interpreter
+startup and SDK imports for every drawing.
+
+Protocol - one JSON object per line in each direction:
+
+    -> {"id": "1", "op": "analyze", "image_path": "uploads/a.png", "context": "G+3 Dubai"}
+    <- {"id": "1", "success": true, "result": {...}, "latency_ms": 41235.2, "queue_ms": 0.1}
+
+    -> {"id": "1", "op": "analyze", "image_path": "uploads/a.png", "stream": true}
+    <- {"id": "1", "event": "section", "section": "project_metadata", "data": {...}, "elapsed": 3.1}
+    <- ...
+    <- {"id": "1", "success": true, "result": {...}, "latency_ms": 38012.4, "queue_ms": 0.1}
+
+    -> {"id": "2", "op": "ping"}
+    <- {"id": "2", "success": true, "op": "ping"}
+
+    -> {"id": "3", "op": "stats"}
+    <- {"id": "3", "success": true, "op": "stats", "stats": {...}}
+
+    -> {"id": "4", "op": "metrics"}
+    <- {"id": "4", "success": true, "op": "metrics", "metrics": "# TYPE sketch_analyses_total counter\n..."}
+
+    -> {"id": "5", "op": "query", "text": "C40 concrete", "kind": "material", "project": "P-2291"}
+    <- {"id": "5", "success": true, "op": "query", "facts": [...], "count": 3, "elapsed_ms": 0.8}
+
+    -> {"id": "6", "op": "shutdown"}
+
+An analyze request may carry ``"priority": "batch"`` to queue behind
+interactive requests at the provider rate limiters, and ``"project"`` to
+index its result under that project in the result store. ``query`` searches
+the store (fields as in ``ResultStore.query``, or ``"projects": true`` to
+list indexed projects); see agents/result_store.py.
+
+Analyses wait for room in the worker's memory budget
+(``SKETCH_MEMORY_BUDGET_MB``) before their image is decoded; ``stats``
+reports the budget under ``"memory"``. See agents/memory_budget.py.
+
+Every analysis result carries a ``telemetry`` block (stage timings, tokens,
+image bytes). The server also aggregates them into Prometheus metrics,
+returned by the ``metrics`` op and, with ``metrics_port``, served at
+``GET /metrics``; see services/metrics.py and services/otel.py.
+
+Requests are handled concurrently (bounded by ``max_concurrency``), so
+responses may arrive out of order; callers match them by ``id``.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from agents.http_transport import transport_stats
+from agents.rate_limiter import PRIORITY_BATCH, limiter_stats, request_priority
+from agents.result_store import DEFAULT_QUERY_LIMIT, store_project
+from services.metrics import SketchMetrics, serve_metrics
+from services.otel import create_otel_exporter
+from utils.json_output import dumps
+
+
+AnalyzeHandler = Callable[..., Awaitable[dict]]
+
+
+class WorkerStats:
+    """Rolling counters and latency samples for the worker."""
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self.started_at = time.time()
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.latencies_ms: list[float] = []
+
+    def record(self, success: bool, latency_ms: float) -> None:
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.latencies_ms.append(latency_ms)
+        if len(self.latencies_ms) > self.max_samples:
+            del self.latencies_ms[: len(self.latencies_ms) - self.max_samples]
+
+    def _percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[index], 1)
+
+    def snapshot(self) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "latency_p50_ms": self._percentile(50),
+            "latency_p95_ms": self._percentile(95),
+        }
+
+
+class SketchWorkerServer:
+    """Dispatches JSON-lines requests to a shared analysis handler.
+
+    The handler is the same coroutine the one-shot CLI uses
+    (``analyze_sketch_cli``); the server only supplies the warm agent,
+    bounds concurrency and attaches per-request latency.
+    """
+
+    def __init__(
+        self,
+        handler: AnalyzeHandler,
+        agent: Any,
+        max_concurrency: int = 8,
+        metrics_port: Optional[int] = None
+    ):
+        self.handler = handler
+        self.agent = agent
+        self.max_concurrency = max_concurrency
+        self.stats = WorkerStats()
+        self.metrics_port = metrics_port
+
+        # Aggregate per-analysis telemetry from the shared agent
+        self.metrics = SketchMetrics()
+        self.metrics.gauge_sources.append(self._worker_gauges)
+        sinks = getattr(agent, "telemetry_sinks", None)
+        if sinks is not None:
+            sinks.append(self.metrics)
+            exporter = create_otel_exporter()
+            if exporter is not None:
+                sinks.append(exporter)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._shutdown = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+        self._prewarm_task: Optional[asyncio.Task] = None
+
+    async def handle_request(
+        self,
+        request: dict,
+        write: Optional[Callable[[dict], Awaitable[None]]] = None
+    ) -> Optional[dict]:
+        """Handle one decoded request and return its response.
+
+        With ``"stream": true`` and a ``write`` callback, response sections
+        are written as partial messages before the final response.
+        """
+        request_id = request.get("id")
+        op = request.get("op", "analyze")
+
+        if op == "ping":
+            return {"id": request_id, "success": True, "op": "ping"}
+
+        if op == "stats":
+            stats = self.stats.snapshot()
+            vision_model = getattr(self.agent, "vision_model", None)
+            if hasattr(vision_model, "stats"):
+                # Router: per-provider latency, error rate and breaker state
+                stats["routing"] = vision_model.stats()
+            stats["rate_limits"] = limiter_stats()
+            stats["http"] = transport_stats()
+            region_cache = getattr(self.agent, "region_cache", None)
+            if region_cache is not None:
+                stats["region_cache"] = region_cache.stats()
+            if getattr(self.agent, "cascade", None) is not None:
+                stats["cascade"] = self.agent.cascade_stats.snapshot()
+            text_layer_stats = getattr(self.agent, "text_layer_stats", None)
+            if text_layer_stats is not None and (text_layer_stats.text_only or text_layer_stats.assisted):
+                stats["text_layer"] = text_layer_stats.snapshot()
+            result_store = getattr(self.agent, "result_store", None)
+            if result_store is not None:
+                stats["store"] = result_store.stats()
+            memory_budget = getattr(self.agent, "memory_budget", None)
+            if memory_budget is not None:
+                stats["memory"] = memory_budget.snapshot()
+            return {"id": request_id, "success": True, "op": "stats", "stats": stats}
+
+        if op == "query":
+            return self._query(request_id, request)
+
+        if op == "metrics":
+            return {"id": request_id, "success": True, "op": "metrics", "metrics": self.metrics.render()}
+
+        if op == "shutdown":
+            self._shutdown.set()
+            return {"id": request_id, "success": True, "op": "shutdown"}
+
+        if op != "analyze":
+            return {
+                "id": request_id,
+                "success": False,
+                "error": f"Unknown op: {op}",
+                "error_type": "InvalidRequest"
+            }
+
+        image_path = request.get("image_path")
+        if not image_path:
+            return {
+                "id": request_id,
+                "success": False,
+                "error": "Missing 'image_path'",
+                "error_type": "InvalidRequest"
+            }
+
+        received = time.perf_counter()
+        self.stats.requests += 1
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            self.stats.in_flight += 1
+            # Each request runs in its own task, so these stay local to it
+            if request.get("priority") == "batch":
+                request_priority.set(PRIORITY_BATCH)
+            if request.get("project"):
+                store_project.set(str(request["project"]))
+            on_section = None
+            if request.get("stream") and write is not None:
+                async def on_section(event: dict) -> None:
+                    await write({"id": request_id, **event})
+
+            try:
+                response = await self.handler(
+                    image_path,
+                    request.get("context"),
+                    agent=self.agent,
+                    on_section=on_section
+                )
+            except Exception as e:
+                response = {"success": False, "error": str(e), "error_type": type(e).__name__}
+            finally:
+                self.stats.in_flight -= 1
+
+        latency_ms = (time.perf_counter() - received) * 1000
+        self.stats.record(response.get("success", False), latency_ms)
+
+        return {
+            "id": request_id,
+            **response,
+            "latency_ms": round(latency_ms, 1),
+            "queue_ms": round((started - received) * 1000, 1),
+        }
+
+    def _query(self, request_id: Any, request: dict) -> dict:
+        """Answer a ``query`` op from the agent's result store."""
+        result_store = getattr(self.agent, "result_store", None)
+        if result_store is None:
+            return {
+                "id": request_id,
+                "success": False,
+                "error": "Result store is disabled (SKETCH_STORE_ENABLED=0)",
+                "error_type": "InvalidRequest"
+            }
+
+        start = time.perf_counter()
+        try:
+            if request.get("projects"):
+                response = {"projects": result_store.projects()}
+            else:
+                facts = result_store.query(
+                    request.get("text"),
+                    kind=request.get("kind"),
+                    project=request.get("project"),
+                    sheet=request.get("sheet"),
+                    value=request.get("value"),
+                    unit=request.get("unit"),
+                    limit=int(request.get("limit", DEFAULT_QUERY_LIMIT))
+                )
+                response = {"facts": facts, "count": len(facts)}
+        except (ValueError, TypeError) as e:
+            return {"id": request_id, "success": False, "error": str(e), "error_type": "InvalidRequest"}
+
+        return {
+            "id": request_id,
+            "success": True,
+            "op": "query",
+            **response,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def _worker_gauges(self) -> dict:
+        http = transport_stats()
+        gauges = {
+            "sketch_worker_in_flight": self.stats.in_flight,
+            "sketch_worker_queued": self.stats.requests - self.stats.succeeded - self.stats.failed - self.stats.in_flight,
+            "sketch_worker_max_concurrency": self.max_concurrency,
+            "sketch_http_open_connections": http["open_connections"],
+            "sketch_http_connections_opened": http["connections_opened"],
+            "sketch_http_pool_waits": http["pool_waits"],
+            "sketch_http_pool_wait_seconds": http["pool_wait_seconds"],
+        }
+        memory_budget = getattr(self.agent, "memory_budget", None)
+        if memory_budget is not None:
+            gauges["sketch_worker_memory_reserved_bytes"] = memory_budget.reserved
+            gauges["sketch_worker_memory_waits"] = memory_budget.waited
+        return gauges
+
+    async def _start(self) -> None:
+        if self.metrics_port:
+            self._metrics_server = await serve_metrics(self.metrics, self.metrics_port)
+        # Connect to the provider while the caller is still sending its first request
+        prewarm = getattr(self.agent, "prewarm", None)
+        if prewarm is not None:
+            self._prewarm_task = asyncio.create_task(prewarm())
+
+    async def _dispatch_line(self, line: bytes, write: Callable[[dict], Awaitable[None]]) -> None:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError as e:
+            await write({
+                "id": None,
+                "success": False,
+                "error": f"Invalid request: {e}",
+                "error_type": "InvalidRequest"
+            })
+            return
+
+        response = await self.handle_request(request, write)
+        if response is not None:
+            await write(response)
+
+    async def _serve_stream(
+        self,
+        reader: asyncio.StreamReader,
+        write: Callable[[dict], Awaitable[None]]
+    ) -> None:
+        """Read request lines until EOF or shutdown, handling each as a task."""
+        while not self._shutdown.is_set():
+            read_task = asyncio.ensure_future(reader.readline())
+            shutdown_task = asyncio.ensure_future(self._shutdown.wait())
+            done, _ = await asyncio.wait(
+                {read_task, shutdown_task},
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if read_task not in done:
+                read_task.cancel()
+                break
+            shutdown_task.cancel()
+
+            line = read_task.result()
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            task = asyncio.create_task(self._dispatch_line(line, write))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def serve_stdio(self) -> None:
+        """Serve requests from stdin, writing responses to stdout."""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=2 ** 20)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader),
+            sys.stdin
+        )
+        write_lock = asyncio.Lock()
+        await self._start()
+
+        async def write(message: dict) -> None:
+            async with write_lock:
+                sys.stdout.write(dumps(message) + "\n")
+                sys.stdout.flush()
+
+        await write({"id": None, "success": True, "op": "ready"})
+        await self._serve_stream(reader, write)
+
+    async def serve_unix(self, socket_path: str) -> None:
+        """Serve requests on a Unix domain socket (one stream per client)."""
+
+        async def on_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            write_lock = asyncio.Lock()
+
+            async def write(message: dict) -> None:
+                async with write_lock:
+                    writer.write((dumps(message) + "\n").encode())
+                    await writer.drain()
+
+            try:
+                await self._serve_stream(reader, write)
+            finally:
+                writer.close()
+
+        await self._start()
+        server = await asyncio.start_unix_server(on_client, path=socket_path, limit=2 ** 20)
+        async with server:
+            await self._shutdown.wait()
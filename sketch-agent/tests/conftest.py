@@ -0,0 +1,15 @@
+"""Shared setup: import ``agents`` from this checkout and run offline on the mock provider."""
+
+import os
+import sys
+from pathlib import Path
+
+# Must be set before the agent reads its configuration
+os.environ["VISION_PROVIDER"] = "mock"
+os.environ["SKETCH_MOCK_LATENCY_MS"] = "0"
+os.environ["SKETCH_CACHE_ENABLED"] = "0"
+os.environ["SKETCH_STORE_ENABLED"] = "0"
+os.environ.pop("SKETCH_MEMORY_BUDGET_MB", None)
+os.environ.pop("SKETCH_CASCADE", None)
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
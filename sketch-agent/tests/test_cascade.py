@@ -0,0 +1,69 @@
+import pytest
+from PIL import Image
+
+from agents.cascade import parse_triage_spec, triage_target
+from agents.mock_provider import DEFAULT_RESPONSES
+from agents.sketch_agent_v2 import SketchAgent
+
+
+def build(cascade: str) -> SketchAgent:
+    return SketchAgent(provider="mock", use_cache=False, use_result_store=False, cascade=cascade)
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("off", None),
+    ("", None),
+    ("on", (None, None)),
+    ("OpenAI", ("openai", None)),
+    ("anthropic:claude-3-5-haiku-latest", ("anthropic", "claude-3-5-haiku-latest")),
+])
+def test_parse_triage_spec(spec, expected):
+    assert parse_triage_spec(spec) == expected
+
+
+def test_triage_target_defaults_to_the_cheaper_tier():
+    assert triage_target((None, None), "openai") == ("openai", "gpt-4o-mini")
+    assert triage_target((None, None), "mock") is None
+    assert triage_target(("mock", None), "openai") == ("mock", None)
+
+
+def test_bad_cascade_spec_fails_when_the_agent_is_built():
+    with pytest.raises(ValueError, match="cascade"):
+        build("opnai:gpt-4o-mini")
+
+
+def test_missing_api_key_fails_when_the_agent_is_built(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    with pytest.raises(ValueError, match="cascade"):
+        build("openai")
+
+
+async def test_pinned_triage_model_is_used():
+    agent = build(f"mock:{DEFAULT_RESPONSES}")
+    image = Image.new("RGB", (640, 480), "white")
+
+    triage_model = agent._get_triage_model("mock")
+    assert triage_model is not agent.vision_model
+    assert triage_model.model == f"mock:{DEFAULT_RESPONSES.name}"
+
+    # The recorded responses replay in order: the boundary wall sketch, then the warehouse plan
+    assert await agent._triage("mock", image, "Analyze.") is None
+    kept = await agent._triage("mock", image, "Analyze.")
+
+    assert kept.context_layer.document_type == "Architectural Construction Drawing"
+    assert kept.project_metadata.drawing_number == "A-101"
+    assert (triage_model.calls, agent.vision_model.calls) == (2, 0)
+    assert agent.cascade_stats.snapshot() == {
+        "sheets": 2,
+        "kept": 1,
+        "escalated": 1,
+        "escalated_share": 0.5,
+        "reasons": {"low_confidence": 1},
+    }
+
+
+def test_no_cheaper_tier_leaves_the_cascade_idle():
+    agent = build("on")
+
+    assert agent._get_triage_model("mock") is None
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from agents.job_journal import JobJournal, plan_job_sheets
+from agents.types import BatchItem, BatchResult
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal"))
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def drawings(tmp_path):
+    paths = []
+    for name in ("a.png", "b.png", "c.png"):
+        path = tmp_path / name
+        path.write_bytes(b"not decoded by the journal")
+        paths.append(str(path))
+    return paths
+
+
+def finish(journal: JobJournal, job_id: str, sheets, success: bool = True) -> None:
+    for sheet in sheets:
+        journal.mark_in_flight(job_id, sheet.key)
+        journal.record(job_id, sheet.key, BatchResult(index=sheet.index, success=success))
+
+
+def test_sheets_listed_twice_get_their_own_key(drawings):
+    sheets = plan_job_sheets([BatchItem(image_path=drawings[0]), BatchItem(image_path=drawings[0], context="x")])
+
+    assert [sheet.key for sheet in sheets] == [drawings[0], f"{drawings[0]}@2"]
+    assert sheets[0].fingerprint == sheets[1].fingerprint != "missing"
+
+
+def test_resume_skips_done_sheets_and_retries_the_rest(journal, drawings):
+    sheets = plan_job_sheets([BatchItem(image_path=path) for path in drawings])
+    assert journal.start("job", None, sheets) == sheets
+
+    finish(journal, "job", sheets[:1])
+    finish(journal, "job", sheets[1:2], success=False)
+    journal.mark_in_flight("job", sheets[2].key)
+    journal.finish("job")
+    assert journal.progress("job")["status"] == "incomplete"
+
+    pending = journal.start("job", None, plan_job_sheets([BatchItem(image_path=path) for path in drawings]))
+
+    assert [sheet.key for sheet in pending] == [sheets[1].key, sheets[2].key]
+    progress = journal.progress("job")
+    assert (progress["runs"], progress["done"], progress["queued"]) == (2, 1, 2)
+    assert [result.index for result in journal.results("job")] == [0]
+
+
+def test_modified_drawing_is_analyzed_again(journal, drawings):
+    sheets = plan_job_sheets([BatchItem(image_path=path) for path in drawings])
+    journal.start("job", None, sheets)
+    finish(journal, "job", sheets)
+    journal.finish("job")
+    assert journal.progress("job")["status"] == "completed"
+
+    with open(drawings[1], "ab") as f:
+        f.write(b" revision B")
+    stat = os.stat(drawings[1])
+    os.utime(drawings[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    pending = journal.start("job", None, plan_job_sheets([BatchItem(image_path=path) for path in drawings]))
+
+    assert [sheet.key for sheet in pending] == [sheets[1].key]
+    assert [result.index for result in journal.results("job")] == [0, 2]
+
+
+def test_sheets_dropped_from_the_set_leave_the_job(journal, drawings):
+    journal.start("job", None, plan_job_sheets([BatchItem(image_path=path) for path in drawings]))
+
+    journal.start("job", None, plan_job_sheets([BatchItem(image_path=drawings[0])]))
+
+    assert journal.progress("job")["sheets"] == 1
@@ -0,0 +1,111 @@
+import pytest
+from PIL import Image
+
+from agents.json_extract import JSONExtractionError, extract_json
+from agents.sketch_agent_v2 import SketchAgent
+
+
+@pytest.fixture
+def agent():
+    return SketchAgent(provider="mock", use_cache=False, use_result_store=False)
+
+
+class ContinuationModel:
+    """Answers a continuation request with ``tail``."""
+
+    def __init__(self, tail: str):
+        self.tail = tail
+        self.prompts = []
+
+    async def analyze_image(self, image, prompt, max_tokens, temperature, system=None):
+        self.prompts.append(prompt)
+        return self.tail
+
+
+COMPLETE = '{"project_metadata": {"drawing_number": "A-101"}, "standards": ["BS 8110"], "confidence_score": 0.9}'
+
+
+def test_complete_object_inside_prose_and_fence():
+    extracted = extract_json(f"Here is the analysis:\n```json\n{COMPLETE}\n```\nLet me know.")
+
+    assert extracted.data["project_metadata"] == {"drawing_number": "A-101"}
+    assert not extracted.repaired
+    assert not extracted.truncated
+
+
+def test_truncated_object_keeps_complete_sections():
+    text = COMPLETE[:COMPLETE.index('"confidence_score"') + 8]
+
+    extracted = extract_json(text)
+
+    assert extracted.truncated
+    assert extracted.repaired
+    assert extracted.data == {"project_metadata": {"drawing_number": "A-101"}, "standards": ["BS 8110"]}
+    assert extracted.dropped_chars == len(text) - text.rindex(",")
+
+
+def test_truncated_inside_nested_list_closes_open_structures():
+    text = '{"context_layer": {"document_type": "Plan"}, "standards": ["BS 8110", "ASTM A6'
+
+    extracted = extract_json(text)
+
+    assert extracted.data == {"context_layer": {"document_type": "Plan"}, "standards": ["BS 8110"]}
+
+
+def test_malformed_object_is_repaired_not_truncated():
+    text = '{"standards": ["BS 8110"], "notes": "ok", "confidence_score": 0.9,, "x": 1}'
+
+    extracted = extract_json(text)
+
+    assert extracted.repaired
+    assert not extracted.truncated
+    assert extracted.data["notes"] == "ok"
+
+
+def test_cut_off_before_first_section_asks_for_continuation():
+    with pytest.raises(JSONExtractionError) as error:
+        extract_json('{"project_metadata": {"drawing_number": "A-1')
+    assert error.value.truncated
+
+
+def test_malformed_before_first_section_does_not_ask_for_continuation():
+    with pytest.raises(JSONExtractionError) as error:
+        extract_json('{"project_metadata": {"drawing_number": "A-101"]]}')
+    assert not error.value.truncated
+
+
+def test_no_object():
+    with pytest.raises(JSONExtractionError) as error:
+        extract_json("I cannot read this drawing.")
+    assert not error.value.truncated
+
+
+async def test_response_cut_off_early_is_completed_by_a_continuation(agent):
+    head = '{"project_metadata": {"drawing_number": "A-1'
+    model = ContinuationModel('```json\n01"}, "standards": ["BS 8110"]}\n```')
+
+    result = await agent._parse_or_continue(model, Image.new("L", (8, 8)), "Analyze.", head)
+
+    assert result.project_metadata.drawing_number == "A-101"
+    assert result.standards == ["BS 8110"]
+    assert any("continuation" in warning for warning in result.warnings)
+    assert head in model.prompts[0]
+
+
+async def test_salvageable_response_needs_no_continuation(agent):
+    model = ContinuationModel("unused")
+
+    result = await agent._parse_or_continue(
+        model, Image.new("L", (8, 8)), "Analyze.", '{"standards": ["BS 8110"], "notes": "cut'
+    )
+
+    assert result.standards == ["BS 8110"]
+    assert model.prompts == []
+
+
+async def test_malformed_response_is_not_continued(agent):
+    model = ContinuationModel("unused")
+
+    with pytest.raises(JSONExtractionError):
+        await agent._parse_or_continue(model, Image.new("L", (8, 8)), "Analyze.", '{"standards": ]]')
+    assert model.prompts == []
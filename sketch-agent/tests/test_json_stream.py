@@ -0,0 +1,43 @@
+from agents.json_stream import IncrementalJSONParser
+
+
+RESPONSE = (
+    'Sure.\n```json\n{"context_layer": {"document_type": "Plan", "key_features": ["a}", "b"]}, '
+    '"standards": ["BS 8110"], "notes": "escaped \\" quote, and comma", "confidence_score": 0.85}\n```'
+)
+
+
+def test_sections_emitted_as_they_complete():
+    parser = IncrementalJSONParser()
+    cut = RESPONSE.index('"standards"')
+
+    first = parser.feed(RESPONSE[:cut])
+    assert first == [("context_layer", {"document_type": "Plan", "key_features": ["a}", "b"]})]
+
+    rest = parser.feed(RESPONSE[cut:])
+    assert [key for key, _ in rest] == ["standards", "notes", "confidence_score"]
+    assert parser.sections["notes"] == 'escaped " quote, and comma'
+    assert parser.sections["confidence_score"] == 0.85
+    assert parser.done
+
+
+def test_character_by_character_matches_whole_feed():
+    whole = IncrementalJSONParser()
+    whole.feed(RESPONSE)
+
+    streamed = IncrementalJSONParser()
+    completed = []
+    for char in RESPONSE:
+        completed.extend(streamed.feed(char))
+
+    assert [key for key, _ in completed] == list(whole.sections)
+    assert streamed.sections == whole.sections
+    assert streamed.text == RESPONSE
+
+
+def test_incomplete_member_is_not_emitted():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"standards": ["BS 8110", "AS') == []
+    assert not parser.done
+    assert parser.sections == {}
@@ -0,0 +1,94 @@
+import asyncio
+
+from agents.memory_budget import MemoryBudget
+
+
+async def hold(budget: MemoryBudget, name: str, nbytes: int, order: list, release: asyncio.Event) -> None:
+    async with budget.reserve(nbytes):
+        order.append(name)
+        await release.wait()
+
+
+async def test_waiters_are_admitted_in_arrival_order():
+    budget = MemoryBudget(100)
+    order = []
+    release = {name: asyncio.Event() for name in ("big", "large", "small")}
+
+    big = asyncio.create_task(hold(budget, "big", 80, order, release["big"]))
+    await asyncio.sleep(0)
+    large = asyncio.create_task(hold(budget, "large", 60, order, release["large"]))
+    await asyncio.sleep(0)
+    # Would fit beside "big", but must not overtake "large"
+    small = asyncio.create_task(hold(budget, "small", 10, order, release["small"]))
+    await asyncio.sleep(0)
+    assert order == ["big"]
+    assert budget.snapshot()["queued"] == 2
+
+    release["big"].set()
+    await asyncio.sleep(0.01)
+    assert order == ["big", "large", "small"]
+    assert budget.reserved == 70
+
+    release["large"].set()
+    release["small"].set()
+    await asyncio.gather(big, large, small)
+    assert budget.reserved == 0
+    assert (budget.admitted, budget.waited) == (3, 2)
+
+
+async def test_sheet_larger_than_budget_runs_alone():
+    budget = MemoryBudget(100)
+
+    async with budget.reserve(500) as lease:
+        assert lease.nbytes == 100
+        assert budget.reserved == 100
+    assert budget.reserved == 0
+
+
+async def test_resize_admits_the_next_sheet():
+    budget = MemoryBudget(100)
+    order = []
+    release = asyncio.Event()
+
+    async with budget.reserve(90) as lease:
+        waiter = asyncio.create_task(hold(budget, "next", 50, order, release))
+        await asyncio.sleep(0)
+        assert order == []
+
+        lease.resize(40)
+        await asyncio.sleep(0)
+        assert order == ["next"]
+        assert budget.reserved == 90
+        release.set()
+        await waiter
+
+
+async def test_cancelled_waiter_does_not_block_the_queue():
+    budget = MemoryBudget(100)
+    order = []
+    release = asyncio.Event()
+
+    async with budget.reserve(80):
+        cancelled = asyncio.create_task(hold(budget, "cancelled", 60, order, release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(budget, "queued", 20, order, release))
+        await asyncio.sleep(0)
+        assert order == []
+
+        cancelled.cancel()
+        await asyncio.sleep(0.01)
+        assert order == ["queued"]
+        assert budget.snapshot()["queued"] == 0
+        release.set()
+        await queued
+    assert budget.reserved == 0
+
+
+async def test_no_limit_only_tracks_usage():
+    budget = MemoryBudget()
+
+    async with budget.reserve(10**12):
+        async with budget.reserve(10**12):
+            assert budget.reserved == 2 * 10**12
+    assert budget.waited == 0
+    assert budget.peak_reserved == 2 * 10**12
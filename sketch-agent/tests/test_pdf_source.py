@@ -0,0 +1,81 @@
+import gc
+import weakref
+
+import pytest
+
+from agents import pdf_source
+from agents.sketch_agent_v2 import SketchAgent
+
+
+PAGES = 3
+
+
+@pytest.fixture
+def agent():
+    return SketchAgent(provider="mock", use_cache=False, use_result_store=False)
+
+
+@pytest.fixture
+def drawing_set(tmp_path):
+    """An A3 vector drawing set: a grid of lines on each page, no text layer."""
+    pymupdf = pytest.importorskip("pymupdf")
+    document = pymupdf.open()
+    for _ in range(PAGES):
+        page = document.new_page(width=1191, height=842)
+        for x in range(50, 1150, 100):
+            page.draw_line((x, 40), (x, 800))
+        for y in range(40, 800, 100):
+            page.draw_line((50, y), (1150, y))
+    path = tmp_path / "set.pdf"
+    document.save(str(path))
+    document.close()
+    return str(path)
+
+
+async def test_page_bitmap_is_freed_before_the_provider_responds(agent, drawing_set, monkeypatch):
+    render_page = pdf_source.render_page
+    rendered = []
+
+    def render(document, page_number, dpi, budget=None):
+        image = render_page(document, page_number, dpi, budget)
+        rendered.append(weakref.ref(image))
+        return image
+
+    monkeypatch.setattr(pdf_source, "render_page", render)
+
+    analyze_image = agent.vision_model.analyze_image
+    alive = []
+
+    async def probe(*args, **kwargs):
+        gc.collect()
+        # Requests go out in page order at concurrency 1
+        alive.append(rendered[len(alive)]() is not None)
+        return await analyze_image(*args, **kwargs)
+
+    monkeypatch.setattr(agent.vision_model, "analyze_image", probe)
+
+    # Rendered at full resolution, so the page is not itself the image sent
+    pages = pdf_source.iter_pdf_pages(drawing_set, dpi=300)
+    results = [result async for result in agent.iter_batch(pages, max_concurrency=1)]
+
+    assert [result.success for result in results] == [True] * PAGES
+    assert alive == [False] * PAGES
+
+
+async def test_page_that_fails_to_render_fails_alone(agent, drawing_set, monkeypatch):
+    render_page = pdf_source.render_page
+
+    def render(document, page_number, dpi, budget=None):
+        if page_number == 2:
+            raise RuntimeError("cannot render page 2")
+        return render_page(document, page_number, dpi, budget)
+
+    monkeypatch.setattr(pdf_source, "render_page", render)
+
+    pages = pdf_source.iter_pdf_pages(drawing_set, text_layer=False)
+    results = sorted([result async for result in agent.iter_batch(pages)], key=lambda result: result.page)
+
+    assert [(result.page, result.success) for result in results] == [(1, True), (2, False), (3, True)]
+    failed = results[1]
+    assert failed.sketch_id == "set-p2"
+    assert (failed.error, failed.error_type) == ("cannot render page 2", "RuntimeError")
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from agents.rate_limiter import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    ProviderLimiter,
+    TokenBucket,
+    request_priority,
+)
+
+
+TPM = 30000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("agents.rate_limiter.time.monotonic", lambda: now[0])
+    return now
+
+
+def saturate(bucket: TokenBucket, clock: list, amount: float, minutes: float) -> float:
+    """Send ``amount``-sized requests back to back; tokens charged per minute.
+
+    The run lasts until the next request could go, so every charged token
+    has been refilled by its end.
+    """
+    start = clock[0]
+    charged = 0.0
+    while True:
+        clock[0] += bucket.delay(amount)
+        if clock[0] - start >= minutes * 60:
+            return charged / ((clock[0] - start) / 60)
+        bucket.take(amount)
+        charged += amount
+
+
+def test_bucket_starts_full_and_refills(clock):
+    bucket = TokenBucket(per_minute=60, burst_seconds=10)
+
+    assert bucket.delay(10) == 0.0
+    bucket.take(10)
+    assert bucket.delay(1) == 1.0
+
+    clock[0] += 0.5
+    assert bucket.delay(1) == 0.5
+
+
+def test_requests_larger_than_the_burst_stay_within_quota(clock):
+    bucket = TokenBucket(per_minute=TPM, burst_seconds=10)
+    amount = 2.3 * bucket.capacity
+
+    per_minute = saturate(bucket, clock, amount, minutes=10)
+
+    assert per_minute <= TPM + 1e-6
+    assert per_minute >= 0.99 * TPM
+
+
+def test_large_request_debt_delays_the_next_one(clock):
+    bucket = TokenBucket(per_minute=TPM, burst_seconds=10)
+
+    assert bucket.delay(3 * bucket.capacity) == 0.0
+    bucket.take(3 * bucket.capacity)
+
+    # Two bucketfuls of debt to repay before one token is available
+    assert bucket.delay(1) == pytest.approx((2 * bucket.capacity + 1) / bucket.rate)
+
+
+def test_small_requests_stay_within_quota_plus_burst(clock):
+    bucket = TokenBucket(per_minute=TPM, burst_seconds=10)
+
+    per_minute = saturate(bucket, clock, 700, minutes=10)
+
+    assert per_minute <= TPM + bucket.capacity / 10 + 1e-6
+
+
+async def test_interactive_requests_go_ahead_of_queued_batch():
+    limiter = ProviderLimiter("test")
+    order = []
+
+    async def request(name: str, priority: int) -> None:
+        request_priority.set(priority)
+        await limiter.acquire()
+        order.append(name)
+
+    limiter.pause(0.05)
+    batch = [asyncio.create_task(request(f"batch{i}", PRIORITY_BATCH)) for i in range(3)]
+    await asyncio.sleep(0.01)
+    interactive = asyncio.create_task(request("interactive", PRIORITY_INTERACTIVE))
+    await asyncio.gather(*batch, interactive)
+
+    assert order == ["interactive", "batch0", "batch1", "batch2"]
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    limiter = ProviderLimiter("test")
+    limiter.pause(0.05)
+
+    waiter = asyncio.create_task(limiter.acquire(priority=PRIORITY_INTERACTIVE))
+    queued = asyncio.create_task(limiter.acquire(priority=PRIORITY_BATCH))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.wait_for(queued, timeout=1)
+
+    assert waiter.cancelled()
+    assert limiter.stats()["queued"] == 0
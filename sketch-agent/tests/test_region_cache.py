@@ -0,0 +1,89 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from agents.region_cache import RegionCache, fingerprint_title_region, reusable_fields
+from agents.sketch_agent_v2 import SketchAgent
+
+
+NUMBER_BOX = (1930, 1500, 2100, 1515)
+
+
+def sheet(number: str) -> Image.Image:
+    """A plan with a ruled title strip on the right; the drawing number sits at its foot."""
+    image = Image.new("L", (2400, 1700), 255)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 20, 2379, 1679), outline=0, width=3)
+    draw.line((1900, 20, 1900, 1679), fill=0, width=3)
+    for y in (300, 700, 1100, 1400):
+        draw.line((1900, y, 2379, y), fill=0, width=2)
+    for i, line in enumerate(("PROJECT: LOGISTICS DEPOT", "CLIENT: GULF PORTS", "CONSULTANT: ARUP", "GENERAL NOTES")):
+        draw.text((1930, 80 + i * 300), line, fill=0)
+    draw.text(NUMBER_BOX[:2], f"DRAWING No. {number}", fill=0)
+    for x in range(200, 1700, 300):
+        draw.rectangle((x, 300, x + 200, 1300), outline=0, width=4)
+    return image
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    agent = SketchAgent(
+        provider="mock",
+        use_cache=False,
+        use_result_store=False,
+        use_region_cache=True,
+        region_cache=RegionCache(str(tmp_path / "regions"))
+    )
+
+    async def extract_region(vision_model, provider, image, label):
+        # As read from the sheet that recurred first
+        return {
+            "project_metadata": {"project_title": "Logistics Depot", "drawing_number": "A-101", "revision": "B"},
+            "standards": ["BS 8110"],
+        }
+
+    monkeypatch.setattr(agent, "_extract_region", extract_region)
+    return agent
+
+
+def test_detects_the_title_strip():
+    fingerprint = fingerprint_title_region(sheet("A-101"))
+
+    assert fingerprint.region.kind == "right_strip"
+    assert fingerprint.region.box[0] == 1899
+
+
+async def test_one_digit_apart_does_not_reuse_the_drawing_number(agent):
+    assert await agent._plan_regions(sheet("A-101"), "mock", agent.vision_model) is None
+    assert await agent._plan_regions(sheet("A-101"), "mock", agent.vision_model) is not None
+
+    image = sheet("A-102")
+    plan = await agent._plan_regions(image, "mock", agent.vision_model)
+
+    metadata = plan.reused.project_metadata
+    assert metadata.project_title == "Logistics Depot"
+    assert (metadata.drawing_number, metadata.revision) == (None, None)
+    assert plan.reused.standards == ["BS 8110"]
+    assert "drawing_number" in plan.prompt_note
+    # The model still sees this sheet's number
+    assert plan.image.crop(NUMBER_BOX).tobytes() == image.crop(NUMBER_BOX).tobytes()
+
+
+async def test_exact_match_masks_everything_but_the_identification_zone(agent):
+    for _ in range(2):
+        await agent._plan_regions(sheet("A-101"), "mock", agent.vision_model)
+
+    image = sheet("A-101")
+    plan = await agent._plan_regions(image, "mock", agent.vision_model)
+
+    assert plan.exact
+    assert plan.image.size == image.size
+    assert plan.image.crop((1910, 60, 2370, 120)).getextrema() == (255, 255)
+    assert plan.image.crop(NUMBER_BOX).tobytes() == image.crop(NUMBER_BOX).tobytes()
+    assert plan.reused.project_metadata.drawing_number is None
+
+
+def test_reusable_fields_drop_sheet_fields_only():
+    extraction = {"project_metadata": {"project_number": "P-7", "sheet_of": "3 of 9", "date": "2024-05-01"}, "notes": "x"}
+
+    assert reusable_fields(extraction) == {"project_metadata": {"project_number": "P-7"}, "notes": "x"}
+    assert extraction["project_metadata"]["sheet_of"] == "3 of 9"
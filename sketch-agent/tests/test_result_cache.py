@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import pytest
+from PIL import Image
+
+from agents import sketch_agent_v2
+from agents.result_cache import ResultCache
+from agents.sketch_agent_v2 import SketchAgent
+from agents.types import SketchMetadata
+
+
+@pytest.fixture
+def agent(tmp_path):
+    return SketchAgent(provider="mock", cache=ResultCache(str(tmp_path / "cache")), use_cache=True, use_result_store=False)
+
+
+def metadata(sketch_id: str) -> SketchMetadata:
+    return SketchMetadata(sketch_id=sketch_id, filename=f"{sketch_id}.png", file_size=0, dimensions=(800, 600))
+
+
+async def test_repeated_sheet_is_served_from_the_cache(agent):
+    image = Image.new("RGB", (800, 600), "white")
+
+    first = await agent.analyze_sketch(image, metadata("a-101"))
+    second = await agent.analyze_sketch(image.copy(), metadata("a-101-copy"))
+
+    assert not first.cache_hit
+    assert second.cache_hit
+    assert second.sketch_id == "a-101-copy"
+    assert second.technical_data == first.technical_data
+
+
+async def test_pixel_hash_does_not_block_the_event_loop(agent, monkeypatch):
+    hash_image_pixels = sketch_agent_v2.hash_image_pixels
+
+    def slow_hash(image):
+        # As long as hashing an A0 scan
+        time.sleep(0.3)
+        return hash_image_pixels(image)
+
+    monkeypatch.setattr(sketch_agent_v2, "hash_image_pixels", slow_hash)
+    analysis = asyncio.create_task(agent.analyze_sketch(Image.new("RGB", (800, 600), "white"), metadata("a-101")))
+
+    ticks = 0
+    while not analysis.done():
+        await asyncio.sleep(0.01)
+        ticks += 1
+
+    assert (await analysis).sketch_id == "a-101"
+    assert ticks >= 10
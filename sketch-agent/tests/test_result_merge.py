@@ -0,0 +1,68 @@
+import pytest
+
+from agents.result_merge import merge_results
+from agents.types import (
+    DetailedComponent,
+    DetailedDimension,
+    DetailedMaterial,
+    ProjectMetadata,
+    Quantities,
+    SketchAnalysisResult,
+    TechnicalData,
+)
+
+
+def test_overlapping_tiles_are_deduplicated():
+    overview = SketchAnalysisResult(
+        project_metadata=ProjectMetadata(drawing_number="A-101"),
+        technical_data=TechnicalData(
+            dimensions=[DetailedDimension(label="Overall length", value=40.0, unit="m", views=["Plan"], confidence=0.6)],
+            materials=[DetailedMaterial(component="Slab", spec="C40 concrete")],
+            quantities=Quantities(concrete_volume_m3=0, steel_weight_kg=1200),
+        ),
+        standards=["BS 8110"],
+        confidence_score=0.8,
+    )
+    tile = SketchAnalysisResult(
+        project_metadata=ProjectMetadata(drawing_number="A-999", revision="C"),
+        technical_data=TechnicalData(
+            dimensions=[
+                DetailedDimension(label="overall  LENGTH", value=40.0, unit="M", views=["Section A"], confidence=0.9),
+                DetailedDimension(label="Bay width", value=6.0, unit="m"),
+            ],
+            materials=[DetailedMaterial(component="slab", spec="C40 Concrete", location="Ground floor")],
+            components=[DetailedComponent(type="Column", size="UC 203", count=12)],
+            quantities=Quantities(concrete_volume_m3=85.5, steel_weight_kg=900),
+        ),
+        standards=["bs 8110", "ASTM A36"],
+        confidence_score=0.6,
+    )
+
+    merged = merge_results([overview, tile])
+
+    dimensions = merged.technical_data.dimensions
+    assert [d.label for d in dimensions] == ["overall  LENGTH", "Bay width"]
+    assert dimensions[0].confidence == 0.9
+    assert dimensions[0].views == ["Plan", "Section A"]
+
+    materials = merged.technical_data.materials
+    assert len(materials) == 1
+    assert (materials[0].spec, materials[0].location) == ("C40 concrete", "Ground floor")
+    assert len(merged.technical_data.components) == 1
+
+    quantities = merged.technical_data.quantities
+    assert (quantities.concrete_volume_m3, quantities.steel_weight_kg) == (85.5, 1200)
+
+    # The overview wins for scalars; tiles only fill gaps
+    assert merged.project_metadata.drawing_number == "A-101"
+    assert merged.project_metadata.revision == "C"
+    assert merged.standards == ["BS 8110", "ASTM A36"]
+    assert merged.confidence_score == pytest.approx(0.7)
+
+
+def test_single_result_is_returned_unchanged():
+    result = SketchAnalysisResult(standards=["BS 8110", "BS 8110"])
+
+    assert merge_results([result]) is result
+    with pytest.raises(ValueError):
+        merge_results([])
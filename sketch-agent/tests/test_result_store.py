@@ -0,0 +1,87 @@
+import pytest
+
+from agents.result_store import ResultStore, to_millimetres
+from agents.types import (
+    DetailedDimension,
+    DetailedMaterial,
+    ProjectMetadata,
+    SketchAnalysisResult,
+    TechnicalData,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "store"))
+    yield store
+    store.close()
+
+
+def sheet(sketch_id: str, dimensions=(), materials=(), **fields) -> SketchAnalysisResult:
+    return SketchAnalysisResult(
+        sketch_id=sketch_id,
+        project_metadata=ProjectMetadata(project_number="P-100", drawing_number=sketch_id.upper()),
+        technical_data=TechnicalData(dimensions=list(dimensions), materials=list(materials)),
+        **fields
+    )
+
+
+@pytest.mark.parametrize("value, unit, expected", [
+    (3.6, "m", 3600.0),
+    (3.6, "M.", 3600.0),
+    (12, "in", 304.8),
+    (2, "feet", 609.6),
+    (250, "millimetres", 250.0),
+    (12, "m2", None),
+    (12, None, None),
+    (None, "mm", None),
+])
+def test_to_millimetres(value, unit, expected):
+    assert to_millimetres(value, unit) == (pytest.approx(expected) if expected is not None else None)
+
+
+def test_dimension_found_in_any_length_unit(store):
+    store.put(sheet("a-101", dimensions=[DetailedDimension(label="Grid spacing", value=3.6, unit="m")]))
+    store.put(sheet("a-102", dimensions=[DetailedDimension(label="Door width", value=900, unit="mm")]))
+
+    hits = store.query(kind="dimension", value=3600, unit="mm")
+    assert [(hit["sheet"], hit["item"]["label"]) for hit in hits] == [("a-101", "Grid spacing")]
+    assert store.query(kind="dimension", value=3.6005, unit="m")
+    assert not store.query(kind="dimension", value=3.601, unit="m")
+
+
+def test_text_query_matches_every_word(store):
+    store.put(sheet(
+        "s-201",
+        materials=[
+            DetailedMaterial(component="Slab", spec="C40 concrete", grade="C40"),
+            DetailedMaterial(component="Footing", spec="C25 concrete"),
+        ],
+        standards=["BS EN 206"]
+    ))
+
+    hits = store.query(text="C40 concrete")
+    assert [hit["item"]["component"] for hit in hits] == ["Slab"]
+    assert hits[0]["project"] == "P-100"
+    assert hits[0]["drawing_number"] == "S-201"
+    assert len(store.query(text="concr*")) == 2
+    assert store.query(text="206", kind="standard")[0]["item"] == {"code": "BS EN 206"}
+
+
+def test_reindexing_a_sheet_replaces_its_facts(store):
+    store.put(sheet("a-101", standards=["BS 8110"]))
+    store.put(sheet("a-101", standards=["Eurocode 2"]))
+
+    assert [hit["item"]["code"] for hit in store.query(kind="standard")] == ["Eurocode 2"]
+    assert not store.query(text="8110")
+    assert store.stats()["facts"] == 1
+
+
+def test_filters_by_project_and_rejects_unknown_kind(store):
+    store.put(sheet("a-101", standards=["BS 8110"]), project="Tower")
+    store.put(sheet("a-101", standards=["BS 8110"]), project="Depot")
+
+    assert [hit["project"] for hit in store.query(text="8110", project="Depot")] == ["Depot"]
+    assert [row["project"] for row in store.projects()] == ["Depot", "Tower"]
+    with pytest.raises(ValueError):
+        store.query(kind="drawing")
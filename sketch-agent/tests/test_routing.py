@@ -0,0 +1,71 @@
+import pytest
+
+from agents.routing import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agents.routing.time.monotonic", lambda: now[0])
+    return now
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.acquire()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.available()
+    assert not breaker.acquire()
+
+
+def test_half_open_admits_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    trip(breaker)
+
+    clock[0] += 60
+    assert breaker.available()
+    assert breaker.acquire()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.available()
+    assert not breaker.acquire()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.acquire() and breaker.acquire()
+
+
+def test_failed_probe_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    trip(breaker)
+
+    clock[0] += 60
+    assert breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 30
+    assert not breaker.acquire()
+    clock[0] += 30
+    assert breaker.acquire()
+
+
+def test_released_probe_can_be_claimed_again(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    trip(breaker)
+
+    assert breaker.acquire()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.acquire()
@@ -0,0 +1,42 @@
+import pytest
+from PIL import Image
+
+from agents.sketch_agent_v2 import SketchAgent
+from agents.types import BatchItem, SketchMetadata
+
+
+@pytest.fixture
+def agent():
+    return SketchAgent(provider="mock", use_cache=False, use_result_store=False)
+
+
+def metadata(sketch_id: str = "a-101") -> SketchMetadata:
+    return SketchMetadata(sketch_id=sketch_id, filename=f"{sketch_id}.png", file_size=0, dimensions=(800, 600))
+
+
+async def test_analyze_sketch_on_mock_provider(agent):
+    image = Image.new("RGB", (800, 600), "white")
+
+    result = await agent.analyze_sketch(image, metadata())
+
+    assert result.sketch_id == "a-101"
+    assert result.context_layer.document_type
+    assert result.technical_data.dimensions
+    assert result.telemetry.provider == "mock"
+    assert result.telemetry.usage.requests == 1
+
+
+async def test_batch_isolates_failing_items(agent, tmp_path):
+    path = tmp_path / "plan.png"
+    Image.new("L", (640, 480), 255).save(path)
+    items = [
+        BatchItem(image_path=str(path)),
+        BatchItem(image_path=str(tmp_path / "missing.png")),
+        BatchItem(image_path=str(path)),
+    ]
+
+    results = await agent.analyze_batch(items, max_concurrency=2)
+
+    assert [r.index for r in results] == [0, 1, 2]
+    assert [r.success for r in results] == [True, False, True]
+    assert results[0].result.sketch_id == "plan"
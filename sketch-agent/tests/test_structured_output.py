@@ -0,0 +1,57 @@
+import json
+
+from agents.structured_output import (
+    AGENT_FIELDS,
+    analysis_schema,
+    gemini_response_schema,
+    openai_response_format,
+)
+
+
+def subschemas(schema):
+    """Every schema node reachable through properties, items, anyOf and $defs."""
+    yield schema
+    for key in ("properties", "$defs"):
+        for child in schema.get(key, {}).values():
+            yield from subschemas(child)
+    if "items" in schema:
+        yield from subschemas(schema["items"])
+    for child in schema.get("anyOf", []):
+        yield from subschemas(child)
+
+
+def test_agent_fields_are_left_to_the_agent():
+    schema = analysis_schema()
+
+    assert not set(AGENT_FIELDS) & set(schema["properties"])
+    assert "Telemetry" not in schema["$defs"]
+    assert "ProjectMetadata" in schema["$defs"]
+
+
+def test_openai_schema_is_closed_everywhere():
+    response_format = openai_response_format(analysis_schema())
+    schema = response_format["json_schema"]["schema"]
+
+    assert response_format["json_schema"]["strict"]
+    objects = [node for node in subschemas(schema) if "properties" in node]
+    assert len(objects) > 5
+    for node in objects:
+        assert node["additionalProperties"] is False
+        assert node["required"] == list(node["properties"])
+    for node in subschemas(schema):
+        assert not {"title", "default", "minimum", "maximum"} & set(node)
+
+
+def test_schema_copies_are_independent():
+    openai_response_format(analysis_schema())
+
+    assert "additionalProperties" not in analysis_schema()["$defs"]["ProjectMetadata"]
+
+
+def test_gemini_schema_has_no_refs_or_unions():
+    text = json.dumps(gemini_response_schema(analysis_schema()))
+
+    assert "$ref" not in text
+    assert "anyOf" not in text
+    assert "additionalProperties" not in text
+    assert '"nullable": true' in text
@@ -0,0 +1,102 @@
+"""Import-time profiling for the CLI (``--import-profile``).
+
+``main_standalone.py`` installs the profiler before importing anything
+heavy. It wraps ``builtins.__import__`` and records, for every module that
+was actually loaded, the time spent inclusive and exclusive of the modules
+it imported in turn. The hook stays active for the whole run, so imports
+deferred to first use (provider SDKs) are included. The report is printed
+to stderr as JSON at exit, keeping stdout free for results.
+"""
+
+import atexit
+import builtins
+import importlib.util
+import json
+import sys
+import threading
+import time
+
+
+class ImportProfiler:
+    """Times module imports made on the main thread."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # module -> [cumulative seconds, self seconds]
+        self.records: dict[str, list[float]] = {}
+        self._children: list[float] = []
+        self._thread = threading.get_ident()
+        self._original = builtins.__import__
+
+    def install(self) -> None:
+        builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        builtins.__import__ = self._original
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if threading.get_ident() != self._thread:
+            return self._original(name, globals, locals, fromlist, level)
+
+        module = name
+        if level:
+            try:
+                module = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        # ``from pkg import sub`` loads submodules below an already imported package
+        pending = module not in sys.modules or any(
+            f"{module}.{item}" not in sys.modules for item in fromlist or () if item != "*"
+        )
+        if not pending:
+            return self._original(name, globals, locals, fromlist, level)
+
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            record = self.records.setdefault(module, [0.0, 0.0])
+            record[0] += elapsed
+            record[1] += elapsed - children
+
+    def report(self, top: int = 25) -> dict:
+        """Slowest modules (inclusive time) and self time summed per top-level package."""
+        packages: dict[str, float] = {}
+        for module, (_, own) in self.records.items():
+            package = module.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + own
+
+        slowest = sorted(self.records.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            "import_profile": {
+                "wall_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "import_ms": round(sum(packages.values()) * 1000, 1),
+                "packages": {
+                    name: round(seconds * 1000, 1)
+                    for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)
+                    if seconds >= 0.0005
+                },
+                "modules": [
+                    {"module": name, "cumulative_ms": round(total * 1000, 1), "self_ms": round(own * 1000, 1)}
+                    for name, (total, own) in slowest
+                ],
+            }
+        }
+
+
+def start_import_profile() -> ImportProfiler:
+    """Install a profiler and print its report to stderr when the process exits."""
+    profiler = ImportProfiler()
+    profiler.install()
+
+    def print_report() -> None:
+        profiler.uninstall()
+        print(json.dumps(profiler.report(), indent=2), file=sys.stderr)
+
+    atexit.register(print_report)
+    return profiler
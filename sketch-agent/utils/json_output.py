@@ -0,0 +1,57 @@
+"""JSON output for the CLI and the worker.
+
+Responses carry the result models themselves rather than ``model_dump()``
+copies. ``dumps`` serializes each model once, in pydantic-core
+(``model_dump_json``), and embeds the bytes in the envelope with orjson
+when it is installed, instead of building a dict tree and re-encoding it
+with the standard library.
+
+Pretty-printing (2-space indent) is for people reading a terminal. When
+stdout is a pipe (the Node.js server, scripts), output is compact:
+indenting a large takeoff costs more than validating it.
+"""
+
+import json
+import sys
+from typing import Any
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson >= 3.9 embeds pre-serialized JSON without re-parsing it
+_FRAGMENT = getattr(orjson, "Fragment", None)
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def _model_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _fragment_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return _FRAGMENT(obj.model_dump_json())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Serialize a response that may contain pydantic models."""
+    if pretty:
+        return json.dumps(obj, indent=2, default=_model_default)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json()
+    if _FRAGMENT is not None:
+        return orjson.dumps(obj, default=_fragment_default, option=_ORJSON_OPTIONS).decode()
+    if orjson is not None:
+        return orjson.dumps(obj, default=_model_default, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(obj, separators=(",", ":"), default=_model_default)
+
+
+def pretty_output() -> bool:
+    """Indent output only for an interactive terminal."""
+    return sys.stdout.isatty()